@@ -35,11 +35,17 @@ setup(name='llnl-sina',
           ],
           'mysql': [
               'mysql-connector-python',
+          ],
+          'columnar': [
+              'numpy',
+              'pandas',
+              'pyarrow',
           ]
       },
       install_requires=[
           'six',
-          'sqlalchemy',  # API changes, to be investigated/updated for
+          # 1.4.40 added yield_per to Core statements, used to stream reads
+          'sqlalchemy>=1.4.40',  # API changes, to be investigated/updated for
           'sqlalchemy<2;python_version<"3"',
           'enum34;python_version<"3.4"',
           'orjson;python_version>="3.6" and platform_machine!="ppc64le"',
@@ -79,6 +79,7 @@ def setup_arg_parser():
     add_ingest_subparser(subparsers)
     add_export_subparser(subparsers)
     add_query_subparser(subparsers)
+    add_migrate_subparser(subparsers)
     if CLI_TOOLS_PRESENT:
         add_compare_subparser(subparsers)
     return parser
@@ -114,6 +115,10 @@ def add_ingest_subparser(subparsers):
                                '--source-type is not provided. All URIs being '
                                'ingested in one command must share a type.',
                                choices=['json'])
+    parser_ingest.add_argument('--jobs', '-j', type=int, default=1,
+                               help='The number of processes to parse sources '
+                               'with. Writing is still done by a single process, '
+                               'so this is safe to use with SQLite. Default: 1.')
 
 
 def add_export_subparser(subparsers):
@@ -195,6 +200,19 @@ def add_query_subparser(subparsers):
                               help='Only return the IDs of matching Records.')
 
 
+def add_migrate_subparser(subparsers):
+    """Add subparser for upgrading existing backends to the current schema."""
+    parser_migrate = subparsers.add_parser(
+        'migrate', help='bring an existing database up to date with the current '
+                        'schema (ex: build new indexes) in place. See "sina '
+                        'migrate -h" for more information.')
+    _add_common_args(parser=parser_migrate)
+    parser_migrate.add_argument('--sections', action='store_true',
+                                help='Also start storing the sections of Records (data, '
+                                     'curve_sets, etc.) separately, so fetching only some '
+                                     'of them is faster. Stores each Record twice.')
+
+
 def add_compare_subparser(subparsers):
     """Add subparser for performing record comparisons."""
     parser_compare = subparsers.add_parser(
@@ -332,13 +350,15 @@ def ingest(args):
         elif args.source_type not in ['json']:
             error_message.append("Currently, ingesting is only supported when "
                                  "using json files as the source.")
+    if args.jobs < 1:
+        error_message.append("--jobs must be at least 1.")
     error_message.extend(_check_common_args(args=args))
     if error_message:
         msg = "\n".join(error_message)
         LOGGER.error(msg)
         raise ValueError(msg)
     factory = _make_factory(args=args)
-    import_json(factory=factory, json_paths=source_list)
+    import_json(factory=factory, json_paths=source_list, jobs=args.jobs)
 
 
 def export(args):
@@ -423,6 +443,29 @@ def query(args):
         print([x.raw for x in record_dao.get(matches)])
 
 
+def migrate(args):
+    """
+    Run logic associated with the migrate subparser.
+
+    :params args: (ArgumentParser, req) Command line args that tell us what
+        database to use.
+
+    :raises ValueError: if there's an issue with flags
+    """
+    LOGGER.info('Migrating database=%s, database_type=%s.',
+                args.database, args.database_type)
+    error_message = _check_common_args(args=args)
+    if error_message:
+        msg = "\n".join(error_message)
+        LOGGER.error(msg)
+        raise ValueError(msg)
+    factory = _make_factory(args=args)
+    created, dropped = factory.upgrade_schema(store_sections=args.sections)
+    print('Created {} table(s) and index(es), dropped {} superseded index(es).'
+          .format(len(created), len(dropped)))
+    factory.close()
+
+
 def compare_records(args):
     """
     Run logic for comparing records.
@@ -566,6 +609,8 @@ def main():
             export(args)
         elif args.subparser_name == 'query':
             query(args)
+        elif args.subparser_name == 'migrate':
+            migrate(args)
         elif args.subparser_name == 'compare':
             compare_records(args)
         else:
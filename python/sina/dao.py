@@ -7,28 +7,151 @@ datastore.py for up-to-date user-level descriptions of what everything should
 do.
 """
 from abc import ABCMeta, abstractmethod
+import bisect
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
 import copy
+import importlib
+import itertools
 import logging
+import math
 import numbers
+import os
 
 import six
 
 import sina.model
 import sina.sjson as json
-from sina.utils import DataRange, Negation
+from sina.utils import DataRange, Negation, exists, intersect_ordered
 
 LOGGER = logging.getLogger(__name__)
 
 # Disable pylint checks due to ubiquitous use of id and type
 # pylint: disable=invalid-name,redefined-builtin
 
+# The ways insert() can handle Records whose ids are already taken
+ON_CONFLICT_MODES = (None, "replace", "skip")
+
+# The order find() runs its queries in by default
+DEFAULT_QUERY_ORDER = ("data", "file_uri", "mimetype", "types")
+
+# The sections of a Record's raw that can be fetched separately (see get()). "other"
+# covers any top-level keys besides these and the id and type.
+RECORD_SECTIONS = ("data", "curve_sets", "library_data", "files", "user_defined", "other")
+
+# What get_data_columns() can return its columns as
+COLUMN_FORMATS = ("numpy", "pandas", "arrow")
+
+# The statistics aggregate() can compute
+AGGREGATE_OPS = ("count", "min", "max", "mean", "std", "histogram")
+
+
+class BatchInsertError(Exception):
+    """
+    Raised when one batch of a batched insert fails.
+
+    Every batch before the failed one has already been committed, so a caller
+    can resume by skipping the first records_committed Records. Within a
+    DataStore.transaction(), nothing is committed until the block ends, so
+    records_committed is 0; earlier batches are still pending in the block.
+    """
+
+    def __init__(self, batch_index, records_committed, cause):
+        """
+        Create a BatchInsertError.
+
+        :param batch_index: The (0-based) index of the batch that failed.
+        :param records_committed: How many Records were committed before it.
+        :param cause: The exception raised while inserting the batch.
+        """
+        super(BatchInsertError, self).__init__(
+            "Insert failed in batch {} ({} records already committed): {!r}"
+            .format(batch_index, records_committed, cause))
+        self.batch_index = batch_index
+        self.records_committed = records_committed
+        self.cause = cause
+
+
+def _build_records(raws, _record_builder):
+    """
+    Build Records from a chunk of raws; the work done by get()'s prefetch workers.
+
+    :param raws: A list of (id, type, raw JSON string) rows
+    :param _record_builder: The function used to create a Record object from the raw.
+    :returns: A list of Records
+    """
+    return [_record_builder(json_input=json.loads(raw)) for _, _, raw in raws]
+
+
+def _import_for_columns(module_name, as_):
+    """
+    Import one of the optional libraries get_data_columns() formats columns with.
+
+    :param module_name: The name of the module to import
+    :param as_: The format it's needed for, for the error message
+    :returns: The module
+    :raises ImportError: if it isn't installed
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as exc:
+        raise ImportError('Getting data columns as "{}" requires {}, which can be installed '
+                          'with Sina\'s "columnar" extra.'.format(as_, module_name)) from exc
+
+
+def _numpy_column(numpy, values):
+    """
+    Convert one column of get_data_columns() to a NumPy array.
+
+    :param numpy: The numpy module
+    :param values: A list of a datum's values, None where it's missing
+    :returns: A float array (NaN where missing) if all the values present are
+              scalars, else an object array (None where missing) whose lists
+              are themselves arrays.
+    """
+    if all(isinstance(x, numbers.Real) for x in values if x is not None):
+        return numpy.array(values, dtype=float)
+    column = numpy.empty(len(values), dtype=object)
+    for index, value in enumerate(values):
+        column[index] = numpy.asarray(value) if isinstance(value, list) else value
+    return column
+
+
+def _format_columns(ids, columns, as_):
+    """
+    Convert the columns found by get_data_columns() to the format requested.
+
+    :param ids: A list of the ids of the Records the columns align to
+    :param columns: An OrderedDict of {<datum name>: <list of values, None where missing>}
+    :param as_: One of COLUMN_FORMATS
+    :returns: For "numpy", an OrderedDict of arrays, the first being the ids
+              under "id". For "pandas", a DataFrame indexed by id. For "arrow",
+              a Table whose first column is "id".
+    """
+    if as_ == "arrow":
+        pyarrow = _import_for_columns("pyarrow", as_)
+        arrays = collections.OrderedDict([("id", pyarrow.array(ids, type=pyarrow.string()))])
+        for name, values in columns.items():
+            arrays[name] = pyarrow.array(values)
+        return pyarrow.table(arrays)
+    numpy = _import_for_columns("numpy", as_)
+    arrays = [(name, _numpy_column(numpy, values)) for name, values in columns.items()]
+    if as_ == "pandas":
+        pandas = _import_for_columns("pandas", as_)
+        return pandas.DataFrame(collections.OrderedDict(arrays),
+                                index=pandas.Index(ids, name="id"))
+    return collections.OrderedDict([("id", numpy.array(ids, dtype=object))] + arrays)
+
 
 class RecordDAO(object):
     """The DAO responsible for handling Records."""
 
     __metaclass__ = ABCMeta
 
-    def get(self, ids, _record_builder=sina.model.generate_record_from_json, chunk_size=999):
+    # pylint: disable=too-many-arguments
+    def get(self, ids, _record_builder=sina.model.generate_record_from_json, chunk_size=999,
+            prefetch=False, workers=None, sections=None):
         """
         Given an (iterable of) id(s), return matching Record(s).
 
@@ -40,20 +163,204 @@ class RecordDAO(object):
         Likewise, chunk_size is a machine-specific parameter set to 999 for safety to limit
         the size of an IN query below the compiled max in SQL. Should usually not be touched.
 
+        :param prefetch: Whether to decode Records in a pool of workers, fetching
+                         the next chunk's raws while earlier chunks are decoded.
+                         Ignored for a single id. See _get_many_prefetched().
+        :param workers: If prefetching, the number of worker threads to decode with,
+                        or a concurrent.futures.Executor (ex: a ProcessPoolExecutor)
+                        to decode in. Defaults to a single thread.
+        :param sections: If given, an iterable of the sections of the Records (see
+                         RECORD_SECTIONS) to fetch; the rest are left empty. Takes
+                         precedence over prefetch. See _get_projected().
         :returns: If provided an iterable, a generator of Record objects, else a
                   single Record object.
 
-        :raises ValueError: if no Record is found for some id.
+        :raises ValueError: if no Record is found for some id, or if given an
+                            unknown section.
         """
 
         if isinstance(ids, six.string_types):
             LOGGER.debug('Getting record with id=%s', ids)
+            if sections is not None:
+                return next(self._get_projected([ids], sections, chunk_size))
             return self._get_one(ids, _record_builder)
 
         ids = list(ids)
         LOGGER.debug('Getting records with ids in %s', ids)
+        if sections is not None:
+            return self._get_projected(ids, sections, chunk_size)
+        if prefetch:
+            return self._get_many_prefetched(ids, _record_builder, chunk_size, workers)
         return self._get_many(ids, _record_builder, chunk_size)
 
+    def _get_raw_chunks(self, ids, chunk_size):
+        """
+        Fetch the raws of Records, a chunk at a time.
+
+        Backends that can fetch several raws per query (and their types
+        alongside) should; by default, each is fetched with get_raw().
+
+        :param ids: A list of Record ids to fetch the raws of
+        :param chunk_size: How many ids to fetch per chunk
+        :returns: A generator of lists of (id, type, raw JSON string) rows, one
+                  list per chunk. The type may be None if the backend can't
+                  provide it without parsing the raw.
+        :raises ValueError: if no Record is found for some id.
+        """
+        for chunk_start in range(0, len(ids), chunk_size):
+            yield [(x, None, self.get_raw(x)) for x in ids[chunk_start:chunk_start + chunk_size]]
+
+    @staticmethod
+    def _split_sections(raw):
+        """
+        Split a Record's raw into its non-empty sections (see RECORD_SECTIONS).
+
+        :param raw: A Record's raw dictionary
+        :returns: A dictionary of {<section>: <contents>}
+        """
+        sections = {key: raw[key] for key in RECORD_SECTIONS[:-1] if raw.get(key)}
+        other = {key: val for key, val in raw.items()
+                 if key not in RECORD_SECTIONS and key not in ("id", "type")}
+        if other:
+            sections["other"] = other
+        return sections
+
+    def _get_section_chunks(self, ids, chunk_size, sections):
+        """
+        Fetch some sections of Records, a chunk at a time.
+
+        Backends that store the sections separately should fetch only those
+        requested; by default, the whole raws are fetched and split.
+
+        :param ids: A list of Record ids to fetch
+        :param chunk_size: How many ids to fetch per chunk
+        :param sections: A collection of the names of the sections to fetch
+        :returns: A generator of lists of (id, type, {<section>: <contents>}) rows,
+                  one list per chunk. Empty sections may be absent.
+        :raises ValueError: if no Record is found for some id.
+        """
+        for rows in self._get_raw_chunks(ids, chunk_size):
+            chunk = []
+            for id, type, raw in rows:
+                raw = json.loads(raw)
+                chunk.append((id, type or raw["type"],
+                              {key: val for key, val in self._split_sections(raw).items()
+                               if key in sections}))
+            yield chunk
+
+    def _get_projected(self, ids, sections, chunk_size=999):
+        """
+        Get Records holding only some of their sections.
+
+        :param ids: A list of Record ids to return
+        :param sections: An iterable of the sections (see RECORD_SECTIONS) to fetch
+        :param chunk_size: How many Records to fetch at a time
+        :returns: A generator of Records whose other sections are empty
+        :raises ValueError: if given an unknown section. Also if no Record is
+                            found for some id, but only once iterated over.
+        """
+        sections = set(sections)
+        unknown = sections.difference(RECORD_SECTIONS)
+        if unknown:
+            raise ValueError("Unknown section(s) {}; sections are {}"
+                             .format(sorted(unknown), RECORD_SECTIONS))
+        LOGGER.debug('Getting sections %s of records with ids in %s', sections, ids)
+        return self._build_projected(ids, sections, chunk_size)
+
+    def _build_projected(self, ids, sections, chunk_size):
+        """Build the Records for _get_projected(), which validates first."""
+        for rows in self._get_section_chunks(ids, chunk_size, sections):
+            for id, type, contents in rows:
+                json_input = dict(contents.pop("other", {}), id=id, type=type)
+                json_input.update(contents)
+                record = sina.model.generate_record_from_json(json_input)
+                record.projected_sections = frozenset(sections)
+                yield record
+
+    @staticmethod
+    def _check_whole(record):
+        """
+        Make sure a Record about to be stored wasn't fetched with only some sections.
+
+        :param record: The Record to check
+        :returns: The Record
+        :raises ValueError: if the Record holds only some of its sections
+        """
+        if record.projected_sections is not None:
+            raise ValueError("Can't store record {}, which only holds sections {}; "
+                             "get() it without sections first"
+                             .format(record.id, sorted(record.projected_sections)))
+        return record
+
+    def _get_lazily(self, ids, chunk_size=999):
+        """
+        Get Records without parsing them until they're used; see model.LazyRecord.
+
+        :param ids: An iterable of Record ids to return
+        :param chunk_size: How many Records to fetch at a time
+        :returns: A generator of LazyRecords
+        :raises ValueError: if no Record is found for some id.
+        """
+        for rows in self._get_raw_chunks(list(ids), chunk_size):
+            for id, type, raw in rows:
+                yield sina.model.LazyRecord(raw, id=id, type=type)
+
+    def _get_found(self, ids, lazy=False, sections=None):
+        """
+        Get the Records a query found, for the methods returning them.
+
+        :param ids: An iterable of Record ids to return
+        :param lazy: Whether to return LazyRecords
+        :param sections: The sections of the Records to fetch, if not all. Takes
+                         precedence over lazy.
+        :returns: A generator of Records
+        """
+        if sections is not None:
+            return self._get_projected(list(ids), sections)
+        if lazy:
+            return self._get_lazily(ids)
+        return self.get(ids)
+
+    def _get_many_prefetched(self, ids, _record_builder, chunk_size, workers=None):
+        """
+        Get Records, decoding chunks in a pool of workers as later ones are fetched.
+
+        Fetching stays on the calling thread (DAOs aren't threadsafe) while
+        parsing and building Records, often the bottleneck for large Records,
+        happens in the pool. Up to one chunk per worker is decoded at a time,
+        and chunks are yielded in the order they were fetched.
+
+        :param ids: A list of Record ids to return
+        :param _record_builder: The function used to create a Record object
+                                (or one of its children) from the raw. Must be
+                                picklable if workers is a ProcessPoolExecutor.
+        :param chunk_size: How many Records to fetch and decode at a time
+        :param workers: The number of worker threads to decode with, or a
+                        concurrent.futures.Executor to decode in. Defaults to 1.
+        :returns: A generator of Record objects
+        """
+        if workers is None or isinstance(workers, numbers.Integral):
+            max_pending = workers or 1
+            executor = ThreadPoolExecutor(max_workers=max_pending)
+        else:
+            max_pending = os.cpu_count() or 1
+            executor = workers
+        pending = collections.deque()
+        try:
+            for raws in self._get_raw_chunks(ids, chunk_size):
+                pending.append(executor.submit(_build_records, raws, _record_builder))
+                if len(pending) > max_pending:
+                    for record in pending.popleft().result():
+                        yield record
+            while pending:
+                for record in pending.popleft().result():
+                    yield record
+        finally:
+            for future in pending:
+                future.cancel()
+            if executor is not workers:
+                executor.shutdown(wait=False)
+
     def _get_one(self, id, _record_builder):
         """
         Apply some "get" function to a single Record id.
@@ -113,10 +420,9 @@ class RecordDAO(object):
     def _do_delete_all_records(self):
         """Implement logic for Datastore's delete_all_contents()."""
         # Relies on the propagated deletes of the RecordDAO, which also wipe out
-        # relationships. Could be made more efficient with the use of TRUNCATE or the
-        # like, but if this somehow becomes a performance bottleneck and requires
-        # that upgrade, make sure you add backend-specific tests that make sure all
-        # tables are cleared. At that point, it may belong in the DAOFactory.
+        # relationships. Backends that can empty their tables wholesale (SQL, via
+        # TRUNCATE or the like) override this; make sure any such override has
+        # backend-specific tests that make sure all tables are cleared.
         self.delete(self.get_all(ids_only=True))
 
     def update(self, records):
@@ -124,13 +430,16 @@ class RecordDAO(object):
         Given one or more Records, update them in the backend.
 
         :param records: A Record or iterable of Records to update.
+        :raises ValueError: if a Record hasn't been inserted, or was fetched
+                            with only some of its sections.
         """
         if isinstance(records, sina.model.Record):
             LOGGER.debug('Updating record with id=%s', records.id)
             ids = [records.id]
-            records = [sina.model.flatten_library_content(records)]
+            records = [sina.model.flatten_library_content(self._check_whole(records))]
         else:
-            records = [sina.model.flatten_library_content(record) for record in records]
+            records = [sina.model.flatten_library_content(self._check_whole(record))
+                       for record in records]
             ids = [record.id for record in records]
             LOGGER.debug('Updating records with ids=%s', ids)
         if not all(self.exist(ids)):
@@ -147,13 +456,16 @@ class RecordDAO(object):
         Given one or more Records, update them in the backend.
 
         :param records: A Record or iterable of Records to update.
+        :raises ValueError: if a Record hasn't been inserted, or was fetched
+                            with only some of its sections.
         """
         if isinstance(records, sina.model.Record):
             LOGGER.debug('Updating record with id=%s', records.id)
             ids = [records.id]
-            records = [sina.model.flatten_library_content(records)]
+            records = [sina.model.flatten_library_content(self._check_whole(records))]
         else:
-            records = [sina.model.flatten_library_content(record) for record in records]
+            records = [sina.model.flatten_library_content(self._check_whole(record))
+                       for record in records]
             ids = [record.id for record in records]
             LOGGER.debug('Updating records with ids=%s', ids)
         if not all(self.exist(ids)):
@@ -166,7 +478,7 @@ class RecordDAO(object):
         raise NotImplementedError
 
     def insert(self, records, ingest_funcs=None,
-               ingest_funcs_preserve_raw=None):
+               ingest_funcs_preserve_raw=None, batch_size=None, on_conflict=None):
         """
         Given one or more Records, insert them into the DAO's backend.
 
@@ -179,21 +491,63 @@ class RecordDAO(object):
                                           If we can interact with the raw, we don't
                                           need to pass an unaltered set of records.
                                           MUST BE SPECIFIED if using ingest_funcs
-        """
+        :param batch_size: If given, consume <records> lazily and commit every
+                           <batch_size> Records rather than all at once.
+        :param on_conflict: What to do when a Record's id already exists. By default,
+                            it's an error. "replace" replaces the stored Record,
+                            "skip" keeps it.
+        :raises BatchInsertError: if batch_size is given and a batch fails.
+        :raises ValueError: if given an unknown on_conflict, or a Record that
+                            was fetched with only some of its sections.
+        """
+        if on_conflict not in ON_CONFLICT_MODES:
+            raise ValueError("on_conflict must be one of {}, not {}"
+                             .format(ON_CONFLICT_MODES, on_conflict))
         if isinstance(records, (sina.model.Record, sina.model.Run)):
             records = [records]
         if callable(ingest_funcs):
             ingest_funcs = [ingest_funcs]
         if ingest_funcs is None:
-            self._do_insert(sina.model.flatten_library_content(record) for record in records)
+            self._do_insert((sina.model.flatten_library_content(self._check_whole(record))
+                             for record in records),
+                            batch_size=batch_size, on_conflict=on_conflict)
             return
         else:
             if ingest_funcs_preserve_raw is None:
                 raise ValueError(
                     "`ingest_funcs_preserve_raw` must be specified when using ingest_funcs")
-        self._do_insert(self._do_process(record, ingest_funcs,
-                                         ingest_funcs_preserve_raw)
-                        for record in records)
+        self._do_insert((self._do_process(self._check_whole(record), ingest_funcs,
+                                          ingest_funcs_preserve_raw)
+                         for record in records),
+                        batch_size=batch_size, on_conflict=on_conflict)
+
+    @staticmethod
+    def _insert_in_batches(records, batch_size, insert_batch, committing=True):
+        """
+        Lazily split an iterable of Records into batches and insert each.
+
+        :param records: An iterable of Records
+        :param batch_size: The number of Records per batch
+        :param insert_batch: A function that inserts (and commits) a list of Records
+        :param committing: Whether insert_batch commits. If not (as within a
+                           transaction), no Records are reported committed on failure.
+        :raises BatchInsertError: if building or inserting a batch fails
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer, got {}"
+                             .format(batch_size))
+        records = iter(records)
+        for batch_index in itertools.count():
+            try:
+                batch = list(itertools.islice(records, batch_size))
+                if not batch:
+                    return
+                LOGGER.debug('Inserting batch %i (%i records).', batch_index, len(batch))
+                insert_batch(batch)
+            except Exception as cause:
+                raise BatchInsertError(batch_index,
+                                       batch_index * batch_size if committing else 0,
+                                       cause) from cause
 
     @staticmethod
     def _do_process(record, postprocessing_funcs, preserve_raw):
@@ -214,7 +568,7 @@ class RecordDAO(object):
         return record
 
     @abstractmethod
-    def _do_insert(self, records):
+    def _do_insert(self, records, batch_size=None, on_conflict=None):
         """Handle the logic of the insert itself."""
         raise NotImplementedError
 
@@ -518,6 +872,203 @@ class RecordDAO(object):
         """
         raise NotImplementedError
 
+    def get_data_columns(self, data_list, id_list=None, as_="numpy"):
+        """
+        Retrieve data for Records as columns, one per name, aligned by Record.
+
+        :param data_list: A list of the names of data fields to find
+        :param id_list: A list of the record ids to find data for, None for all
+                        Records having any of the data.
+        :param as_: What to return the columns as, one of COLUMN_FORMATS. See
+                    _format_columns().
+        :returns: The columns, in data_list's order. Rows follow id_list, or
+                  are sorted by id if it's None.
+        :raises ValueError: if given an unknown format
+        :raises ImportError: if the libraries needed for the format are missing
+        """
+        if as_ not in COLUMN_FORMATS:
+            raise ValueError("as_ must be one of {}, not {}".format(COLUMN_FORMATS, as_))
+        if id_list is not None:
+            id_list = list(collections.OrderedDict.fromkeys(id_list))
+        LOGGER.debug('Getting data columns %s for %s', data_list,
+                     'record ids in {}'.format(id_list) if id_list is not None else "all records")
+        ids, columns = self._get_data_columns(list(data_list), id_list)
+        return _format_columns(ids, columns, as_)
+
+    def _get_data_columns(self, data_list, id_list=None):
+        """
+        Find the values for get_data_columns() as plain lists.
+
+        By default, this reads the data sections of every Record concerned.
+        Backends that can pivot indexed data into columns in the database
+        should.
+
+        :param data_list: A list of the names of data fields to find
+        :param id_list: A list of unique record ids to find data for, None for
+                        all Records having any of the data.
+        :returns: A tuple of a list of the Records' ids and an OrderedDict of
+                  {<datum name>: <list of values aligned to them, None where missing>}
+        """
+        if id_list is None:
+            candidates = sorted(self.get_all(ids_only=True))
+        else:
+            candidates = [id for id, exists in zip(id_list, self.exist(id_list)) if exists]
+        found = {}
+        for rows in self._get_section_chunks(candidates, 999, ("data",)):
+            for id, _, contents in rows:
+                data = contents.get("data", {})
+                if any(name in data for name in data_list):
+                    found[id] = data
+        ids = id_list if id_list is not None else [x for x in candidates if x in found]
+        columns = collections.OrderedDict(
+            (name, [found[id][name]["value"] if name in found.get(id, {}) else None
+                    for id in ids])
+            for name in data_list)
+        return ids, columns
+
+    # pylint: disable=too-many-arguments
+    def aggregate(self, scalar, ops=AGGREGATE_OPS, bins=10, group_by=None, types=None,
+                  data=None):
+        """
+        Compute statistics of a scalar over some or all Records.
+
+        :param scalar: The name of the scalar datum to aggregate
+        :param ops: The statistics to compute, from AGGREGATE_OPS
+        :param bins: For the histogram, the number of equal-width bins spanning
+                     the values (across all groups), or a list of their edges.
+                     Each bin includes its lower edge, the last its upper edge too.
+        :param group_by: The name of a string datum to compute the statistics
+                         per value of, or "type" for per Record type
+        :param types: As in find(), the types of Record to consider
+        :param data: As in find(), criteria on the data of the Records to consider
+        :returns: A dictionary of {<op>: <statistic>}, the histogram being a
+                  dictionary of its "counts" and "edges". If grouping, an
+                  OrderedDict of {<group>: <statistics>}, sorted by group, where
+                  Records lacking the datum fall under None (last).
+        :raises ValueError: if given an unknown op or bad bins
+        """
+        ops = list(collections.OrderedDict.fromkeys(self._ensure_is_list(ops)))
+        unknown = set(ops).difference(AGGREGATE_OPS)
+        if unknown:
+            raise ValueError("Unknown op(s) {}; ops are {}".format(sorted(unknown),
+                                                                   AGGREGATE_OPS))
+        if isinstance(bins, numbers.Integral):
+            if bins < 1:
+                raise ValueError("bins must be positive, not {}".format(bins))
+        else:
+            bins = list(bins)
+            if len(bins) < 2 or any(x >= y for x, y in zip(bins, bins[1:])):
+                raise ValueError("bins must be at least two increasing edges, not {}"
+                                 .format(bins))
+        LOGGER.debug('Aggregating %s for %s over %s grouped by %s',
+                     scalar, ops, {"types": types, "data": data}, group_by)
+        groups = self._aggregate(scalar, ops, bins, group_by, types=types,
+                                 data=dict(data) if data is not None else None)
+        if group_by is None:
+            return groups[None]
+        return collections.OrderedDict((key, groups[key]) for key in
+                                       sorted(groups, key=lambda x: (x is None, x)))
+
+    def _aggregate(self, scalar, ops, bins, group_by, types=None, data=None):
+        """
+        Compute the statistics for aggregate().
+
+        By default, this reads the data sections of every Record concerned.
+        Backends able to aggregate in the database should.
+
+        :param scalar: The name of the scalar datum to aggregate
+        :param ops: A list of the statistics to compute
+        :param bins: The number of histogram bins, or a list of their edges
+        :param group_by: As in aggregate()
+        :param types: As in find()
+        :param data: As in find()
+        :returns: A dictionary of {<group>: <statistics>}, with None the sole
+                  group when not grouping (whether or not any values are found)
+        """
+        criteria = dict(data or {})
+        criteria.setdefault(scalar, exists())
+        ids = list(self._find(types=types, data=criteria, ids_only=True))
+        values = collections.defaultdict(list)
+        if group_by is None:
+            values[None] = []
+        for rows in self._get_section_chunks(ids, 999, ("data",)):
+            for _, type, contents in rows:
+                record_data = contents.get("data", {})
+                value = record_data.get(scalar, {}).get("value")
+                if not isinstance(value, numbers.Real):
+                    continue
+                if group_by is None:
+                    key = None
+                elif group_by == "type":
+                    key = type
+                else:
+                    key = record_data.get(group_by, {}).get("value")
+                    key = key if isinstance(key, six.string_types) else None
+                values[key].append(value)
+        all_values = list(itertools.chain.from_iterable(values.values()))
+        if "histogram" in ops:
+            edges = self._histogram_edges(bins, min(all_values) if all_values else None,
+                                          max(all_values) if all_values else None)
+        groups = {}
+        for key, group in values.items():
+            total = sum(group)
+            mean = float(total) / len(group) if group else 0.0
+            groups[key] = self._summarize(ops, len(group), min(group) if group else None,
+                                          max(group) if group else None, total,
+                                          sum((x - mean) ** 2 for x in group))
+            if "histogram" in ops:
+                counts = [0] * (len(edges) - 1)
+                for value in group:
+                    if edges[0] <= value <= edges[-1]:
+                        counts[min(bisect.bisect_right(edges, value), len(counts)) - 1] += 1
+                groups[key]["histogram"] = {"counts": counts, "edges": edges}
+        return groups
+
+    @staticmethod
+    def _histogram_edges(bins, low, high):
+        """
+        Find the edges of an aggregate()'s histogram bins, as NumPy would.
+
+        :param bins: The number of equal-width bins, or a list of their edges
+        :param low: The smallest value to bin, None if there are none
+        :param high: The largest value to bin, None if there are none
+        :returns: A list of the bins' edges, one more than there are bins
+        """
+        if not isinstance(bins, numbers.Integral):
+            return [float(x) for x in bins]
+        if low is None:
+            low, high = 0.0, 1.0
+        elif low == high:
+            low, high = low - 0.5, high + 0.5
+        width = (high - low) / float(bins)
+        return [low + width * index for index in range(bins)] + [float(high)]
+
+    @staticmethod
+    def _summarize(ops, count, low, high, total, squared_deviations):
+        """
+        Compute aggregate()'s statistics (besides the histogram) from running sums.
+
+        The squared deviations are taken around the mean, rather than the
+        variance being found from the sum of the squares, which would lose all
+        precision for large values (ex: timestamps) that vary little.
+
+        :param ops: The statistics to compute, from AGGREGATE_OPS
+        :param count: How many values there are
+        :param low: The smallest value, None if there are none
+        :param high: The largest value, None if there are none
+        :param total: The sum of the values
+        :param squared_deviations: The sum of the squares of the values' differences
+                                   from their mean
+        :returns: A dictionary of {<op>: <statistic>}, None for those undefined
+                  for no values
+        """
+        mean = float(total) / count if count else None
+        stats = {"count": count, "min": low, "max": high, "mean": mean}
+        if "std" in ops:
+            # The population standard deviation
+            stats["std"] = math.sqrt(float(squared_deviations) / count) if count else None
+        return {op: stats[op] for op in ops if op != "histogram"}
+
     @abstractmethod
     def get_with_mime_type(self, mimetype, ids_only=False, id_pool=None):
         """
@@ -533,47 +1084,311 @@ class RecordDAO(object):
         """
         raise NotImplementedError
 
+    def _can_query_concurrently(self):
+        """
+        Whether this DAO's queries can safely run on several threads at once.
+
+        Backends that can should also implement _concurrent_dao().
+
+        :returns: False by default.
+        """
+        return False
+
+    @contextlib.contextmanager
+    def _concurrent_dao(self):
+        """
+        Provide a RecordDAO a single thread can query with while others query too.
+
+        :returns: (As a contextmanager) a RecordDAO on the same datastore. By default,
+                  this one.
+        """
+        yield self
+
+    def _run_find_query(self, query_type, arg, id_pool=None, alias_dict=None):
+        """
+        Run one of find()'s queries.
+
+        :param query_type: The name of the query, as in DEFAULT_QUERY_ORDER
+        :param arg: The criterion to pass it
+        :param id_pool: A pool of ids to restrict the query to
+        :param alias_dict: As in find(), used by the data query
+        :returns: A list of the ids of matching Records
+        """
+        if query_type == "data":
+            # Data has no ids_only
+            return list(self._do_data_query(arg, id_pool=id_pool, alias_dict=alias_dict))
+        query_func = {"file_uri": self._do_get_given_document_uri,
+                      "mimetype": self.get_with_mime_type,
+                      "types": self.get_all_of_type}[query_type]
+        return list(query_func(arg, id_pool=id_pool, ids_only=True))
+
+    def _run_ordered_find_query(self, query_type, arg, alias_dict=None):
+        """
+        Run one of find()'s queries, producing the ids of matches in ascending order.
+
+        Backends that can have the database do the ordering should, streaming
+        the ids rather than holding them all; by default, the query's results
+        are collected and sorted.
+
+        :param query_type: The name of the query, as in DEFAULT_QUERY_ORDER
+        :param arg: The criterion to pass it
+        :param alias_dict: As in find(), used by the data query
+        :returns: An iterable of the ids of matching Records, ordered as Python
+                  orders strings
+        """
+        return sorted(self._run_find_query(query_type, arg, alias_dict=alias_dict))
+
+    def _find_ordered(self, args, id_pool=None, ids_only=False, alias_dict=None, lazy=False,
+                      sections=None):
+        """
+        Run each of find()'s queries in id order, merging them as they go.
+
+        As the queries' results are intersected by utils.intersect_ordered(),
+        matches are yielded as soon as every query has reached them, and (if
+        the backend streams its ordered queries) memory use doesn't grow with
+        the number of candidates.
+
+        :param args: A dictionary of {<query name>: <criterion>}, as in DEFAULT_QUERY_ORDER.
+                     Queries whose criterion is None are skipped.
+        :param id_pool: As in find()
+        :param ids_only: As in find()
+        :param alias_dict: As in find()
+        :param lazy: As in find()
+        :param sections: As in find()
+        :returns: A generator of matching ids (if ids_only) or Records, in id order
+        """
+        LOGGER.debug('Performing an ordered find() with queries %s',
+                     [x for x in DEFAULT_QUERY_ORDER if args[x] is not None])
+        streams = [self._run_ordered_find_query(x, args[x], alias_dict=alias_dict)
+                   for x in DEFAULT_QUERY_ORDER if args[x] is not None]
+        if id_pool is not None:
+            streams.append(sorted(set(id_pool)))
+        try:
+            matches = intersect_ordered(streams)
+            if ids_only:
+                for id in matches:
+                    yield id
+            else:
+                for chunk in iter(lambda: list(itertools.islice(matches, 999)), []):
+                    for record in self._get_found(chunk, lazy=lazy, sections=sections):
+                        yield record
+        finally:
+            # The merge stops at the first exhausted query, so release the others
+            for stream in streams:
+                if hasattr(stream, "close"):
+                    stream.close()
+
     # High arg count is inherent to the functionality.
     # pylint: disable=too-many-arguments
     def _find(self, types=None, data=None, file_uri=None,
               mimetype=None, id_pool=None, ids_only=False,
-              query_order=("data", "file_uri", "mimetype", "types"), alias_dict=None):
+              query_order=DEFAULT_QUERY_ORDER, alias_dict=None, concurrent=False, lazy=False,
+              sections=None, order_by=None, descending=False, limit=None, after=None):
         """Implement cross-backend logic for the DataStore method of the same name."""
-        LOGGER.debug('Performing a general find() query with order %s', query_order)
-        query_map = {"data": (self._do_data_query, data),
-                     "file_uri": (self._do_get_given_document_uri, file_uri),
-                     "mimetype": (self.get_with_mime_type, mimetype),
-                     "types": (self.get_all_of_type, types)}
-
+        order_by = self._sort_order(order_by, descending, limit, after)
+        if order_by is not None:
+            criteria = {"types": types, "data": data, "file_uri": file_uri,
+                        "mimetype": mimetype, "query_order": query_order,
+                        "alias_dict": alias_dict, "concurrent": concurrent}
+            return self._find_sorted(criteria, order_by, descending=descending, limit=limit,
+                                     after=after, id_pool=id_pool, ids_only=ids_only,
+                                     lazy=lazy, sections=sections)
         if all((x is None for x in [types, data, file_uri, mimetype])):
             # Not passing any filter is valid usage; we return all.
             if id_pool is None:
+                if (lazy or sections is not None) and not ids_only:
+                    return self._get_found(self.get_all(ids_only=True), lazy=lazy,
+                                           sections=sections)
                 return self.get_all(ids_only=ids_only)
             # Passing in only id_pool is valid usage; we return all that exist.
             existing_ids = [x[1] for x in zip(self.exist(id_pool), id_pool) if x[0]]
             if ids_only:
                 return (x for x in existing_ids)
-            return self.get(existing_ids)
-
+            return self._get_found(existing_ids, lazy=lazy, sections=sections)
+
+        args = {"data": data, "file_uri": file_uri, "mimetype": mimetype, "types": types}
+        if concurrent:
+            if self._can_query_concurrently():
+                return self._find_concurrently(args, id_pool=id_pool, ids_only=ids_only,
+                                               alias_dict=alias_dict, lazy=lazy,
+                                               sections=sections)
+            LOGGER.warning('This datastore cannot run queries concurrently. '
+                           'Running find() serially instead.')
+        LOGGER.debug('Performing a general find() query with order %s', query_order)
         for query_type in query_order:
-            query_func, arg = query_map[query_type]
-            if arg is not None:
-                if query_type == "data":
-                    # Data has no ids_only
-                    id_pool = list(query_func(arg, id_pool=id_pool, alias_dict=alias_dict))
-                else:
-                    # This usage of query_func seems to confuse pylint; it complains as
-                    # long as I'm using ids_only=True, maybe it's "seeing" the call above.
-                    id_pool = list(
-                        query_func(arg,  # pylint: disable=unexpected-keyword-arg
-                                   id_pool=id_pool,
-                                   ids_only=True))
+            if args[query_type] is not None:
+                id_pool = self._run_find_query(query_type, args[query_type],
+                                               id_pool=id_pool, alias_dict=alias_dict)
                 # Break early, as an empty id_pool is bad usage for a query.
                 if not id_pool:
                     return (x for x in [])
         if ids_only:
             return (x for x in id_pool)
-        return self.get(id_pool)
+        return self._get_found(id_pool, lazy=lazy, sections=sections)
+
+    @staticmethod
+    def _sort_order(order_by, descending, limit, after):
+        """
+        Work out what a find() should order its results by, if anything.
+
+        Asking for a page (a limit or a cursor) or a descending order without
+        saying what to order by orders by id, so that pages are stable.
+
+        :param order_by: As in find()
+        :param descending: As in find()
+        :param limit: As in find()
+        :param after: As in find()
+        :returns: The name of the datum to order by, "id", or None for no order
+        :raises TypeError: if the limit isn't an integer
+        :raises ValueError: if the limit is negative
+        """
+        if limit is not None:
+            if isinstance(limit, bool) or not isinstance(limit, numbers.Integral):
+                raise TypeError("limit must be an integer. Given: {}".format(limit))
+            if limit < 0:
+                raise ValueError("limit can't be negative. Given: {}".format(limit))
+        if order_by is None and (descending or limit is not None or after is not None):
+            return "id"
+        return order_by
+
+    @staticmethod
+    def _sort_key(value, id):
+        """
+        Give the key a Record sorts by when ordering by one of its data.
+
+        Scalars sort before strings, and ties are broken by id.
+
+        :param value: The value of the datum being ordered by
+        :param id: The id of the Record
+        :returns: A tuple comparable with the keys of other Records
+        """
+        return (isinstance(value, six.string_types), value, id)
+
+    def _sorted_ids(self, order_by, descending=False, after=None):
+        """
+        Produce the ids of every Record in the order find() returns them.
+
+        Backends whose tables are kept sorted should stream from those instead;
+        by default, every Record's id (or value of order_by) is fetched and sorted.
+
+        :param order_by: "id", or the name of a scalar or string datum. If a
+                         datum, Records without it are skipped.
+        :param descending: Whether to produce the ids in descending order
+        :param after: If given, start after the Record with this id
+        :returns: An iterable of Record ids
+        :raises ValueError: if ordering by a datum and the Record with id after
+                            doesn't have it.
+        """
+        if order_by == "id":
+            keys = {id: id for id in self.get_all(ids_only=True)}
+            cursor = after
+        else:
+            keys = {}
+            for id, data in six.iteritems(self.get_data_for_records([order_by])):
+                if order_by in data:
+                    keys[id] = self._sort_key(data[order_by]["value"], id)
+            cursor = None if after is None else keys.get(after)
+            if after is not None and cursor is None:
+                raise ValueError("No Record with id {} and a scalar or string {} to continue "
+                                 "after".format(after, order_by))
+        ordered = sorted(keys, key=keys.get, reverse=descending)
+        if cursor is None:
+            return ordered
+        if descending:
+            return (id for id in ordered if keys[id] < cursor)
+        return (id for id in ordered if keys[id] > cursor)
+
+    # pylint: disable=too-many-arguments
+    def _find_sorted(self, criteria, order_by, descending=False, limit=None, after=None,
+                     id_pool=None, ids_only=False, lazy=False, sections=None):
+        """
+        Perform a find() whose results are ordered, and possibly paged.
+
+        By default, the ids of all matches are found as usual and picked out,
+        in order, from _sorted_ids(). Backends that can should have the
+        database do the ordering and limiting instead.
+
+        :param criteria: The rest of find()'s arguments, as a dictionary of
+                         {<argument name>: <value>}
+        :param order_by: "id", or the name of the scalar or string datum to order by
+        :param descending: As in find()
+        :param limit: As in find()
+        :param after: As in find()
+        :param id_pool: As in find()
+        :param ids_only: As in find()
+        :param lazy: As in find()
+        :param sections: As in find()
+        :returns: A generator of the matching ids (if ids_only) or Records, in order
+        """
+        LOGGER.debug('Performing a find() ordered by %s (descending: %s), limit %s, after %s',
+                     order_by, descending, limit, after)
+        matches = None
+        if any(criteria[x] is not None for x in DEFAULT_QUERY_ORDER):
+            matches = set(self._find(id_pool=id_pool, ids_only=True, **criteria))
+        elif id_pool is not None:
+            matches = set(id_pool)
+        ordered = self._sorted_ids(order_by, descending=descending, after=after)
+        if matches is not None:
+            ordered = (id for id in ordered if id in matches)
+        page = list(itertools.islice(ordered, limit))
+        if ids_only:
+            return (id for id in page)
+        return self._get_found_in_order(page, lazy=lazy, sections=sections)
+
+    def _get_found_in_order(self, ids, lazy=False, sections=None):
+        """
+        Get the Records a query found, in the order their ids are given.
+
+        :param ids: A list of Record ids to return
+        :param lazy: As in _get_found()
+        :param sections: As in _get_found()
+        :returns: A generator of Records
+        """
+        found = {record.id: record
+                 for record in self._get_found(ids, lazy=lazy, sections=sections)}
+        return (found[id] for id in ids)
+
+    def _find_concurrently(self, args, id_pool=None, ids_only=False, alias_dict=None,
+                           lazy=False, sections=None):
+        """
+        Run each of find()'s queries on its own thread and intersect the results.
+
+        Unlike a serial find(), no query can narrow another's pool of ids, so
+        this trades work for latency: it pays off when round trips to the
+        database, rather than the queries themselves, dominate.
+
+        :param args: A dictionary of {<query name>: <criterion>}, as in DEFAULT_QUERY_ORDER.
+                     Queries whose criterion is None are skipped.
+        :param id_pool: As in find()
+        :param ids_only: As in find()
+        :param alias_dict: As in find()
+        :param lazy: As in find()
+        :param sections: As in find()
+        :returns: As find()
+        """
+        query_types = [x for x in DEFAULT_QUERY_ORDER if args[x] is not None]
+        if id_pool is not None:
+            id_pool = list(id_pool)  # safety cast for gens, which threads can't share
+        LOGGER.debug('Performing a concurrent find() with queries %s', query_types)
+
+        def run_query(query_type):
+            """Run one query on a DAO of its own."""
+            arg = args[query_type]
+            if query_type == "data":
+                arg = dict(arg)  # Data queries consume their alias_dict entry
+            with self._concurrent_dao() as record_dao:
+                # pylint: disable=protected-access
+                return set(record_dao._run_find_query(query_type, arg, id_pool=id_pool,
+                                                      alias_dict=alias_dict))
+
+        with ThreadPoolExecutor(max_workers=len(query_types)) as executor:
+            results = list(executor.map(run_query, query_types))
+        matches = set.intersection(*results)
+        if not matches:
+            return (x for x in [])
+        if ids_only:
+            return (x for x in matches)
+        return self._get_found(list(matches), lazy=lazy, sections=sections)
 
 
 class RelationshipDAO(object):
@@ -723,6 +1538,48 @@ class DAOFactory(object):
         """Close any resources held by this DataHandler."""
         raise NotImplementedError
 
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Group every write made within a with block into a single transaction.
+
+        Backends without multi-statement transactions leave this as a no-op,
+        committing each write as it happens.
+        """
+        yield
+
+    def upgrade_schema(self, store_sections=False):  # pylint: disable=unused-argument
+        """
+        Bring an existing backend up to date with the current schema.
+
+        Backends with nothing to migrate leave this as a no-op.
+
+        :param store_sections: Whether to start storing Records' sections
+                               separately, for backends that can.
+
+        :returns: a tuple of (names of the indexes created, names of those dropped)
+        """
+        return [], []
+
+    def rebuild_catalog(self):
+        """
+        Recompute the backend's catalog of its data, if it keeps one.
+
+        Backends without a catalog leave this as a no-op.
+
+        :returns: The number of entries in the rebuilt catalog
+        """
+        return 0
+
+    @contextlib.contextmanager
+    def bulk_load(self):
+        """
+        Tune the backend for a large ingest for the duration of a with block.
+
+        Backends with nothing to tune leave this as a no-op.
+        """
+        yield
+
     def __enter__(self):
         """
         Use this factory as a context manager.
@@ -181,7 +181,8 @@ class ReadOnlyDataStore(object):
             self._record_dao = record_dao
 
         # -------------------- Basic operations ---------------------
-        def get(self, ids_to_get, chunk_size=999):
+        # pylint: disable=too-many-arguments
+        def get(self, ids_to_get, chunk_size=999, prefetch=False, workers=None, sections=None):
             """
             Given one or more Record ids, return matching Record(s).
 
@@ -190,13 +191,29 @@ class ReadOnlyDataStore(object):
                                Chunking limits the number of requested at once
                                to comply with SQL's own set limits; 999 is a common
                                value.
+            :param prefetch: Whether to parse the Records in a pool of workers while
+                             the next chunk is fetched. Speeds up getting many large
+                             Records, for which parsing is the bottleneck. Records are
+                             returned in the same order either way.
+            :param workers: If prefetching, the number of threads to parse with, or a
+                            concurrent.futures.Executor to parse in (ex: a
+                            ProcessPoolExecutor, which sidesteps the GIL). Defaults to
+                            a single thread.
+            :param sections: The parts of the Records to get, if not all of them. Any of
+                             "data", "curve_sets", "library_data", "files",
+                             "user_defined" and "other" (anything else, ex: a Run's
+                             application). The rest are left empty, and, on SQL, never
+                             fetched or parsed, ex: sections=["data"] skips curve sets,
+                             often most of a Record's size. Takes precedence over prefetch.
 
             :returns: If provided an iterable, a generator of Record objects,
                       else a single Record object.
 
-            :raises ValueError: if no Record is found for some id.
+            :raises ValueError: if no Record is found for some id, or given an
+                                unknown section.
             """
-            return self._record_dao.get(ids_to_get, chunk_size=chunk_size)
+            return self._record_dao.get(ids_to_get, chunk_size=chunk_size, prefetch=prefetch,
+                                        workers=workers, sections=sections)
 
         # Sphinx has an issue with trailing-underscore params, we need to escape it for the doc
         # pylint: disable=anomalous-backslash-in-string
@@ -241,7 +258,9 @@ class ReadOnlyDataStore(object):
         # pylint: disable=too-many-arguments
         def find(self, types=None, data=None, file_uri=None, mimetype=None,
                  id_pool=None, ids_only=False,
-                 query_order=("data", "file_uri", "mimetype", "types"), alias_dict=None):
+                 query_order=("data", "file_uri", "mimetype", "types"), alias_dict=None,
+                 concurrent=False, lazy=False,
+                 sections=None, order_by=None, descending=False, limit=None, after=None):
             """
             Return Records that match multiple different types of criteria.
 
@@ -270,6 +289,8 @@ class ReadOnlyDataStore(object):
                                 Query names are "types", "file_uri", "mimetype", and "data".
                                 Note that if any query name is absent from the passed tuple,
                                 that query will not be executed, even if parameters are provided.
+                                SQL backends run the whole find() as a single statement and
+                                leave the ordering to the database, ignoring this.
             :param alias_dict: An alias dictionary to find differently named data across records
                                ex: Each {key: value} pair below will be flattened to create query
                                combinations:
@@ -281,13 +302,49 @@ class ReadOnlyDataStore(object):
                                                "TEMP": exists()})
                                would return any records where T, temp or TEMP exists and vol or
                                volume is equal to 46.
-
-
+            :param concurrent: Whether to run each type of query on its own thread (and, for
+                               SQL, its own connection), intersecting the results afterwards.
+                               Advanced usage; as no query can narrow another's search, this
+                               only lowers latency when round trips to the database dominate,
+                               ex: several criteria against a remote MySQL server. Ignores
+                               query_order. Falls back to running serially (with a warning)
+                               on datastores that can't be queried concurrently, such as
+                               in-memory SQLite databases and SQL datastores in the middle of
+                               a transaction().
+            :param lazy: Whether to return :py:class:`sina.model.LazyRecord` objects, which
+                         only parse their JSON once something besides their id or type is
+                         accessed. Cuts the time and memory taken by scans that don't look
+                         at most Records' contents. Ignored if ids_only.
+            :param sections: The parts of the Records to get, if not all of them; see get().
+                             Takes precedence over lazy. Ignored if ids_only.
+            :param order_by: What to order the matches by: "id", or the name of a scalar or
+                             string datum. If a datum, only Records having it (as a scalar or
+                             string, not a list) are returned, scalars before strings, with
+                             ties broken by id. By default, matches come in no particular order,
+                             unless a limit, after or descending is given, which order by id.
+                             SQL and Cassandra datastores have the database do the ordering.
+            :param descending: Whether to order the matches in descending order
+            :param limit: The most matches to return. Along with after, this lets results be
+                          paged through without finding or fetching the whole lot each time,
+                          ex: for a web page listing 50 Records at a time, newest first::
+
+                              page = list(records.find(data={"status": "done"},
+                                                       order_by="final_time", descending=True,
+                                                       limit=50, after=last_id_on_prev_page))
+
+            :param after: The id of a Record (usually the last one on the previous page) to
+                          continue after: only matches ordered after it are returned. It
+                          doesn't need to be a match itself, but if ordering by a datum, it
+                          must have that datum. To page through find_with_data(), use
+                          find(data=...).
+            :raises ValueError: if the limit is negative, or the Record with id after lacks
+                                the datum being ordered by
             """
             # We protect _find to disincentize users using the DAO directly.
             # pylint: disable=protected-access
             return self._record_dao._find(types, data, file_uri, mimetype, id_pool,
-                                          ids_only, query_order, alias_dict)
+                                          ids_only, query_order, alias_dict, concurrent,
+                                          lazy, sections, order_by, descending, limit, after)
 
         # ------------------ Operations tied to Record type -------------------
         def find_with_type(self, types, ids_only=False, id_pool=None):
@@ -357,6 +414,10 @@ class ReadOnlyDataStore(object):
                 # "NW", AND a height >=30 and <40.
                 data_query(volume=12, quadrant="NW", height=DataRange(30,40))
 
+            Every keyword is taken as the name of a datum, so to order or page
+            through the ids, use find(data={...}, ids_only=True) and its order_by,
+            limit and after instead.
+
             :param kwargs: Pairs of the names of data and the criteria that data
                              must fulfill.
             :returns: A generator of Record ids that fulfill all criteria.
@@ -397,6 +458,88 @@ class ReadOnlyDataStore(object):
             """
             return self._record_dao.get_data_for_records(data_list, id_list)
 
+        def get_data_columns(self, data_list, id_list=None, as_="numpy"):
+            """
+            Retrieve data for some or all Records as aligned columns.
+
+            Where get_data() nests the data by Record, this returns one column
+            of values per datum, each row being a Record. For example, getting
+            "volume" and "debugger_version" for "foo_1" and "foo_3" as "pandas"
+            gives::
+
+                       volume debugger_version
+                id
+                foo_1    12.0            alpha
+                foo_3     NaN            alpha
+
+            Scalar columns are floats, missing values being NaN; other columns
+            hold None where a Record lacks the datum. List data is included,
+            each value being an array of its own (so the column is ragged).
+            Units and tags are not.
+
+            This needs NumPy (and pandas or pyarrow, for those formats), which
+            can be installed with Sina's "columnar" extra.
+
+            :param data_list: A list of the names of data fields to find
+            :param id_list: A list of the record ids to find data for, None if
+                            all Records having any of the data should be
+                            included. Rows follow its order; otherwise, they're
+                            sorted by id.
+            :param as_: What to return the columns as: "numpy" for an
+                        OrderedDict of {<name>: <array>}, the first being "id",
+                        "pandas" for a DataFrame indexed by id, or "arrow" for a
+                        pyarrow Table whose first column is "id". Arrow
+                        represents missing values as nulls.
+
+            :returns: the columns, in the order of data_list.
+            """
+            return self._record_dao.get_data_columns(data_list, id_list, as_)
+
+        # pylint: disable=too-many-arguments
+        def aggregate(self, scalar, ops=("count", "min", "max", "mean", "std", "histogram"),
+                      bins=10, group_by=None, types=None, data=None):
+            """
+            Compute statistics of a scalar over some or all Records.
+
+            Where the backend allows, the statistics are computed by the
+            database, so only they (rather than every value) are returned
+            from it. For example, aggregating "volume" over the "run" Records
+            whose "material" is "steel", grouped by "debugger_version"::
+
+                aggregate("volume", ops=["count", "mean"], group_by="debugger_version",
+                          types="run", data={"material": "steel"})
+
+            might give::
+
+                {"alpha": {"count": 12, "mean": 31.2},
+                 "beta": {"count": 3, "mean": 30.8},
+                 None: {"count": 1, "mean": 29.0}}
+
+            where None covers Records without a debugger_version. Only plain
+            scalars are aggregated (not lists).
+
+            :param scalar: The name of the scalar datum to aggregate
+            :param ops: The statistics to compute, any of "count", "min", "max",
+                        "mean", "std" (the population standard deviation), and
+                        "histogram" (a dictionary of its bins' "counts" and
+                        "edges"). Statistics undefined for no values are None.
+            :param bins: For the histogram, the number of equal-width bins
+                         spanning the values (across all groups), or a list of
+                         their edges. Each bin includes its lower edge, the last
+                         its upper edge too, as in NumPy.
+            :param group_by: The name of a string datum to compute the
+                             statistics per value of, or "type" to compute them
+                             per Record type.
+            :param types: As in find(), the types of Record to consider
+            :param data: As in find(), criteria on the data of the Records to
+                         consider
+
+            :returns: A dictionary of {<op>: <statistic>}. If grouping, an
+                      OrderedDict of {<group>: <statistics>}, sorted by group,
+                      None last.
+            """
+            return self._record_dao.aggregate(scalar, ops, bins, group_by, types, data)
+
         def find_with_max(self, scalar_name, count=1, ids_only=False):
             """
             Return the Records/id(s) with the highest value(s) for <scalar_name>.
@@ -528,12 +671,92 @@ class DataStore(ReadOnlyDataStore):  # pylint: disable=too-few-public-methods
         """Whether this is a read-only datastore."""
         return False
 
+    def bulk_load(self):
+        """
+        Tune the datastore for loading a large amount of data.
+
+        Use it as a context manager around the inserts:
+
+            with ds.bulk_load():
+                ds.records.insert(many_records)
+
+        For SQLite, this defers index maintenance until the end of the block
+        (rebuilding the indexes and running ANALYZE then) and relaxes disk
+        syncing in the meantime, so a machine crash mid-load can corrupt the
+        file. Other backends are left unchanged.
+
+        :returns: a context manager for the bulk load
+        """
+        return self._dao_factory.bulk_load()
+
+    def transaction(self):
+        """
+        Commit every change made within a with block at once.
+
+        Use it as a context manager around the writes:
+
+            with ds.transaction():
+                ds.records.insert(records)
+                ds.relationships.insert(relationships)
+                ds.records.update(updated_records)
+
+        Outside such a block, each call commits on its own. Within it, nothing
+        is committed until the block exits, and if it raises, all of the
+        block's changes are rolled back. Backends without multi-statement
+        transactions (Cassandra) keep committing each call as it happens.
+
+        :returns: a context manager for the transaction
+        """
+        return self._dao_factory.transaction()
+
+    def upgrade_schema(self, store_sections=False):
+        """
+        Bring the datastore's schema up to date with this version of Sina.
+
+        Existing databases don't pick up schema changes (such as new indexes)
+        on their own. This applies them in place, without touching any data,
+        and is safe to run more than once. It's also available on the command
+        line as `sina migrate`.
+
+        :param store_sections: Whether SQL datastores should also start storing
+                               each Record's sections (data, curve_sets, etc.)
+                               separately, so that `records.get(...,
+                               sections=[...])` only reads those asked for.
+                               This stores each Record's JSON twice. Available
+                               as `sina migrate --sections`.
+        :returns: a tuple of (names of the tables and indexes created, names of
+                  the indexes dropped)
+        """
+        return self._dao_factory.upgrade_schema(store_sections)
+
+    def rebuild_catalog(self):
+        """
+        Recompute the datastore's catalog of what data each type of Record holds.
+
+        SQL datastores keep a catalog of the names, counts, ranges and numbers
+        of distinct values of each type of Record's data, which data_names(),
+        get_types() and get_curve_set_names() answer from. It's maintained as
+        Records are written, so this is only needed if the database was last
+        written by an older version of Sina (databases predating the catalog
+        should run upgrade_schema() instead, which builds it). Deleting or
+        updating Records can leave the catalog's ranges and distinct counts
+        overestimated until it's rebuilt, though listing stays correct. Other
+        backends have no catalog.
+
+        :returns: the number of entries in the rebuilt catalog
+        """
+        return self._dao_factory.rebuild_catalog()
+
     # The DAO version is protected to disincentivize using it from the DAOs.
     # pylint: disable=protected-access
     def delete_all_contents(self, force=""):
         """
         Delete EVERYTHING in a datastore; this cannot be undone.
 
+        MySQL tables are emptied with TRUNCATE, which commits immediately, except
+        within a transaction() block, where they're DELETEd from so the block's
+        other writes aren't committed early. That's slower for large tables.
+
         :param force: This function is meant for live usage and raises a confirmation prompt.
                       If you want to use it in an automated script, set this to "SKIP PROMPT".
                       Note: if you're creating short-lived datastores, you may want to consider
@@ -570,7 +793,7 @@ class DataStore(ReadOnlyDataStore):  # pylint: disable=too-few-public-methods
 
         # -------------------- Basic operations ---------------------
         def insert(self, records_to_insert, ingest_funcs=None,
-                   ingest_funcs_preserve_raw=None):
+                   ingest_funcs_preserve_raw=None, batch_size=None, on_conflict=None):
             """
             Given one or more Records, insert them into the datastore.
 
@@ -586,9 +809,19 @@ class DataStore(ReadOnlyDataStore):  # pylint: disable=too-few-public-methods
                                               to use filter_keep/etc. to make smaller
                                               records. MUST BE SPECIFIED if you want
                                               to use the ingest_funcs.
+            :param batch_size: If given, records_to_insert is consumed lazily and
+                               committed every batch_size Records, keeping memory
+                               flat for very large (ex: generator) inserts.
+            :param on_conflict: What to do with Records whose ids are already in the
+                                datastore. By default, that's an error. "replace"
+                                overwrites the stored Record (keeping its
+                                Relationships), "skip" leaves it as it is. Useful
+                                for re-running an ingest over partially loaded data.
+            :raises BatchInsertError: if batch_size is given and a batch fails. Its
+                                      records_committed says where to resume from.
             """
             self._record_dao.insert(records_to_insert, ingest_funcs,
-                                    ingest_funcs_preserve_raw)
+                                    ingest_funcs_preserve_raw, batch_size, on_conflict)
 
         def update(self, records_to_update):
             """
@@ -700,6 +933,22 @@ class AppendOnlyDataStore(DataStore):  # pylint: disable=too-few-public-methods
         """
 
         # -------------------- Basic operations ---------------------
+        def insert(self, records_to_insert, ingest_funcs=None,
+                   ingest_funcs_preserve_raw=None, batch_size=None, on_conflict=None):
+            """
+            Given one or more Records, insert them into the datastore.
+
+            Identical to DataStore.records.insert(), save that on_conflict="replace"
+            isn't allowed, as it would overwrite existing Records.
+
+            :raises ValueError: if on_conflict is "replace"
+            """
+            if on_conflict == "replace":
+                raise ValueError("This is an append only store, Records can't be replaced")
+            super(AppendOnlyDataStore.RecordOperations, self).insert(
+                records_to_insert, ingest_funcs, ingest_funcs_preserve_raw,
+                batch_size, on_conflict)
+
         def update(self, records_to_update):
             """
             Given one or more Records, update them in the datastore--but
@@ -69,23 +69,53 @@ class RecordDAO(dao.RecordDAO):
 
     # pylint: disable=arguments-differ
     # Args differ because SQL doesn't support force_overwrite yet, SIBO-307
-    def _do_insert(self, records, force_overwrite=False):
+    def _do_insert(self, records, force_overwrite=False, batch_size=None, on_conflict=None):
         """
         Given a(n iterable of) Record(s), insert it into the current Cassandra database.
 
         :param records: A Record or iterable of Records to insert
         :param force_overwrite: Whether to forcibly overwrite a preexisting
                                 record that shares this record's id.
+        :param batch_size: If given, consume <records> lazily and write them
+                           <batch_size> at a time. Cassandra has no transactions,
+                           so a failed batch may be partially written.
+        :param on_conflict: None, "replace", or "skip". Cassandra has no native
+                            equivalent, so existing ids are looked up first; those
+                            are deleted (keeping Relationships) or dropped.
         :raises LWTException: If force_overwrite is False and an entry with the
                               id exists.
+        :raises BatchInsertError: if batch_size is given and a batch fails.
         """
         LOGGER.debug('Inserting %s into Cassandra with force_overwrite=%s.',
                      records, force_overwrite)
 
         if isinstance(records, model.Record):
-            self._insert_one(records)
+            if on_conflict is None:
+                self._insert_one(records)
+                return
+            records = [records]
+        if batch_size is None:
+            self._insert_resolving_conflicts(list(records), on_conflict)
         else:
-            self._insert_many(records, _type_managed=False)
+            self._insert_in_batches(
+                records, batch_size,
+                lambda batch: self._insert_resolving_conflicts(batch, on_conflict))
+
+    def _insert_resolving_conflicts(self, records, on_conflict=None):
+        """
+        Insert a list of Records, first handling any whose ids are taken.
+
+        :param records: A list of Records to insert
+        :param on_conflict: None, "replace", or "skip". See _do_insert().
+        """
+        if on_conflict is not None:
+            ids = [record.id for record in records]
+            existing = set(itertools.compress(ids, self.exist(ids)))
+            if on_conflict == "replace" and existing:
+                self._do_delete(existing, delete_relationships=False)
+            elif on_conflict == "skip":
+                records = [record for record in records if record.id not in existing]
+        self._insert_many(records, _type_managed=False)
 
     def _insert_one(self, record, force_overwrite=False):
         """
@@ -97,7 +127,8 @@ class RecordDAO(dao.RecordDAO):
         :raises LWTException: If force_overwrite is False and an entry with the
                               id exists.
         """
-        is_valid, warnings = record.is_valid()
+        # pylint: disable=protected-access
+        is_valid, warnings, raw_json = record._is_valid_with_json()
         if not is_valid:
             raise ValueError(warnings)
         if record.data:
@@ -119,7 +150,7 @@ class RecordDAO(dao.RecordDAO):
                   else schema.Record.if_not_exists().create)
         create(id=record.id,
                type=record.type,
-               raw=json.dumps(record.raw))
+               raw=_json_string(raw_json))
 
     # Disabled until rework, possibly splitting into the first and second batch types
     # pylint: disable=too-many-locals, too-many-branches, too-many-statements
@@ -166,11 +197,15 @@ class RecordDAO(dao.RecordDAO):
             if batch_list is not None:
                 batch_list.append((datum_name, value, units, tags))
 
+        # The raws are serialized once, while validating
+        raw_jsons = []
         for record in list_to_insert:
             # Insert the Record itself
-            is_valid, warnings = record.is_valid()
+            # pylint: disable=protected-access
+            is_valid, warnings, raw_json = record._is_valid_with_json()
             if not is_valid:
                 raise ValueError(warnings)
+            raw_jsons.append(_json_string(raw_json))
 
             if record.curve_sets:
                 # Curve set names are meta, everything else is per-record.
@@ -299,11 +334,7 @@ class RecordDAO(dao.RecordDAO):
         # Finally, insert the full, raw record.
         create = (schema.Record.create if force_overwrite
                   else schema.Record.if_not_exists().create)
-        for record in list_to_insert:
-            if isinstance(record.raw, bytes):  # cassandra doesn't take bytes
-                raw = json.dumps(record.raw).decode("utf-8")
-            else:
-                raw = json.dumps(record.raw)
+        for record, raw in zip(list_to_insert, raw_jsons):
             create(id=record.id,
                    type=record.type,
                    raw=raw)
@@ -530,7 +561,9 @@ class RecordDAO(dao.RecordDAO):
         """
         (scalar, string, scalarlist,
          stringlist, universal) = utils.sort_and_standardize_criteria(criteria)
-        result_ids = []
+        # The id_pool goes first: it's usually the smallest set, and the
+        # intersection is held as a set of its first list's ids.
+        result_ids = [] if id_pool is None else [id_pool]
 
         # String and scalar values can be passed directly to _apply_ranges_to_query
         for criteria_group, table_type in ((scalar, "scalar"),
@@ -553,9 +586,6 @@ class RecordDAO(dao.RecordDAO):
         if universal:
             result_ids.append(self._universal_query(universal))
 
-        if id_pool is not None:
-            result_ids.append(id_pool)
-
         # If we have more than one set of data, we need to find the intersect.
         for id in utils.intersect_lists(result_ids):
             yield id
@@ -738,22 +768,35 @@ class RecordDAO(dao.RecordDAO):
         We currently need #criteria * #tables queries to do this due to the inability
         to query across partitions ("for every Record" doesn't work as one query).
 
-        :param universal_criteria: List of tuples: (datum_name, UniversalCriteria)
+        :param universal_criteria: List of tuples: (datum_name, UniversalCriteria),
+                                   where the criteria may be negated.
         :return: generator of ids of Records fulfilling all criteria.
         """
         query_tables = [schema.RecordFromScalarData, schema.RecordFromStringData,
                         schema.RecordFromStringListData, schema.RecordFromScalarListDataMin]
-        desired_names = [x[0] for x in universal_criteria]
-        LOGGER.info('Finding Records where data in %s exist', desired_names)
+        desired_names = [x[0] for x in universal_criteria
+                         if not isinstance(x[1], utils.Negation)]
+        forbidden_names = [x[0] for x in universal_criteria
+                           if isinstance(x[1], utils.Negation)]
+        LOGGER.info('Finding Records where data in %s exist and data in %s do not',
+                    desired_names, forbidden_names)
         result_counts = defaultdict(lambda: 0)
-        expected_result_count = len(universal_criteria)
+        forbidden_ids = set()
         for query_table in query_tables:
             for name in desired_names:
                 query = query_table.objects.filter(name=name).values_list('id', flat=True)
                 for rec_id in query:
                     result_counts[rec_id] += 1
-        for entry, val in six.iteritems(result_counts):
-            if val == expected_result_count:
+            for name in forbidden_names:
+                forbidden_ids.update(query_table.objects.filter(name=name)
+                                     .values_list('id', flat=True))
+        if desired_names:
+            candidates = (entry for entry, val in six.iteritems(result_counts)
+                          if val == len(desired_names))
+        else:
+            candidates = schema.Record.objects.values_list('id', flat=True)
+        for entry in candidates:
+            if entry not in forbidden_ids:
                 yield entry
 
     def _get_many(self, ids, _record_builder, chunk_size):
@@ -782,6 +825,23 @@ class RecordDAO(dao.RecordDAO):
         if ids_found != len(ids):
             raise ValueError("No Record found with id in %s" % ids)
 
+    def _get_raw_chunks(self, ids, chunk_size):
+        """
+        Fetch the raws of Records, a chunk (and query) at a time.
+
+        :param ids: A list of Record ids to fetch the raws of
+        :param chunk_size: How many ids to fetch per chunk
+        :returns: A generator of lists of (id, type, raw JSON string) rows, one list per chunk
+        :raises ValueError: if no Record is found for some id.
+        """
+        for chunk_start in range(0, len(ids), chunk_size):
+            chunk = ids[chunk_start:chunk_start + chunk_size]
+            rows = [(x.id, x.type, x.raw)
+                    for x in schema.Record.objects.filter(schema.Record.id.in_(chunk))]
+            if len(rows) != len(chunk):
+                raise ValueError("No Record found with id in %s" % chunk)
+            yield rows
+
     def _one_exists(self, test_id):
         """
         Given an id, return boolean of if it exists or not.
@@ -1047,6 +1107,62 @@ implementing GROUP_BY. Please email the siboka team if you need this functionali
                .order_by(order_by).limit(count).all().values_list('id', flat=True))
         return ids if id_only else self.get(ids)
 
+    def _sorted_ids(self, order_by, descending=False, after=None):
+        """
+        Produce the ids of every Record in the order find() returns them.
+
+        Ordering by a datum streams the partition of RecordFromScalarData (then
+        RecordFromStringData, or the reverse if descending) for it, which
+        Cassandra keeps sorted by value and id, so a page ends as soon as it's
+        full. Records' ids aren't kept sorted, so ordering by id is left to the
+        parent.
+
+        See dao.RecordDAO._sorted_ids() for the parameters.
+        """
+        if order_by == "id":
+            return super(RecordDAO, self)._sorted_ids(order_by, descending=descending,
+                                                      after=after)
+        kinds = ["string", "scalar"] if descending else ["scalar", "string"]
+        cursor = None
+        if after is not None:
+            for index, kind in enumerate(kinds):
+                values = list(TABLE_LOOKUP[kind]["data_table"].objects
+                              .filter(id=after, name=order_by)
+                              .values_list('value', flat=True))
+                if values:
+                    kinds = kinds[index:]
+                    cursor = values[0]
+                    break
+            else:
+                raise ValueError("No Record with id {} and a scalar or string {} to "
+                                 "continue after".format(after, order_by))
+        return self._stream_sorted_ids(order_by, kinds, descending, cursor, after)
+
+    @staticmethod
+    def _stream_sorted_ids(order_by, kinds, descending, cursor, after):
+        """
+        Stream the ids of Records with a datum from its partitions, for _sorted_ids().
+
+        :param order_by: The name of the datum
+        :param kinds: The kinds of data ("scalar", "string") to read, in order
+        :param descending: Whether to read the partitions in descending order
+        :param cursor: If not None, the value of the datum for the Record with
+                       id after, which is in the first kind's partition
+        :param after: The id of the Record to continue after, if cursor isn't None
+        """
+        for kind in kinds:
+            query = TABLE_LOOKUP[kind]["record_table"].objects.filter(name=order_by)
+            if cursor is not None:
+                query = query.filter(**{'value__lte' if descending else 'value__gte': cursor})
+            query = query.order_by('-value' if descending else 'value')
+            for value, id in query.values_list('value', 'id'):
+                # Skip the cursor's ties up to and including the cursor itself
+                if cursor is not None and value == cursor and (id >= after if descending
+                                                               else id <= after):
+                    continue
+                yield str(id)
+            cursor = None
+
     def get_with_max(self, scalar_name, count=1, id_only=False):
         """
         Return the Record object(s) associated with the highest value(s) of scalar_name.
@@ -1221,6 +1337,17 @@ implementing GROUP_BY. Please email the siboka team if you need this functionali
                 pass
         return scalars
 
+    def _can_query_concurrently(self):
+        """
+        Whether this DAO's queries can safely run on several threads at once.
+
+        The cqlengine connection is threadsafe and shared, so _concurrent_dao()
+        can simply provide this DAO.
+
+        :returns: True
+        """
+        return True
+
     def get_with_mime_type(self, mimetype, ids_only=False, id_pool=None):
         """
         Return all records or IDs with documents of a given mimetype.
@@ -1410,3 +1537,13 @@ class DAOFactory(dao.DAOFactory):
         """Return a string representation of a Cassandra DAOFactory."""
         return ('Cassandra DAOFactory <keyspace={}, node_ip_list={}>'
                 .format(self.keyspace, self.node_ip_list))
+
+
+def _json_string(raw_json):
+    """
+    Return serialized JSON as a string, since Cassandra doesn't take bytes.
+
+    :param raw_json: JSON as returned by sina.sjson.dumps(), str or bytes
+    :returns: the JSON as a str
+    """
+    return raw_json.decode("utf-8") if isinstance(raw_json, bytes) else raw_json
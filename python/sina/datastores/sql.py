@@ -1,14 +1,22 @@
 """Contains SQL-specific implementations of our DAOs."""
 import os
+import bisect
+import hashlib
 import numbers
 import logging
-from collections import defaultdict
+import struct
+from collections import defaultdict, OrderedDict
+import contextlib
 import functools
+import itertools
 
 import six
 
 # Disable pylint check due to its issue with virtual environments
 import sqlalchemy  # pylint: disable=import-error
+import sqlalchemy.dialects.mysql  # pylint: disable=import-error
+import sqlalchemy.dialects.postgresql  # pylint: disable=import-error
+import sqlalchemy.dialects.sqlite  # pylint: disable=import-error
 from sqlalchemy.pool import NullPool  # pylint: disable=import-error
 from sqlalchemy.exc import OperationalError  # pylint: disable=import-error
 
@@ -37,6 +45,70 @@ DATA_TABLES = [schema.ScalarData, schema.StringData,
 # Set maximum chunk size for id queries
 CHUNK_SIZE = 999
 
+# How many data names get_data_columns() pivots per query. Each takes three
+# columns, and SQLite allows 2000 per result by default.
+PIVOT_NAME_LIMIT = 500
+
+# Inserts of at least this many Records go through the Core bulk path
+BULK_INSERT_THRESHOLD = 100
+
+# How many Records the bulk path converts to rows before executing its inserts
+BULK_INSERT_CHUNK_SIZE = 5000
+
+# Columns holding JSON, whose stored form may differ in type (bytes vs. str)
+# from a freshly dumped one
+JSON_COLUMNS = ('raw', 'tags')
+
+# Per-connection pragmas used by DAOFactory.bulk_load(). A large (negative
+# means KiB) page cache, no fsync between transactions, and in-memory temp
+# storage for index builds.
+BULK_LOAD_PRAGMAS = {'synchronous': 'OFF',
+                     'cache_size': -512000,
+                     'temp_store': 'MEMORY'}
+
+# The order tables must be written to by the bulk insert path (Record first,
+# since everything else references it).
+BULK_INSERT_TABLES = [schema.Record, schema.ScalarData, schema.StringData,
+                      schema.ListScalarData, schema.ListStringDataMaster,
+                      schema.ListStringDataEntry, schema.CurveSetMeta,
+                      schema.Document, schema.RecordSection]
+
+# Key in Session.info marking that a DAOFactory.transaction() block is open
+IN_TRANSACTION = 'sina_in_transaction'
+
+# Key in Session.info caching whether the database has a RecordSection table
+HAS_SECTIONS = 'sina_has_sections'
+
+# Tables only created when asked for (see DAOFactory.upgrade_schema()), as
+# they duplicate what's stored in others
+OPTIONAL_TABLES = [schema.RecordSection.__table__]
+
+# Key in Session.info caching whether the database has a DataCatalog table
+HAS_CATALOG = 'sina_has_catalog'
+
+# The kinds of DataCatalog entry kept for names, by the table each summarizes.
+# There's also "record", for the Records of a type themselves.
+CATALOG_TABLES = OrderedDict([('scalar', schema.ScalarData),
+                              ('string', schema.StringData),
+                              ('scalar_list', schema.ListScalarData),
+                              ('string_list', schema.ListStringDataMaster),
+                              ('curve_set', schema.CurveSetMeta)])
+
+# The kinds of DataCatalog entry that count their distinct values
+SKETCHED_KINDS = ('scalar', 'string')
+
+# How many value hashes each DataCatalog entry's sketch keeps. Up to this many
+# distinct values are counted exactly; past it, the estimate's relative error
+# is about 1/sqrt(CATALOG_SKETCH_SIZE).
+CATALOG_SKETCH_SIZE = 64
+
+# id pools larger than this are loaded into a temporary table and joined
+# against, rather than being inlined into the query as IN (...)
+ID_POOL_TABLE_THRESHOLD = CHUNK_SIZE
+
+# Numbers the temporary id pool tables, so nested uses don't collide
+_ID_POOL_TABLE_COUNTER = itertools.count()
+
 
 def _commit_or_rollback(func):
     """
@@ -46,6 +118,10 @@ def _commit_or_rollback(func):
     This is intended to be used only on the member functions of DAOs below.
     The return value of the wrapped function will be returned by the wrapper.
 
+    Inside a DAOFactory.transaction() block, committing is left to the block.
+    The function is instead called within a savepoint, so if it fails, its
+    partial writes are rolled back while the block's earlier ones are kept.
+
     :param func: the function to wrap
     :return: the wrapped function
     """
@@ -53,6 +129,9 @@ def _commit_or_rollback(func):
     def wrapper(*args, **kwargs):
         """Wrapper function for the passed-in function."""
         session = args[0].session
+        if session.info.get(IN_TRANSACTION):
+            with session.begin_nested():
+                return func(*args, **kwargs)
         try:
             result = func(*args, **kwargs)
             session.commit()
@@ -65,6 +144,107 @@ def _commit_or_rollback(func):
     return wrapper
 
 
+def _sketch_hash(value):
+    """
+    Hash a scalar or string for a CatalogSummary's sketch.
+
+    The hash is the same across processes and machines, unlike hash().
+
+    :param value: The value to hash
+    :returns: A 63-bit integer
+    """
+    if isinstance(value, six.string_types):
+        data = value.encode('utf-8')
+    else:
+        # Adding zero turns -0.0 into 0.0, which compares equal in the database
+        data = struct.pack('<d', float(value) + 0.0)
+    return int(hashlib.blake2b(data, digest_size=8).hexdigest(), 16) >> 1
+
+
+class CatalogSummary(object):
+    """
+    The running summary of one DataCatalog entry, or of a change to it.
+
+    Distinct values are counted with a K-Minimum-Values sketch: the smallest
+    CATALOG_SKETCH_SIZE hashes of the values seen. Until it's full, it holds
+    every distinct hash, so the count is exact; after, the largest hash kept
+    says how densely the hashes (and so the distinct values) fill their range.
+    Sketches of two sets of values combine into the sketch of their union, so
+    entries can be updated with just the values being inserted.
+    """
+
+    __slots__ = ('count', 'min', 'max', 'sketch', 'stale')
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, count=0, min=None, max=None, sketch=None, stale=False):
+        """
+        Create a summary.
+
+        :param count: The number of Records summarized
+        :param min: The smallest numerical value, if any
+        :param max: The largest numerical value, if any
+        :param sketch: A sorted list of the smallest value hashes
+        :param stale: Whether values were removed since the range and sketch
+                      were last exact
+        """
+        self.count = count
+        self.min = min
+        self.max = max
+        self.sketch = sketch if sketch is not None else []
+        self.stale = stale
+
+    def add(self, low=None, high=None, value=None, count=1):
+        """
+        Add a Record's datum to the summary.
+
+        :param low: The smallest numerical value it holds, if any
+        :param high: The largest numerical value it holds, if any
+        :param value: Its scalar or string value, to count the distinct values of
+        :param count: How many Records hold this same datum, if more than one
+        """
+        self.count += count
+        self._add_range(low, high)
+        if value is not None:
+            self._add_hash(_sketch_hash(value))
+
+    def merge(self, other):
+        """
+        Fold another summary (or change, whose count may be negative) into this one.
+
+        :param other: The CatalogSummary to merge
+        """
+        self.count += other.count
+        self._add_range(other.min, other.max)
+        for value_hash in other.sketch:
+            self._add_hash(value_hash)
+        self.stale = self.stale or other.stale
+
+    def distinct(self):
+        """Estimate the number of distinct values summarized."""
+        if len(self.sketch) < CATALOG_SKETCH_SIZE:
+            return len(self.sketch)
+        return int((CATALOG_SKETCH_SIZE - 1) * float(2 ** 63) / (self.sketch[-1] + 1))
+
+    def _add_range(self, low, high):
+        """Widen the range to include [low, high]."""
+        if low is not None:
+            self.min = low if self.min is None else min(self.min, low)
+        if high is not None:
+            self.max = high if self.max is None else max(self.max, high)
+
+    def _add_hash(self, value_hash):
+        """Add a hash to the sketch, if it's among the smallest."""
+        sketch = self.sketch
+        if len(sketch) == CATALOG_SKETCH_SIZE and value_hash >= sketch[-1]:
+            return
+        index = bisect.bisect_left(sketch, value_hash)
+        if index < len(sketch) and sketch[index] == value_hash:
+            return
+        sketch.insert(index, value_hash)
+        if len(sketch) > CATALOG_SKETCH_SIZE:
+            sketch.pop()
+
+
 class RecordDAO(dao.RecordDAO):
     """The DAO specifically responsible for handling Records in SQL."""
 
@@ -72,54 +252,509 @@ class RecordDAO(dao.RecordDAO):
         """Initialize RecordDAO with session for its SQL database."""
         self.session = session
 
-    def _insert_no_commit(self, records):
-        """Insert without committing; for shared functionality."""
+    def _insert_no_commit(self, records, on_conflict=None, raw_jsons=None):
+        """
+        Insert without committing; for shared functionality.
+
+        Small inserts go through the ORM. Once at least BULK_INSERT_THRESHOLD
+        Records are given (or if on_conflict is given), the rest of the
+        iterable is inserted via _bulk_insert_no_commit() instead.
+
+        :param records: Record or iterable of Records to insert
+        :param on_conflict: None, "replace", or "skip". See _do_insert().
+        :param raw_jsons: Validated raw JSON of the Records, if any. See _do_insert().
+        """
         if isinstance(records, model.Record):
             records = [records]
+        records = iter(records)
+        first_records = list(itertools.islice(records, BULK_INSERT_THRESHOLD))
+        if on_conflict is None and len(first_records) < BULK_INSERT_THRESHOLD:
+            self._orm_insert_no_commit(first_records, raw_jsons)
+        else:
+            self._bulk_insert_no_commit(itertools.chain(first_records, records), on_conflict,
+                                        raw_jsons)
+
+    def _orm_insert_no_commit(self, records, raw_jsons=None):
+        """Insert a list of Records through the ORM without committing."""
+        raw_jsons = raw_jsons or {}
+        has_sections = self._has_sections()
+        catalog_rows = defaultdict(list)
+        tag_cache = {}
         for record in records:
             LOGGER.debug('Inserting record %s into SQL.', record.id or record.local_id)
-            sql_record = self.create_sql_record(record)
+            sql_record = self.create_sql_record(record, tag_cache, raw_jsons.get(record.id))
+            if has_sections:
+                self._attach_sections(sql_record, record.raw)
+            self._orm_to_catalog_rows(sql_record, catalog_rows)
             self.session.add(sql_record)
+        self._catalog_rows(catalog_rows)
+
+    @staticmethod
+    def _orm_to_catalog_rows(sql_record, rows):
+        """
+        Collect the rows of an ORM Record that _catalog_rows() reads.
+
+        :param sql_record: The SQL schema record, with its data attached
+        :param rows: A dict of {schema table: list of column dicts} to add to,
+                     as filled by _record_to_rows()
+        """
+        id = sql_record.id
+        rows[schema.Record].append({'id': id, 'type': sql_record.type})
+        rows[schema.ScalarData].extend({'id': id, 'name': x.name, 'value': x.value}
+                                       for x in sql_record.scalars)
+        rows[schema.StringData].extend({'id': id, 'name': x.name, 'value': x.value}
+                                       for x in sql_record.strings)
+        rows[schema.ListScalarData].extend({'id': id, 'name': x.name, 'min': x.min,
+                                            'max': x.max} for x in sql_record.scalar_lists)
+        rows[schema.ListStringDataMaster].extend({'id': id, 'name': x.name}
+                                                 for x in sql_record.string_lists_master)
+        rows[schema.CurveSetMeta].extend({'id': id, 'name': x.name}
+                                         for x in sql_record.curve_set_meta)
+
+    def _catalog_rows(self, rows):
+        """
+        Add the rows of newly stored Records to the DataCatalog, if there is one.
+
+        :param rows: A dict of {schema table: list of column dicts} holding
+                     every row of the Records, as filled by _record_to_rows()
+        """
+        if not self._has_catalog() or not rows[schema.Record]:
+            return
+        types = {row['id']: row['type'] for row in rows[schema.Record]}
+        changes = defaultdict(CatalogSummary)
+        for type in types.values():
+            changes[(type, '', 'record')].add()
+        for kind, table in CATALOG_TABLES.items():
+            for row in rows[table]:
+                change = changes[(types[row['id']], row['name'], kind)]
+                if kind == 'scalar':
+                    change.add(row['value'], row['value'], row['value'])
+                elif kind == 'string':
+                    change.add(value=row['value'])
+                elif kind == 'scalar_list':
+                    change.add(row['min'], row['max'])
+                else:
+                    change.add()
+        self._apply_catalog_changes(changes)
+
+    def _uncatalog(self, ids):
+        """
+        Remove Records from the DataCatalog, if there is one, ahead of deleting their rows.
+
+        The Records' contributions are counted with a grouped query per table,
+        CHUNK_SIZE ids at a time. Their values can't be taken back out of the
+        entries' ranges and sketches, so entries with those are flagged stale.
+
+        :param ids: A list of the ids of the Records being removed
+        """
+        if not self._has_catalog():
+            return
+        changes = defaultdict(CatalogSummary)
+        func = sqlalchemy.func
+        record = schema.Record
+        for chunk_start in range(0, len(ids), CHUNK_SIZE):
+            chunk = ids[chunk_start:chunk_start + CHUNK_SIZE]
+            for type, count in self.session.execute(
+                    sqlalchemy.select(record.type, func.count()).where(record.id.in_(chunk))
+                    .group_by(record.type)):
+                changes[(type, '', 'record')].count -= count
+            for kind, table in CATALOG_TABLES.items():
+                for type, name, count in self.session.execute(
+                        sqlalchemy.select(record.type, table.name, func.count())
+                        .join(record, record.id == table.id).where(table.id.in_(chunk))
+                        .group_by(record.type, table.name)):
+                    change = changes[(type, name, kind)]
+                    change.count -= count
+                    change.stale = kind in ('scalar', 'string', 'scalar_list')
+        self._apply_catalog_changes(changes)
+
+    def _apply_catalog_changes(self, changes):
+        """
+        Merge changes into the DataCatalog's entries.
+
+        Counts, ranges and staleness are merged by the database, in an upsert
+        whose updates are relative to the stored values (record_count =
+        record_count + the change's, etc.), so concurrent writers can't lose
+        each other's changes. Sketches can't be merged in SQL, so entries whose
+        sketches grow are then read with FOR UPDATE (on databases with row
+        locks, keeping other writers off them until the commit), merged here,
+        and written back. Entries left with no Records are removed.
+
+        :param changes: A dict of {(type, name, kind): CatalogSummary of the change}
+        """
+        if not changes:
+            return
+        catalog = schema.DataCatalog.__table__
+        keys = list(changes)
+        upsert = self._catalog_upsert()
+        rows = [self._catalog_row(key, changes[key]) for key in keys]
+        for chunk_start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+            self.session.execute(upsert, rows[chunk_start:chunk_start + BULK_INSERT_CHUNK_SIZE])
+        key_columns = sqlalchemy.tuple_(catalog.c.type, catalog.c.name, catalog.c.kind)
+        key_criteria = sqlalchemy.and_(*[catalog.c[column] == sqlalchemy.bindparam('b_' + column)
+                                         for column in ('type', 'name', 'kind')])
+        sketched = [key for key in keys if changes[key].sketch]
+        merged = []
+        # Each key takes three parameters
+        key_chunk_size = max(CHUNK_SIZE // 3, 1)
+        for chunk_start in range(0, len(sketched), key_chunk_size):
+            for row in self.session.execute(
+                    catalog.select()
+                    .where(key_columns.in_(sketched[chunk_start:chunk_start + key_chunk_size]))
+                    .with_for_update()):
+                key = (row.type, row.name, row.kind)
+                entry = CatalogSummary(
+                    sketch=_json_loads(row.sketch) if row.sketch is not None else None)
+                entry.merge(CatalogSummary(sketch=changes[key].sketch))
+                merged.append({'b_type': row.type, 'b_name': row.name, 'b_kind': row.kind,
+                               'b_distinct_values': entry.distinct(),
+                               'b_sketch': json.dumps(entry.sketch)})
+        if merged:
+            self.session.execute(
+                catalog.update().where(key_criteria)
+                .values(distinct_values=sqlalchemy.bindparam('b_distinct_values'),
+                        sketch=sqlalchemy.bindparam('b_sketch')),
+                merged)
+        removed = [{'b_type': key[0], 'b_name': key[1], 'b_kind': key[2]}
+                   for key in keys if changes[key].count < 0]
+        if removed:
+            self.session.execute(catalog.delete().where(key_criteria,
+                                                        catalog.c.record_count <= 0),
+                                 removed)
+
+    def _catalog_upsert(self):
+        """
+        Create the upsert _apply_catalog_changes() merges DataCatalog entries with.
+
+        New entries are inserted as given. Existing ones have the given count
+        added to theirs, their range widened to include the given one, and are
+        flagged stale if the given row is; their sketch is left alone.
+
+        :returns: an insert statement for use with executemany
+        :raises NotImplementedError: for databases other than SQLite, MySQL and
+                                     PostgreSQL.
+        """
+        catalog = schema.DataCatalog.__table__
+        func = sqlalchemy.func
+        dialect = self.session.get_bind().dialect.name
+        if dialect == "mysql":
+            statement = sqlalchemy.dialects.mysql.insert(catalog)
+            new = statement.inserted
+        elif dialect in ("sqlite", "postgresql"):
+            statement = getattr(sqlalchemy.dialects, dialect).insert(catalog)
+            new = statement.excluded
+        else:
+            raise NotImplementedError("The data catalog can't be maintained in {} databases"
+                                      .format(dialect))
+        # SQLite's multi-argument min() and max() are its LEAST() and GREATEST()
+        least, greatest = ((func.min, func.max) if dialect == "sqlite"
+                           else (func.least, func.greatest))
+        # Either side's range may be NULL, which LEAST() and GREATEST() would return
+        updates = OrderedDict([
+            ('record_count', catalog.c.record_count + new.record_count),
+            ('min', least(func.coalesce(catalog.c.min, new.min),
+                          func.coalesce(new.min, catalog.c.min))),
+            ('max', greatest(func.coalesce(catalog.c.max, new.max),
+                             func.coalesce(new.max, catalog.c.max))),
+            ('stale', sqlalchemy.or_(catalog.c.stale, new.stale))])
+        if dialect == "mysql":
+            return statement.on_duplicate_key_update(updates)
+        return statement.on_conflict_do_update(index_elements=['type', 'name', 'kind'],
+                                               set_=updates)
+
+    def _rebuild_catalog_no_commit(self):
+        """
+        Recompute the DataCatalog from the data tables without committing.
+
+        Each table is read with a query grouping its rows by Record type and
+        name (and, for scalars and strings, value, to sketch the distinct
+        values), so only as many rows are returned as there are distinct values.
+
+        :returns: The number of entries in the rebuilt catalog
+        """
+        func = sqlalchemy.func
+        record = schema.Record
+        summaries = defaultdict(CatalogSummary)
+        for type, count in self.session.execute(sqlalchemy.select(record.type, func.count())
+                                                .group_by(record.type)):
+            summaries[(type, '', 'record')].count = count
+        for kind, table in CATALOG_TABLES.items():
+            if kind in SKETCHED_KINDS:
+                columns = [table.value, func.count()]
+                group_by = [table.value]
+            elif kind == 'scalar_list':
+                columns = [func.count(), func.min(table.min), func.max(table.max)]
+                group_by = []
+            else:
+                columns = [func.count()]
+                group_by = []
+            statement = (sqlalchemy.select(record.type, table.name, *columns)
+                         .join(record, record.id == table.id)
+                         .group_by(record.type, table.name, *group_by))
+            for row in self.session.execute(statement.execution_options(yield_per=CHUNK_SIZE)):
+                summary = summaries[(row[0], row[1], kind)]
+                if kind == 'scalar':
+                    summary.add(row[2], row[2], row[2], count=row[3])
+                elif kind == 'string':
+                    summary.add(value=row[2], count=row[3])
+                elif kind == 'scalar_list':
+                    summary.add(row[3], row[4], count=row[2])
+                else:
+                    summary.add(count=row[2])
+        catalog = schema.DataCatalog.__table__
+        self.session.execute(catalog.delete())
+        rows = [self._catalog_row(key, summary) for key, summary in summaries.items()]
+        for chunk_start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+            self.session.execute(catalog.insert(),
+                                 rows[chunk_start:chunk_start + BULK_INSERT_CHUNK_SIZE])
+        LOGGER.info('Rebuilt the data catalog, with %i entries.', len(rows))
+        return len(rows)
+
+    @staticmethod
+    def _catalog_row(key, summary):
+        """
+        Convert a summary into a DataCatalog row.
+
+        :param key: The entry's (type, name, kind)
+        :param summary: The entry's CatalogSummary
+        :returns: A dict of column values
+        """
+        type, name, kind = key
+        sketched = kind in SKETCHED_KINDS
+        return {'type': type, 'name': name, 'kind': kind, 'record_count': summary.count,
+                'min': summary.min, 'max': summary.max,
+                'distinct_values': summary.distinct() if sketched else None,
+                'sketch': json.dumps(summary.sketch) if sketched else None,
+                'stale': summary.stale}
+
+    def _has_sections(self):
+        """
+        Whether the database stores Records' sections (see schema.RecordSection).
+
+        Databases only have the table once asked to store sections (see
+        DAOFactory.upgrade_schema()). Until then, sections are neither written
+        nor fetched separately. The answer is cached on the session.
+
+        :returns: Whether the RecordSection table exists
+        """
+        return self._has_table(schema.RecordSection, HAS_SECTIONS)
+
+    def _has_catalog(self):
+        """
+        Whether the database keeps a catalog of its data (see schema.DataCatalog).
+
+        Older databases lack the table until migrated (see
+        DAOFactory.upgrade_schema()). Until then, names and types are listed
+        by scanning the data tables.
+
+        :returns: Whether the DataCatalog table exists
+        """
+        return self._has_table(schema.DataCatalog, HAS_CATALOG)
+
+    def _has_table(self, table, cache_key):
+        """
+        Whether the database has a table, caching the answer on the session.
+
+        :param table: The schema table to look for
+        :param cache_key: The session.info key to cache the answer under
+        :returns: Whether the table exists
+        """
+        if cache_key not in self.session.info:
+            self.session.info[cache_key] = sqlalchemy.inspect(
+                self.session.connection()).has_table(table.__tablename__)
+        return self.session.info[cache_key]
+
+    def _bulk_tables(self):
+        """Return the BULK_INSERT_TABLES this database has."""
+        if self._has_sections():
+            return BULK_INSERT_TABLES
+        return [x for x in BULK_INSERT_TABLES if x is not schema.RecordSection]
+
+    def _bulk_insert_no_commit(self, records, on_conflict=None, raw_jsons=None):
+        """
+        Insert without committing, using one executemany per table.
+
+        Rather than building an ORM object per row, Records are converted
+        directly into column dictionaries (see _record_to_rows()) and handed
+        to Core inserts, BULK_INSERT_CHUNK_SIZE Records at a time.
+
+        :param records: An iterable of Records to insert
+        :param on_conflict: None, "replace", or "skip". See _do_insert().
+        :param raw_jsons: Validated raw JSON of the Records, if any. See _do_insert().
+        """
+        raw_jsons = raw_jsons or {}
+        records = iter(records)
+        while True:
+            chunk = list(itertools.islice(records, BULK_INSERT_CHUNK_SIZE))
+            if not chunk:
+                break
+            LOGGER.debug('Bulk inserting %i records into SQL.', len(chunk))
+            if on_conflict == "replace":
+                # Last version of an id wins, as if each replaced the one before
+                chunk = list(OrderedDict((record.id, record) for record in chunk).values())
+                self._delete_data_no_commit([record.id for record in chunk])
+            elif on_conflict == "skip":
+                # First version of an id wins, as would be the case with the db
+                unique = OrderedDict()
+                for record in chunk:
+                    unique.setdefault(record.id, record)
+                existing = set(itertools.compress(unique, self._many_exist(list(unique))))
+                chunk = [record for id, record in unique.items() if id not in existing]
+            rows = defaultdict(list)
+            tag_cache = {}
+            for record in chunk:
+                self._record_to_rows(record, rows, tag_cache, raw_jsons.get(record.id))
+            for table in self._bulk_tables():
+                if rows[table]:
+                    self.session.execute(self._conflict_insert(table, on_conflict),
+                                         rows[table])
+            self._catalog_rows(rows)
+
+    def _conflict_insert(self, table, on_conflict=None):
+        """
+        Create an INSERT for a table that handles primary key conflicts natively.
+
+        With "replace", a conflicting row has its other columns overwritten
+        in place (rather than being deleted and reinserted, which would
+        cascade). With "skip", it's left alone.
+
+        :param table: The schema table to insert into
+        :param on_conflict: None, "replace", or "skip"
+        :returns: an insert statement for use with executemany
+        :raises NotImplementedError: if on_conflict is given for a database other
+                                     than SQLite or MySQL.
+        """
+        sql_table = table.__table__
+        if on_conflict is None:
+            return sql_table.insert()
+        key_columns = [column.name for column in sql_table.primary_key.columns]
+        value_columns = [column.name for column in sql_table.columns
+                         if column.name not in key_columns]
+        dialect = self.session.get_bind().dialect.name
+        if dialect == "sqlite":
+            statement = sqlalchemy.dialects.sqlite.insert(sql_table)
+            if on_conflict == "skip" or not value_columns:
+                return statement.on_conflict_do_nothing()
+            return statement.on_conflict_do_update(
+                index_elements=key_columns,
+                set_={column: statement.excluded[column] for column in value_columns})
+        if dialect == "mysql":
+            statement = sqlalchemy.dialects.mysql.insert(sql_table)
+            # Updating the key to itself is MySQL's idiom for "do nothing"
+            updated_columns = (key_columns[:1] if on_conflict == "skip" or not value_columns
+                               else value_columns)
+            return statement.on_duplicate_key_update(
+                {column: statement.inserted[column] for column in updated_columns})
+        raise NotImplementedError("on_conflict isn't supported for {} databases"
+                                  .format(dialect))
+
+    def _delete_data_no_commit(self, ids):
+        """
+        Delete the rows representing Records' data, curve sets, and files.
+
+        Neither the Records themselves nor their Relationships are removed,
+        though the Records are removed from the DataCatalog, as their rows
+        are either deleted or overwritten next.
+
+        :param ids: A list of ids of the Records whose rows to remove
+        """
+        self._uncatalog(ids)
+        for chunk_start in range(0, len(ids), CHUNK_SIZE):
+            chunk = ids[chunk_start:chunk_start + CHUNK_SIZE]
+            for table in self._bulk_tables():
+                if table is not schema.Record:
+                    self.session.execute(table.__table__.delete()
+                                         .where(table.__table__.c.id.in_(chunk)))
 
     @_commit_or_rollback
-    def _do_insert(self, records):
+    def _insert_and_commit(self, records, on_conflict=None, raw_jsons=None):
+        """Insert a(n iterable of) Record(s) in a single transaction."""
+        self._insert_no_commit(records, on_conflict, raw_jsons)
+
+    def _insert_and_release(self, records, on_conflict=None, raw_jsons=None):
+        """Insert and commit a batch of Records, then drop them from the session."""
+        self._insert_and_commit(records, on_conflict, raw_jsons)
+        # Inside a transaction() block nothing's committed yet, so flush first
+        self.session.flush()
+        self.session.expunge_all()
+
+    # Args differ because only SQL is handed pre-validated Records, by import_json()
+    # pylint: disable=arguments-differ
+    def _do_insert(self, records, batch_size=None, on_conflict=None, raw_jsons=None):
         """
         Given a(n iterable of) Record(s), insert into the current SQL database.
 
         :param records: Record or iterable of Records to insert
-        """
-        self._insert_no_commit(records)
+        :param batch_size: If given, commit (and expunge the session) every
+                           <batch_size> Records, consuming <records> lazily.
+                           Otherwise, everything is inserted in one transaction.
+        :param on_conflict: What to do with Records whose ids already exist. By
+                            default, that's an error. With "replace", the stored
+                            Record is replaced (but keeps its Relationships).
+                            With "skip", the stored Record is kept.
+        :param raw_jsons: A dict of {id: raw JSON} for Records already validated
+                          (and so serialized), as by Record._is_valid_with_json().
+                          Those Records aren't validated again.
+        :raises BatchInsertError: if batch_size is given and a batch fails. That
+                                  batch is rolled back; earlier ones stay committed
+                                  (unless within a transaction(), where they're
+                                  rolled back too).
+        """
+        if batch_size is None:
+            self._insert_and_commit(records, on_conflict, raw_jsons)
+        else:
+            if isinstance(records, model.Record):
+                records = [records]
+            in_transaction = self.session.info.get(IN_TRANSACTION)
+            # Within a transaction, a failed batch takes the earlier ones with it
+            with (self.session.begin_nested() if in_transaction
+                  else contextlib.nullcontext()):
+                self._insert_in_batches(records, batch_size,
+                                        functools.partial(self._insert_and_release,
+                                                          on_conflict=on_conflict,
+                                                          raw_jsons=raw_jsons),
+                                        committing=not in_transaction)
 
     @staticmethod
-    def create_sql_record(sina_record):
+    def create_sql_record(sina_record, tag_cache=None, raw_json=None):
         """
         Create a SQL record object for the given Sina Record.
 
         :param sina_record: A Record to insert
+        :param tag_cache: A dict used to reuse the JSON of previously seen tag
+                          lists (see _dump_tags()). Share it across Records.
+        :param raw_json: The Record's raw JSON, if it's already been validated.
+                         Otherwise, it's validated here.
         :return: the created record
         """
-        is_valid, warnings = sina_record.is_valid()
-        if not is_valid:
-            raise ValueError(warnings)
+        if tag_cache is None:
+            tag_cache = {}
+        if raw_json is None:
+            raw_json = _validated_json(sina_record)
         sql_record = schema.Record(id=sina_record.id, type=sina_record.type,
-                                   raw=json.dumps(sina_record.raw))
+                                   raw=raw_json)
         if sina_record.data:
-            RecordDAO._attach_data(sql_record, sina_record.data)
+            RecordDAO._attach_data(sql_record, sina_record.data, tag_cache)
         if sina_record.curve_sets:
-            RecordDAO._attach_curves(sql_record, sina_record.curve_sets, sina_record.data)
+            RecordDAO._attach_curves(sql_record, sina_record.curve_sets, sina_record.data,
+                                     tag_cache)
         if sina_record.files:
-            RecordDAO._attach_files(sql_record, sina_record.files)
+            RecordDAO._attach_files(sql_record, sina_record.files, tag_cache)
 
         return sql_record
 
     @staticmethod
-    def _attach_data(record, data):
+    def _attach_data(record, data, tag_cache=None):
         """
         Attach the data entries to the given SQL record.
 
         :param record: The SQL schema record to associate the data to.
         :param data: The dictionary of data to insert.
+        :param tag_cache: A dict used to reuse the JSON of previously seen tag
+                          lists (see _dump_tags()).
         """
+        if tag_cache is None:
+            tag_cache = {}
         LOGGER.debug('Inserting %i data entries to Record ID %s.', len(data), record.id)
         for datum_name, datum in data.items():
             if isinstance(datum['value'], list):
@@ -128,7 +763,7 @@ class RecordDAO(dao.RecordDAO):
                 # tags to a string (if they exist).
                 # Using json.dumps() instead of str() (or join()) gives
                 # valid JSON
-                tags = (json.dumps(datum['tags']) if 'tags' in datum else None)
+                tags = (_dump_tags(datum['tags'], tag_cache) if 'tags' in datum else None)
                 if not datum['value']:  # empty list
                     continue  # An empty list can't be queried
                 # If we've been given a list of numbers:
@@ -149,7 +784,7 @@ class RecordDAO(dao.RecordDAO):
                         record.string_lists_entry.append(schema.ListStringDataEntry(
                             name=datum_name, index=index, value=entry))
             elif isinstance(datum['value'], (numbers.Number, six.string_types)):
-                tags = (json.dumps(datum['tags']) if 'tags' in datum else None)
+                tags = (_dump_tags(datum['tags'], tag_cache) if 'tags' in datum else None)
                 if isinstance(datum['value'], numbers.Real):
                     data_type = schema.ScalarData
                     list_in_record = record.scalars
@@ -163,24 +798,29 @@ class RecordDAO(dao.RecordDAO):
                                                 tags=tags))
 
     @staticmethod
-    def _attach_curves(record, curve_sets, data):
+    def _attach_curves(record, curve_sets, data, tag_cache=None):
         """
         Attach the curve entries to the given SQL record.
 
         :param record: The SQL schema record to associate the data to.
         :param curve_sets: The dictionary of curve sets to insert.
         :param data: The dictionary containing data items
+        :param tag_cache: A dict used to reuse the JSON of previously seen tag
+                          lists (see _dump_tags()).
         """
+        if tag_cache is None:
+            tag_cache = {}
         LOGGER.debug('Inserting %i curve set entries to Record ID %s.',
                      len(curve_sets), record.id)
 
         for curveset_name, curveset_obj in curve_sets.items():
-            tags = (json.dumps(curveset_obj['tags']) if 'tags' in curveset_obj else None)
+            tags = (_dump_tags(curveset_obj['tags'], tag_cache)
+                    if 'tags' in curveset_obj else None)
             record.curve_set_meta.append(schema.CurveSetMeta(name=curveset_name,
                                                              tags=tags))
         resolved_sets = utils.resolve_curve_sets(curve_sets, data)
         for entry_name, entry_obj in resolved_sets.items():
-            tags = (json.dumps(entry_obj['tags']) if 'tags' in entry_obj else None)
+            tags = (_dump_tags(entry_obj['tags'], tag_cache) if 'tags' in entry_obj else None)
             record.scalar_lists.append(schema.ListScalarData(
                 name=entry_name,
                 min=min(entry_obj['value']),
@@ -189,28 +829,135 @@ class RecordDAO(dao.RecordDAO):
                 tags=tags))
 
     @staticmethod
-    def _attach_files(record, files):
+    def _attach_files(record, files, tag_cache=None):
         """
         Attach the file entries to the given SQL record.
 
         :param record: The Record to associate the files to.
         :param files: The dictionary of files to insert.
+        :param tag_cache: A dict used to reuse the JSON of previously seen tag
+                          lists (see _dump_tags()).
         """
+        if tag_cache is None:
+            tag_cache = {}
         LOGGER.debug('Inserting %i files to record id=%s.', len(files), id)
         for uri, file_info in six.iteritems(files):
-            tags = (json.dumps(file_info['tags']) if 'tags' in file_info else None)
+            tags = (_dump_tags(file_info['tags'], tag_cache) if 'tags' in file_info else None)
             record.documents.append(schema.Document(uri=uri,
                                                     mimetype=file_info.get('mimetype'),
                                                     tags=tags))
 
+    @staticmethod
+    def _attach_sections(record, raw):
+        """
+        Attach the sections of a raw to the given SQL record.
+
+        :param record: The SQL schema record to associate the sections to.
+        :param raw: The raw dictionary of the Record being inserted.
+        """
+        # pylint: disable=protected-access
+        for section, contents in dao.RecordDAO._split_sections(raw).items():
+            record.sections.append(schema.RecordSection(section=section,
+                                                        raw=json.dumps(contents)))
+
+    @staticmethod
+    def _record_to_rows(sina_record, rows, tag_cache=None, raw_json=None):
+        """
+        Convert a Sina Record into the rows that represent it in each table.
+
+        This is the bulk counterpart to create_sql_record(), and must produce
+        the same rows it does. The raw is serialized only once, during
+        validation.
+
+        :param sina_record: A Record to convert
+        :param rows: A dict of {schema table: list of column dicts} to add the
+                     Record's rows to.
+        :param tag_cache: A dict used to reuse the JSON of previously seen tag
+                          lists (see _dump_tags()). Share it across Records.
+        :param raw_json: The Record's raw JSON, if it's already been validated.
+                         Otherwise, it's validated here.
+        """
+        if tag_cache is None:
+            tag_cache = {}
+        if raw_json is None:
+            raw_json = _validated_json(sina_record)
+        id = sina_record.id
+        rows[schema.Record].append({'id': id, 'type': sina_record.type,
+                                    'raw': raw_json})
+        data = sina_record.data
+        for datum_name, datum in data.items():
+            value = datum['value']
+            tags = (_dump_tags(datum['tags'], tag_cache) if 'tags' in datum else None)
+            if isinstance(value, list):
+                if not value:  # An empty list can't be queried
+                    continue
+                if isinstance(value[0], numbers.Real):
+                    rows[schema.ListScalarData].append(
+                        {'id': id, 'name': datum_name, 'min': min(value),
+                         'max': max(value), 'units': datum.get('units'), 'tags': tags})
+                else:
+                    rows[schema.ListStringDataMaster].append(
+                        {'id': id, 'name': datum_name, 'units': datum.get('units'),
+                         'tags': tags})
+                    rows[schema.ListStringDataEntry].extend(
+                        {'id': id, 'name': datum_name, 'index': index, 'value': entry}
+                        for index, entry in enumerate(value))
+            elif isinstance(value, (numbers.Number, six.string_types)):
+                table = (schema.ScalarData if isinstance(value, numbers.Real)
+                         else schema.StringData)
+                rows[table].append({'id': id, 'name': datum_name, 'value': value,
+                                    'units': datum.get('units'), 'tags': tags})
+        curve_sets = sina_record.curve_sets
+        if curve_sets:
+            for curveset_name, curveset_obj in curve_sets.items():
+                tags = (_dump_tags(curveset_obj['tags'], tag_cache)
+                        if 'tags' in curveset_obj else None)
+                rows[schema.CurveSetMeta].append({'id': id, 'name': curveset_name,
+                                                  'tags': tags})
+            for entry_name, entry_obj in utils.resolve_curve_sets(curve_sets, data).items():
+                tags = (_dump_tags(entry_obj['tags'], tag_cache)
+                        if 'tags' in entry_obj else None)
+                rows[schema.ListScalarData].append(
+                    {'id': id, 'name': entry_name, 'min': min(entry_obj['value']),
+                     'max': max(entry_obj['value']), 'units': entry_obj.get('units'),
+                     'tags': tags})
+        for uri, file_info in six.iteritems(sina_record.files):
+            tags = (_dump_tags(file_info['tags'], tag_cache) if 'tags' in file_info else None)
+            rows[schema.Document].append({'id': id, 'uri': uri,
+                                          'mimetype': file_info.get('mimetype'),
+                                          'tags': tags})
+        for section, contents in dao.RecordDAO._split_sections(sina_record.raw).items():
+            rows[schema.RecordSection].append({'id': id, 'section': section,
+                                               'raw': json.dumps(contents)})
+
     def _delete_no_commit(self, ids):
-        """Delete without committing; for shared functionality."""
+        """
+        Delete without committing; for shared functionality.
+
+        Rows are removed from every table explicitly, in chunks of CHUNK_SIZE
+        ids, rather than relying on the backend to cascade (SQLite only does
+        so when foreign keys are enabled, and does it row by row). Since the
+        deletes bypass the ORM, the session is flushed beforehand and cleared
+        afterwards so no stale objects survive them.
+
+        :param ids: The id or iterable of ids of the Record(s) to delete.
+        """
         if isinstance(ids, six.string_types):
             ids = [ids]
+        ids = list(ids)
         LOGGER.debug('Deleting records with ids in: %s', ids)
-        (self.session.query(schema.Record)
-         .filter(schema.Record.id.in_(ids))
-         .delete(synchronize_session='fetch'))
+        self.session.flush()
+        self._delete_data_no_commit(ids)
+        relationships = schema.Relationship.__table__
+        records = schema.Record.__table__
+        for chunk_start in range(0, len(ids), CHUNK_SIZE):
+            chunk = ids[chunk_start:chunk_start + CHUNK_SIZE]
+            self.session.execute(relationships.delete()
+                                 .where(relationships.c.subject_id.in_(chunk)))
+            self.session.execute(relationships.delete()
+                                 .where(relationships.c.object_id.in_(chunk)))
+            self.session.execute(records.delete().where(records.c.id.in_(chunk)))
+        self.session.expunge_all()
 
     @_commit_or_rollback
     def delete(self, ids):
@@ -218,22 +965,80 @@ class RecordDAO(dao.RecordDAO):
         Given a(n iterable of) Record id(s), delete all mention from the SQL database.
 
         This includes removing all data, raw(s), relationships, etc.
-        Because the id is a foreign key in every table
-        (besides Record itself but including Run, etc), we can rely on
-        cascading to propogate the deletion.
 
         :param ids: The id or iterable of ids of the Record(s) to delete.
         """
         self._delete_no_commit(ids)
 
+    @_commit_or_rollback
+    def _do_delete_all_records(self):
+        """
+        Empty every table in the database.
+
+        MySQL tables are TRUNCATEd (with foreign key checks suspended, as
+        TRUNCATE refuses to touch referenced tables otherwise). SQLite has no
+        TRUNCATE, but an unqualified DELETE on a table with no triggers is
+        its equivalent; tables are emptied children-first so that doesn't
+        fall back to checking foreign keys row by row.
+
+        Note that TRUNCATE commits implicitly in MySQL, so this can't be rolled
+        back there. Within a DAOFactory.transaction() block, where that would
+        also commit the block's earlier writes, MySQL tables are DELETEd from
+        children-first instead, which is slower but rolls back with the block.
+        """
+        self.session.flush()
+        optional = {schema.RecordSection.__table__: self._has_sections(),
+                    schema.DataCatalog.__table__: self._has_catalog()}
+        tables = [x for x in reversed(schema.Base.metadata.sorted_tables)
+                  if optional.get(x, True)]
+        if (self.session.get_bind().dialect.name == "mysql"
+                and not self.session.info.get(IN_TRANSACTION)):
+            self.session.execute(sqlalchemy.text('SET FOREIGN_KEY_CHECKS=0'))
+            try:
+                for table in tables:
+                    self.session.execute(sqlalchemy.text('TRUNCATE TABLE `{}`'
+                                                         .format(table.name)))
+            finally:
+                self.session.execute(sqlalchemy.text('SET FOREIGN_KEY_CHECKS=1'))
+        else:
+            for table in tables:
+                self.session.execute(table.delete())
+        self.session.expunge_all()
+
     def get_raw(self, id_):
-        result = (self.session.query(schema.Record)
-                  .filter(schema.Record.id == id_).one_or_none())
+        result = self.session.execute(sqlalchemy.select(schema.Record.raw)
+                                      .where(schema.Record.id == id_)).first()
 
         if result is None:
             raise ValueError("No Record found with id %s" % id_)
 
-        return _to_json_string(result.raw)
+        return _to_json_string(result[0])
+
+    def _stream(self, statement):
+        """
+        Execute a Core statement, fetching its rows CHUNK_SIZE at a time.
+
+        Rows are plain tuples rather than ORM entities, so nothing builds up in
+        the session's identity map however many are iterated over. MySQL's
+        driver can only stream one result at a time per connection, and
+        nothing else can run on it meanwhile, so there the rows come from a
+        connection of their own (see _concurrent_dao()), or, if that's
+        impossible, are buffered instead.
+
+        :param statement: The statement to execute
+        :returns: A generator of the statement's rows
+        """
+        streamed = statement.execution_options(yield_per=CHUNK_SIZE)
+        if self.session.get_bind().dialect.name != "mysql":
+            for row in self.session.execute(streamed):
+                yield row
+        elif self._can_query_concurrently():
+            with self._concurrent_dao() as record_dao:
+                for row in record_dao.session.execute(streamed):
+                    yield row
+        else:
+            for row in self.session.execute(statement):
+                yield row
 
     @_commit_or_rollback
     def _do_update(self, records):
@@ -242,35 +1047,159 @@ class RecordDAO(dao.RecordDAO):
 
         :param records: A list of Records to update.
         """
-        # Note that session.merge() does not delete removed attributes, hence the
-        # manual delete-reinsert. We also need to be sure we preserve relationships,
-        # since they would otherwise cascade delete.
-        temp_rel_dao = RelationshipDAO(self.session)
-        for record in records:
-            old_subject_relationships = temp_rel_dao.get(subject_id=record.id)
-            old_object_relationships = temp_rel_dao.get(object_id=record.id)
-            self._delete_no_commit(record.id)
-            self._insert_no_commit(record)
-            self.session.flush()  # Ensure the record exists before re-adding relationships
-            temp_rel_dao.insert(old_object_relationships)
-            temp_rel_dao.insert(old_subject_relationships)
+        self._update_no_commit(records)
+
+    def _update_no_commit(self, records):
+        """
+        Update without committing; for shared functionality.
+
+        Rather than deleting and reinserting each Record, this diffs the rows
+        the new versions would have (see _record_to_rows()) against the rows
+        already stored, then issues batched DELETEs, UPDATEs, and INSERTs for
+        only the rows that changed. Records are handled CHUNK_SIZE at a time.
+        Relationships are never touched.
+
+        :param records: An iterable of Records to update. If a Record appears
+                        more than once, the last version wins.
+        """
+        # Later versions of a Record replace earlier ones, as they would if updated in turn
+        records = list(OrderedDict((record.id, record) for record in records).values())
+        self.session.flush()
+        for chunk_start in range(0, len(records), CHUNK_SIZE):
+            chunk = records[chunk_start:chunk_start + CHUNK_SIZE]
+            ids = [record.id for record in chunk]
+            new_rows = defaultdict(list)
+            tag_cache = {}
+            for record in chunk:
+                self._record_to_rows(record, new_rows, tag_cache)
+            LOGGER.debug('Updating records with ids in: %s', ids)
+            self._uncatalog(ids)
+            # Record itself goes first (it has to stay put for everything that
+            # references it), then inserts happen last, after any freed keys are deleted.
+            inserts = []
+            for table in self._bulk_tables():
+                inserts.append((table, self._apply_row_diff(table, ids, new_rows[table])))
+            for table, rows in inserts:
+                if rows:
+                    self.session.execute(table.__table__.insert(), rows)
+            self._catalog_rows(new_rows)
+
+    def _apply_row_diff(self, table, ids, new_rows):
+        """
+        Bring one table's rows for some Records in line with a set of new rows.
+
+        Rows whose primary key is no longer present are deleted and rows whose
+        non-key columns changed are updated. Rows that are new aren't inserted
+        here, they're returned so the caller can insert them once every table
+        is diffed.
+
+        :param table: The schema table to diff
+        :param ids: The ids of the Records being updated
+        :param new_rows: The column dicts that table should hold for those Records
+        :returns: the list of new rows that need inserting
+        """
+        sql_table = table.__table__
+        key_columns = [column.name for column in sql_table.primary_key.columns]
+        value_columns = [column.name for column in sql_table.columns
+                         if column.name not in key_columns]
+
+        def comparable(row):
+            """Return a row's non-key values in a form that compares across dbs."""
+            return tuple(_to_json_string(row[column]) if column in JSON_COLUMNS else row[column]
+                         for column in value_columns)
+
+        old_rows = {}
+        for row in self.session.execute(sql_table.select().where(sql_table.c.id.in_(ids))):
+            row = row._mapping  # pylint: disable=protected-access
+            old_rows[tuple(row[column] for column in key_columns)] = comparable(row)
+        to_insert, to_update = [], []
+        new_keys = set()
+        for row in new_rows:
+            key = tuple(row[column] for column in key_columns)
+            new_keys.add(key)
+            if key not in old_rows:
+                to_insert.append(row)
+            elif old_rows[key] != comparable(row):
+                to_update.append(row)
+        to_delete = [key for key in old_rows if key not in new_keys]
+
+        # Bound parameters can't share names with the columns being updated
+        key_criteria = sqlalchemy.and_(*[sql_table.c[column] == sqlalchemy.bindparam('b_' + column)
+                                         for column in key_columns])
+        if to_delete:
+            self.session.execute(sql_table.delete().where(key_criteria),
+                                 [{'b_' + column: value for column, value in zip(key_columns, key)}
+                                  for key in to_delete])
+        if to_update and value_columns:
+            self.session.execute(
+                sql_table.update().where(key_criteria)
+                .values({column: sqlalchemy.bindparam('b_' + column) for column in value_columns}),
+                [{'b_' + column: value for column, value in row.items()} for row in to_update])
+        return to_insert
 
     @_commit_or_rollback
     def _do_update_appendonly(self, records):
         """
         Given a list of Records, update them in the backend in a single transaction.
 
+        The old versions are fetched CHUNK_SIZE at a time, each new Record is
+        underlaid beneath its old version, and the chunk is handed to the
+        diffing update as a whole.
+
         :param records: A list of Records to update.
         """
-        new_records = []
-        for record in records:
+        records = list(records)
+        for chunk_start in range(0, len(records), CHUNK_SIZE):
+            chunk = records[chunk_start:chunk_start + CHUNK_SIZE]
+            unique_ids = list(OrderedDict.fromkeys(record.id for record in chunk))
+            old_records = {old_record.id: old_record for old_record in self.get(unique_ids)}
             # Replaces values from old record into new record
             # that way only appends are new
-            old_record = list(super(RecordDAO, self)._find(id_pool=[record.id]))[0]
-            underlay_func = underlay(record)
-            new_records.append(underlay_func(old_record))
-
-        self._do_update(new_records)
+            self._update_no_commit([underlay(record)(old_records[record.id])
+                                    for record in chunk])
+
+    @contextlib.contextmanager
+    def _id_pool(self, id_pool):
+        """
+        Prepare a pool of ids for restricting queries to, for a with block.
+
+        Yields a function that, given a column of Record ids, returns a filter
+        restricting it to the pool. Pools of up to ID_POOL_TABLE_THRESHOLD
+        ids are inlined as IN (...). Larger ones would trip the database's
+        limit on bound variables (or at least crawl), so they're bulk inserted
+        into a temporary table instead, which the filter semi-joins against.
+        The table is dropped when the block exits, so any query using it must
+        be run to completion within the block.
+
+        :param id_pool: An iterable of ids, or None for no restriction (in
+                        which case None is yielded).
+        """
+        if id_pool is None:
+            yield None
+            return
+        # Dedupe (the table's keyed on id) but keep the order
+        id_pool = list(OrderedDict.fromkeys(id_pool))
+        if len(id_pool) <= ID_POOL_TABLE_THRESHOLD:
+            yield lambda column: column.in_(id_pool)
+            return
+        table = sqlalchemy.Table('sina_id_pool_{}'.format(next(_ID_POOL_TABLE_COUNTER)),
+                                 sqlalchemy.MetaData(),
+                                 sqlalchemy.Column('id', sqlalchemy.String(255),
+                                                   primary_key=True),
+                                 prefixes=['TEMPORARY'])
+        connection = self.session.connection()
+        LOGGER.debug('Loading %s ids into temporary table %s', len(id_pool), table.name)
+        table.create(connection)
+        try:
+            for chunk_start in range(0, len(id_pool), BULK_INSERT_CHUNK_SIZE):
+                connection.execute(table.insert(),
+                                   [{'id': id} for id in
+                                    id_pool[chunk_start:chunk_start + BULK_INSERT_CHUNK_SIZE]])
+            yield lambda column: column.in_(sqlalchemy.select(table.c.id))
+        finally:
+            # A plain DROP TABLE would commit the transaction in MySQL
+            keyword = 'TEMPORARY ' if connection.dialect.name == 'mysql' else ''
+            connection.execute(sqlalchemy.text('DROP {}TABLE {}'.format(keyword, table.name)))
 
     # pylint: disable=too-many-locals, too-many-branches
     def _do_data_query(self, criteria, id_pool=None, alias_dict=None):
@@ -282,6 +1211,28 @@ class RecordDAO(dao.RecordDAO):
         :param alias_dict: An alias dictionary to find differently named data across records
         :returns: A generator of Record ids that fulfill all criteria.
 
+        :raises ValueError: if not supplied at least one criterion or given
+                            a criterion it does not support
+        """
+        filters = self._compile_data_criteria(criteria, alias_dict)
+        with self._id_pool(id_pool) as in_pool:
+            query = self.session.query(schema.Record.id).filter(*filters)
+            if id_pool is not None:
+                query = query.filter(in_pool(schema.Record.id))
+            results = query.all()
+        return (x[0] for x in results)
+
+    def _compile_data_criteria(self, criteria, alias_dict=None):
+        """
+        Turn data criteria into filters on the Record table's ids.
+
+        Each is a semi-join (id IN (subquery)) or, for negated criteria, an
+        anti-join (id NOT IN (subquery)), so a Record can only be returned once.
+
+        :param criteria: Dict of {data_name: criteria_to_fulfill}
+        :param alias_dict: An alias dictionary to find differently named data across records
+        :returns: A list of filters, all of which a Record must pass to fulfill the criteria
+
         :raises ValueError: if not supplied at least one criterion or given
                             a criterion it does not support
         """
@@ -339,24 +1290,10 @@ class RecordDAO(dao.RecordDAO):
                                                 operation=list_criteria.operation,
                                                 alias_dict=alias_dict)
                         for datum_name, list_criteria in scalar_list_criteria]
-
-        joined_query = self.session.query(schema.Record.id)
-        if id_pool is not None:
-            joined_query = joined_query.filter(schema.Record.id.in_(id_pool))
-        for sub_query in sub_queries:
-            sub_query = sub_query.subquery()
-            joined_query = joined_query.join(sub_query, schema.Record.id == sub_query.c.id)
-
-        # Universal criteria currently go cross-table and have to be handled
-        # with Python logic
+        filters = [self._semi_join(sub_query) for sub_query in sub_queries]
         if universal_criteria:
-            universal_pool = self._universal_query(universal_criteria, alias_dict=alias_dict)
-            if not sub_queries and id_pool is None:
-                return universal_pool
-            universal_pool = set(universal_pool)
-            return (x[0] for x in joined_query.all() if x[0] in universal_pool)
-
-        return (x[0] for x in joined_query.all())
+            filters += self._universal_filters(universal_criteria, alias_dict=alias_dict)
+        return filters
 
     def _scalar_list_query(self, datum_name, data_range, operation, alias_dict=None):
         """
@@ -536,37 +1473,86 @@ class RecordDAO(dao.RecordDAO):
                                 (or one of its children) from the raw.
         :returns: A generator of Record objects
         """
-        chunks = [ids[x:x+chunk_size] for x in range(0, len(ids), chunk_size)]
-        for chunk in chunks:
-            ids_found = 0
-            results = (self.session.query(schema.Record)
-                       .filter(schema.Record.id.in_(chunk)))
+        for rows in self._get_raw_chunks(ids, chunk_size):
+            for _, _, raw in rows:
+                yield _record_builder(json_input=json.loads(raw))
 
-            for result in results:
-                ids_found += 1
-                yield _record_builder(json_input=_json_loads(result.raw))
+    def _get_raw_chunks(self, ids, chunk_size):
+        """
+        Fetch the raws of Records, a chunk (and query) at a time.
 
-            if ids_found != len(chunk):
+        :param ids: A list of Record ids to fetch the raws of
+        :param chunk_size: How many ids to fetch per chunk
+        :returns: A generator of lists of (id, type, raw JSON string) rows, one list per chunk
+        :raises ValueError: if no Record is found for some id.
+        """
+        chunks = [ids[x:x+chunk_size] for x in range(0, len(ids), chunk_size)]
+        for chunk in chunks:
+            results = self.session.execute(sqlalchemy.select(schema.Record.id,
+                                                             schema.Record.type,
+                                                             schema.Record.raw)
+                                           .where(schema.Record.id.in_(chunk)))
+            rows = [(str(result[0]), result[1], _to_json_string(result[2]))
+                    for result in results]
+            if len(rows) != len(chunk):
                 raise ValueError("No Record found with id in chunk %s" % chunk)
+            yield rows
+
+    def _get_section_chunks(self, ids, chunk_size, sections):
+        """
+        Fetch some sections of Records, a chunk (and query) at a time.
+
+        Only the requested sections' JSON is transferred and parsed, unless the
+        database predates schema.RecordSection (see _has_sections()).
+
+        :param ids: A list of Record ids to fetch
+        :param chunk_size: How many ids to fetch per chunk
+        :param sections: A collection of the names of the sections to fetch
+        :returns: A generator of lists of (id, type, {<section>: <contents>}) rows,
+                  one list per chunk. Empty sections are absent.
+        :raises ValueError: if no Record is found for some id.
+        """
+        if not self._has_sections():
+            for rows in super(RecordDAO, self)._get_section_chunks(ids, chunk_size, sections):
+                yield rows
+            return
+        record_section = schema.RecordSection
+        for chunk_start in range(0, len(ids), chunk_size):
+            chunk = ids[chunk_start:chunk_start + chunk_size]
+            results = self.session.execute(
+                sqlalchemy.select(schema.Record.id, schema.Record.type,
+                                  record_section.section, record_section.raw)
+                .outerjoin(record_section,
+                           sqlalchemy.and_(record_section.id == schema.Record.id,
+                                           record_section.section.in_(list(sections))))
+                .where(schema.Record.id.in_(chunk)))
+            found = OrderedDict()
+            for id, type, section, raw in results:
+                contents = found.setdefault(str(id), (type, {}))[1]
+                if section is not None:
+                    contents[section] = _json_loads(raw)
+            if len(found) != len(chunk):
+                raise ValueError("No Record found with id in chunk %s" % chunk)
+            yield [(id, type, contents) for id, (type, contents) in found.items()]
 
     def get_all(self, ids_only=False):
         """
         Return all Records.
 
+        Rows are streamed (see _stream()), so a full scan runs in constant memory.
+
         :param ids_only: whether to return only the ids of matching Records
 
         :returns: A generator of all Records.
         """
         LOGGER.debug('Getting all records')
         if ids_only:
-            query = self.session.query(schema.Record.id)
-            for record_id in query:
+            for record_id in self._stream(sqlalchemy.select(schema.Record.id)):
                 yield str(record_id[0])
         else:
-            results = self.session.query(schema.Record)
-            for result in results:
+            for result in self._stream(sqlalchemy.select(schema.Record.raw)):
                 yield model.generate_record_from_json(
-                    json_input=_json_loads(result.raw))
+                    json_input=_json_loads(result[0]))
 
     def _do_get_all_of_type(self, types, ids_only=False, id_pool=None):
         """SQL-specific implementation of DAO's _do_get_all_of_type."""
@@ -576,16 +1562,18 @@ class RecordDAO(dao.RecordDAO):
         else:
             filter_func = schema.Record.type.in_
 
-        query = (self.session.query(schema.Record.id)
-                 .filter(filter_func(types)))
-        if id_pool is not None:
-            query = query.filter(schema.Record.id.in_(id_pool))
+        with self._id_pool(id_pool) as in_pool:
+            query = (self.session.query(schema.Record.id)
+                     .filter(filter_func(types)))
+            if id_pool is not None:
+                query = query.filter(in_pool(schema.Record.id))
+            results = query.all()
 
         if ids_only:
-            for record_id in query.all():
+            for record_id in results:
                 yield str(record_id[0])
         else:
-            filtered_ids = (str(x[0]) for x in query.all())
+            filtered_ids = (str(x[0]) for x in results)
             for record in self.get(filtered_ids):
                 yield record
 
@@ -643,117 +1631,376 @@ class RecordDAO(dao.RecordDAO):
             for test_id in chunk:
                 yield test_id in actual_ids
 
-    # pylint: disable=too-many-locals
-    def _universal_query(self, universal_criteria, alias_dict=None):
+    @staticmethod
+    def _universal_filters(universal_criteria, alias_dict=None):
         """
-        Pull back all record ids fulfilling universal criteria.
+        Generate the filters on Record ids fulfilling universal criteria.
 
-        We do all criteria in a single query per table, as there's only one
-        possible universal query right now.
+        A datum can live in any of the DATA_TABLES (or several, if a curve set
+        and data "collide"), so we look through a UNION ALL of them. Every
+        exists() criterion is checked by a single subquery: each criterion
+        contributes the ids of Records with a datum by one of its names
+        (several, given an alias_dict), tagged with the criterion's index, and
+        a Record fulfills them all if it turns up for as many distinct indices
+        as there are criteria. not_(exists()) criteria are handled together as
+        the ids of Records having any of their names, which are excluded.
 
-        :param universal_criteria: List of tuples: (datum_name, UniversalCriteria)
+        :param universal_criteria: List of tuples: (datum_name, UniversalCriteria),
+                                   where the criteria may be negated.
         :param alias_dict: An alias dictionary to find differently named data across records
-        :return: generator of ids of Records fulfilling all criteria.
-        """
-        result_counts = defaultdict(set)
-        desired_names = [x[0] for x in universal_criteria]
-
-        if alias_dict:
-            temp = []
-            for name in desired_names:
-                temp += alias_dict.get(name, name)
-            desired_names = temp
-
-        LOGGER.info('Finding Records where data in %s exist', desired_names)
-        expected_result_count = len(universal_criteria)
-        for query_table in DATA_TABLES:
-            # OLD:
-            # We know that a single Record can never have more than one datum with
-            # a given name, so all we need to get is count.
-            # NOW (fixed bug):
-            # They can if curve set and data "collide"! We need to allow those.
-            query = (self.session.query(query_table.id, query_table.name)
-                     .filter(query_table.name.in_(desired_names)))
-            for id, found in query:
-                result_counts[id].add(found)
-        for entry, val in six.iteritems(result_counts):
-            if len(val) == expected_result_count and alias_dict is None:
-                yield entry
-
-            # alias dict can cause multiple data from same record to show up
-            # which gives a false positive. Statement below checks if data
-            # is from the same alias. E.g. id = 'shared_curve_set_and_matching_scalar_data'
-            # contains both "shared_scalar" and "test_data_5" from
-            # alias_dict = {"shared_scalar": ["test_data_1", "test_data_5"]}
-            elif len(val) == expected_result_count and alias_dict:
-                for _, aval in alias_dict.items():
-                    same_alias = 0
-                    for v in val:
-                        if v in aval:
-                            same_alias += 1
-                    if same_alias == 1:
-                        yield entry
+        :return: A list of filters for use on the Record table
+        """
+        def names_for(datum_name):
+            """Get every name a datum may go by."""
+            if alias_dict:
+                return alias_dict.get(datum_name, [datum_name])
+            return [datum_name]
+
+        required = [names_for(name) for name, criterion in universal_criteria
+                    if not isinstance(criterion, utils.Negation)]
+        forbidden = [alias for name, criterion in universal_criteria
+                     if isinstance(criterion, utils.Negation)
+                     for alias in names_for(name)]
+        LOGGER.info('Finding Records where data in %s exist and data in %s do not',
+                    required, forbidden)
+        filters = []
+        if required:
+            tagged_ids = sqlalchemy.union_all(*[
+                sqlalchemy.select(table.id, sqlalchemy.literal(index).label('criterion'))
+                .where(table.name.in_(names))
+                for index, names in enumerate(required) for table in DATA_TABLES]).subquery()
+            filters.append(schema.Record.id.in_(
+                sqlalchemy.select(tagged_ids.c.id)
+                .group_by(tagged_ids.c.id)
+                .having(sqlalchemy.func.count(sqlalchemy.distinct(tagged_ids.c.criterion))
+                        == len(required))))
+        if forbidden:
+            having_any = sqlalchemy.union_all(*[
+                sqlalchemy.select(table.id).where(table.name.in_(forbidden))
+                for table in DATA_TABLES]).subquery()
+            filters.append(schema.Record.id.notin_(sqlalchemy.select(having_any.c.id)))
+        return filters
+
+    def _can_query_concurrently(self):
+        """
+        Whether this DAO's queries can safely run on several threads at once.
+
+        Each thread gets a connection of its own (see _concurrent_dao()), so
+        an in-memory database, which exists only within its one connection,
+        can't be queried concurrently. Nor can one mid-transaction(), as the
+        other connections wouldn't see its uncommitted changes.
+
+        :returns: Whether the database lives outside this connection and no
+                  transaction() is in progress.
+        """
+        if self.session.info.get(IN_TRANSACTION):
+            return False
+        return self.session.get_bind().url.database not in (None, "", ":memory:")
+
+    @contextlib.contextmanager
+    def _concurrent_dao(self):
+        """
+        Provide a RecordDAO a single thread can query with while others query too.
+
+        SQLAlchemy sessions aren't threadsafe, so each gets its own, closed on exit.
+
+        :returns: (As a contextmanager) a RecordDAO on a new session bound to
+                  this one's engine.
+        """
+        session = sqlalchemy.orm.Session(bind=self.session.get_bind())
+        try:
+            yield RecordDAO(session=session)
+        finally:
+            session.close()
 
     # High arg count is inherent to the functionality.
     # pylint: disable=too-many-arguments
     def _find(self, types=None, data=None, file_uri=None,
               mimetype=None, id_pool=None, ids_only=False,
-              query_order=("data", "file_uri", "mimetype", "types"), alias_dict=None):
-        """Implement cross-backend logic for the DataStore method of the same name."""
-        try:
+              query_order=dao.DEFAULT_QUERY_ORDER, alias_dict=None, concurrent=False,
+              lazy=False,
+              sections=None, order_by=None, descending=False, limit=None, after=None):
+        """
+        Implement cross-backend logic for the DataStore method of the same name.
+
+        Rather than running a query per criterion and feeding each one's ids
+        into the next, the criteria are compiled into a single statement (see
+        _compile_find()) and the database does the intersection, so
+        query_order doesn't apply. If concurrent, the queries are instead run
+        side by side on separate connections (see dao.RecordDAO._find_concurrently()).
+        Ordered and paged finds are left to _find_sorted().
+        """
+        if self._sort_order(order_by, descending, limit, after) is not None:
             return super(RecordDAO, self)._find(types=types, data=data, file_uri=file_uri,
                                                 mimetype=mimetype, id_pool=id_pool,
                                                 ids_only=ids_only, query_order=query_order,
-                                                alias_dict=alias_dict)
-        # We may have issues when too many ids are returned due to the (compile time)
-        # limit on variables, as IN counts every id as a variable. If so, use an
-        # alternate form of query.
+                                                alias_dict=alias_dict, concurrent=concurrent,
+                                                lazy=lazy, sections=sections,
+                                                order_by=order_by, descending=descending,
+                                                limit=limit, after=after)
+        if all((x is None for x in [types, data, file_uri, mimetype])):
+            return super(RecordDAO, self)._find(id_pool=id_pool, ids_only=ids_only, lazy=lazy,
+                                                sections=sections)
+        if concurrent:
+            return super(RecordDAO, self)._find(types=types, data=data, file_uri=file_uri,
+                                                mimetype=mimetype, id_pool=id_pool,
+                                                ids_only=ids_only, query_order=query_order,
+                                                alias_dict=alias_dict, concurrent=True,
+                                                lazy=lazy, sections=sections)
+        if sections is not None and not ids_only:
+            # Find the ids, then fetch just the sections asked for
+            return self._get_found(list(self._find(types=types, data=data, file_uri=file_uri,
+                                                   mimetype=mimetype, id_pool=id_pool,
+                                                   ids_only=True, alias_dict=alias_dict)),
+                                   sections=sections)
+        if id_pool is not None:
+            id_pool = list(id_pool)  # safety cast for gens
+        try:
+            filters = self._compile_find(types=types, data=data, file_uri=file_uri,
+                                         mimetype=mimetype, alias_dict=alias_dict)
+            large_pool = id_pool is not None and len(id_pool) > ID_POOL_TABLE_THRESHOLD
+            columns = [schema.Record.id]
+            if not ids_only and not large_pool:
+                columns += [schema.Record.type, schema.Record.raw]
+            with self._id_pool(id_pool) as in_pool:
+                if id_pool is not None:
+                    filters.append(in_pool(schema.Record.id))
+                results = self.session.execute(sqlalchemy.select(*columns).where(*filters))
+                if large_pool:
+                    # The pool's table is about to be dropped, so we can't stream.
+                    # Only the ids are held; the Records are then fetched a chunk at a time.
+                    results = results.all()
+        # A database may still refuse a statement it finds too complex. If so,
+        # use an alternate form of query.
         except OperationalError:
             return self._find_with_manual_intersection(types=types, data=data, file_uri=file_uri,
                                                        mimetype=mimetype, id_pool=id_pool,
                                                        ids_only=ids_only,
-                                                       query_order=query_order)
+                                                       alias_dict=alias_dict, lazy=lazy,
+                                                       sections=sections)
+        if large_pool and not ids_only:
+            return self._get_found([str(x[0]) for x in results], lazy=lazy)
+        return self._found_from_rows(results, ids_only=ids_only, lazy=lazy)
+
+    @staticmethod
+    def _found_from_rows(rows, ids_only=False, lazy=False):
+        """
+        Turn the rows a find() statement returned into what find() returns.
+
+        :param rows: An iterable of (id,) rows if ids_only, else (id, type, raw) rows
+        :param ids_only: As in find()
+        :param lazy: As in find()
+        :returns: A generator of ids, LazyRecords or Records
+        """
+        if ids_only:
+            return (str(x[0]) for x in rows)
+        if lazy:
+            return (model.LazyRecord(_to_json_string(x[2]), id=str(x[0]), type=x[1])
+                    for x in rows)
+        return (model.generate_record_from_json(json_input=_json_loads(x[2])) for x in rows)
+
+    # pylint: disable=too-many-arguments,too-many-locals
+    def _find_sorted(self, criteria, order_by, descending=False, limit=None, after=None,
+                     id_pool=None, ids_only=False, lazy=False, sections=None):
+        """
+        Perform a find() whose results are ordered, and possibly paged.
+
+        The ordering, cursor and limit are compiled into the find()'s statement
+        (see _compile_find()), so only the page's rows are read and
+        transferred. Ordering by a datum takes a statement per table it might
+        be in, scalars before strings (or after, if descending); the second
+        only runs if the first doesn't fill the page.
+
+        See dao.RecordDAO._find_sorted() for the parameters.
+        """
+        if sections is not None and not ids_only:
+            page = list(self._find_sorted(criteria, order_by, descending=descending, limit=limit,
+                                          after=after, id_pool=id_pool, ids_only=True))
+            return self._get_found_in_order(page, sections=sections)
+        LOGGER.debug('Performing a find() ordered by %s (descending: %s), limit %s, after %s',
+                     order_by, descending, limit, after)
+        segments = self._sort_segments(order_by, descending, after)
+        if id_pool is not None:
+            id_pool = list(id_pool)  # safety cast for gens
+        id_column = self._id_order_column()
+        columns = [schema.Record.id]
+        if not ids_only:
+            columns += [schema.Record.type, schema.Record.raw]
+        rows = []
+        try:
+            filters = self._compile_find(types=criteria["types"], data=criteria["data"],
+                                         file_uri=criteria["file_uri"],
+                                         mimetype=criteria["mimetype"],
+                                         alias_dict=criteria["alias_dict"])
+            with self._id_pool(id_pool) as in_pool:
+                if id_pool is not None:
+                    filters.append(in_pool(schema.Record.id))
+                for table, cursor in segments:
+                    if limit is not None and len(rows) >= limit:
+                        break
+                    statement = sqlalchemy.select(*columns).where(*filters)
+                    if table is None:
+                        order = [id_column]
+                        if after is not None:
+                            statement = statement.where(
+                                id_column < after if descending else id_column > after)
+                    else:
+                        statement = statement.join(table, sqlalchemy.and_(
+                            table.id == schema.Record.id, table.name == order_by))
+                        order = [table.value, id_column]
+                        if cursor is not None:
+                            statement = statement.where(self._keyset_filter(
+                                table.value, id_column, cursor, after, descending))
+                    statement = statement.order_by(*[x.desc() if descending else x
+                                                     for x in order])
+                    if limit is not None:
+                        statement = statement.limit(limit - len(rows))
+                    rows += self.session.execute(statement).all()
+        except OperationalError:
+            # As in _find(), fall back on queries the database will accept
+            return super(RecordDAO, self)._find_sorted(criteria, order_by,
+                                                       descending=descending, limit=limit,
+                                                       after=after, id_pool=id_pool,
+                                                       ids_only=ids_only, lazy=lazy)
+        return self._found_from_rows(rows, ids_only=ids_only, lazy=lazy)
+
+    @staticmethod
+    def _keyset_filter(value_column, id_column, value, id, descending):
+        """
+        Create a filter for the rows that sort after a cursor, ordering by (value, id).
+
+        :param value_column: The column holding the value ordered by
+        :param id_column: The column holding the Record id
+        :param value: The cursor's value
+        :param id: The cursor's Record id
+        :param descending: Whether rows are ordered in descending order
+        :returns: A filter expression
+        """
+        if descending:
+            return sqlalchemy.or_(value_column < value,
+                                  sqlalchemy.and_(value_column == value, id_column < id))
+        return sqlalchemy.or_(value_column > value,
+                              sqlalchemy.and_(value_column == value, id_column > id))
+
+    def _sort_segments(self, order_by, descending, after):
+        """
+        Work out which tables an ordered find() reads its sort keys from, in turn.
+
+        :param order_by: "id", or the name of a scalar or string datum
+        :param descending: As in find()
+        :param after: As in find()
+        :returns: A list of (<table, or None for Record's id>, <cursor value>)
+                  pairs, in the order they're to be read. The cursor value is
+                  that of the Record with id after, if it's in that table, else None.
+        :raises ValueError: if ordering by a datum and the Record with id after
+                            doesn't have it.
+        """
+        if order_by == "id":
+            return [(None, None)]
+        tables = [schema.ScalarData, schema.StringData]
+        if descending:
+            tables.reverse()
+        if after is None:
+            return [(table, None) for table in tables]
+        for index, table in enumerate(tables):
+            value = self.session.execute(sqlalchemy.select(table.value)
+                                         .where(table.id == after,
+                                                table.name == order_by)).scalar()
+            if value is not None:
+                return [(table, value)] + [(x, None) for x in tables[index + 1:]]
+        raise ValueError("No Record with id {} and a scalar or string {} to continue after"
+                         .format(after, order_by))
+
+    def _id_order_column(self):
+        """
+        Give the column to order Record ids by, so they sort as Python sorts strings.
+
+        :returns: Record's id column, cast to binary for MySQL
+        """
+        order = schema.Record.id
+        if self.session.get_bind().dialect.name == "mysql":
+            # MySQL's default collations ignore case; Python compares code points
+            order = sqlalchemy.cast(order, sqlalchemy.dialects.mysql.BINARY())
+        return order
+
+    def _compile_find(self, types=None, data=None, file_uri=None,
+                      mimetype=None, alias_dict=None):
+        """
+        Compile find() criteria into the filters of a single statement on Record.
+
+        Each family of criteria becomes a semi-join (id IN (subquery)) or, for
+        types, a plain filter, so a Record is only ever returned once. Any
+        id_pool is left to the caller (see _id_pool()).
+
+        :returns: A list of filters on the Record table
+        """
+        filters = []
+        if data is not None:
+            filters += self._compile_data_criteria(dict(data), alias_dict)
+        if file_uri is not None:
+            if isinstance(file_uri, utils.StringListCriteria):
+                if file_uri.operation == utils.ListQueryOperation.HAS_ANY:
+                    uri_query = self._build_query_given_uri_has_any(file_uri.value)
+                else:
+                    uri_query = self._build_query_given_uri_has_all(file_uri.value)
+            else:
+                uri_query = self._build_query_given_uri_has_any([file_uri])
+            filters.append(self._semi_join(uri_query))
+        if mimetype is not None:
+            filters.append(self._semi_join(self.session.query(schema.Document.id)
+                                           .filter(schema.Document.mimetype == mimetype)))
+        if types is not None:
+            if isinstance(types, utils.Negation):
+                filters.append(schema.Record.type.notin_(self._ensure_is_list(types.arg)))
+            else:
+                filters.append(schema.Record.type.in_(self._ensure_is_list(types)))
+        return filters
+
+    @staticmethod
+    def _semi_join(query):
+        """
+        Create a filter restricting Records to those whose ids a query returns.
+
+        :param query: A query whose first column is a Record id
+        :returns: A filter expression for use on the Record table
+        """
+        sub_query = query.subquery()
+        return schema.Record.id.in_(sqlalchemy.select(list(sub_query.c)[0]))
+
+    def _run_ordered_find_query(self, query_type, arg, alias_dict=None):
+        """
+        Run one of find()'s queries, streaming the ids of matches in ascending order.
+
+        See _stream() for how the rows are fetched.
+
+        :param query_type: The name of the query, as in dao.DEFAULT_QUERY_ORDER
+        :param arg: The criterion to pass it
+        :param alias_dict: As in find(), used by the data query
+        :returns: A generator of the ids of matching Records, ordered as Python
+                  orders strings
+        """
+        criterion = dict(arg) if query_type == "data" else arg
+        filters = self._compile_find(alias_dict=alias_dict, **{query_type: criterion})
+        statement = (sqlalchemy.select(schema.Record.id).where(*filters)
+                     .order_by(self._id_order_column()))
+        for row in self._stream(statement):
+            yield str(row[0])
 
     # pylint: disable=too-many-arguments
     def _find_with_manual_intersection(self, types=None, data=None, file_uri=None,
                                        mimetype=None, id_pool=None, ids_only=False,
-                                       query_order=("data", "file_uri", "mimetype", "types"),
-                                       alias_dict=None):
+                                       alias_dict=None, lazy=False, sections=None):
         """
-        Perform a _find() that uses id_pool intersection.
+        Perform a _find() that intersects each query's results in Python.
 
-        Provided as a workaround for large id_pools potentially tripping the compile
-        time SQL limit on maximum variables in a query.
+        Provided as a workaround for databases refusing the single statement
+        _find() would otherwise compile. Each query is run on its own, in id
+        order, and the results are merged as they stream in (see
+        dao.RecordDAO._find_ordered()).
         """
-        if id_pool is not None:
-            id_pool = set(id_pool)
-        # Note, same map as in dao.py's _find().
-        query_map = {"data": (self._do_data_query, data),
-                     "file_uri": (self._do_get_given_document_uri, file_uri),
-                     "mimetype": (self.get_with_mime_type, mimetype),
-                     "types": (self.get_all_of_type, types)}
-
-        def get_id_set_from_query_type(query_type):
-            """Get ids for a single query."""
-            query_func, arg = query_map[query_type]
-            if arg is not None:
-                if query_type == "data":
-                    return query_func(arg, id_pool=id_pool, alias_dict=alias_dict)
-                return query_func(arg,  # pylint: disable=unexpected-keyword-arg
-                                  id_pool=id_pool,
-                                  ids_only=True)
-            return None
-
-        individual_pools = [get_id_set_from_query_type(x) for x in query_order]
-        for individual_pool in individual_pools:
-            if individual_pool is None:  # the query wasn't invoked
-                continue
-            if id_pool is None:  # first invoked query, no id_pool arg
-                id_pool = set(individual_pool)
-            else:
-                id_pool = id_pool.intersection(individual_pool)
-        # Let the DAO handle the logic of returning in the proper format.
-        return super(RecordDAO, self)._find(id_pool=id_pool, ids_only=ids_only)
+        args = {"data": data, "file_uri": file_uri, "mimetype": mimetype, "types": types}
+        return self._find_ordered(args, id_pool=id_pool, ids_only=ids_only,
+                                  alias_dict=alias_dict, lazy=lazy, sections=sections)
 
     def get_available_types(self):
         """
@@ -761,6 +2008,10 @@ class RecordDAO(dao.RecordDAO):
 
         :returns: A list of types present (ex: ["run", "experiment"])
         """
+        if self._has_catalog():
+            catalog = schema.DataCatalog
+            return [entry[0] for entry in self.session.execute(
+                sqlalchemy.select(catalog.type).where(catalog.kind == 'record'))]
         results = self.session.query(schema.Record.type).distinct().all()
         return [entry[0] for entry in results]
 
@@ -770,6 +2021,10 @@ class RecordDAO(dao.RecordDAO):
 
         :returns: An iterable of curve set names.
         """
+        if self._has_catalog():
+            catalog = schema.DataCatalog
+            return [x[0] for x in self.session.execute(
+                sqlalchemy.select(catalog.name).where(catalog.kind == 'curve_set').distinct())]
         return list(x[0] for x in self.session.query(schema.CurveSetMeta.name)
                     .distinct().all())
 
@@ -801,13 +2056,16 @@ class RecordDAO(dao.RecordDAO):
         if not set(data_types).issubset(set(possible_data_types)):
             raise ValueError('Only select data types from: %s' % possible_data_types)
 
+        if self._has_catalog():
+            for name in self._catalog_data_names(record_type, data_types, filter_constants):
+                yield name
+            return
+
         query_tables = [type_name_to_tables[type] for type in data_types]
 
         for query_table in query_tables:
             if filter_constants and query_table in (schema.ScalarData, schema.StringData):
-                results = (self.session.query(query_table.name).join(schema.Record)
-                           .filter(schema.Record.type == record_type).group_by(query_table.name)
-                           .having(sqlalchemy.func.count(query_table.value.distinct()).__gt__(1)))
+                results = self._non_constant_names(query_table, record_type)
             else:
                 results = (self.session.query(query_table.name).join(schema.Record)
                            .filter(schema.Record.type == record_type)
@@ -815,6 +2073,58 @@ class RecordDAO(dao.RecordDAO):
             for result in results:
                 yield result[0]
 
+    def _non_constant_names(self, table, record_type, names=None):
+        """
+        Query the names of scalar or string data whose values vary across Records of a type.
+
+        :param table: ScalarData or StringData
+        :param record_type: The type of Record to check the data of
+        :param names: The names to check, None for all
+        :returns: A query for the names (as 1-tuples)
+        """
+        query = (self.session.query(table.name).join(schema.Record)
+                 .filter(schema.Record.type == record_type))
+        if names is not None:
+            query = query.filter(table.name.in_(names))
+        return (query.group_by(table.name)
+                .having(sqlalchemy.func.count(table.value.distinct()).__gt__(1)))
+
+    def _catalog_data_names(self, record_type, data_types, filter_constants):
+        """
+        Perform data_names() from the DataCatalog.
+
+        Scalars and strings with one distinct value are constant. Past
+        removals may have left an entry counting values that are gone, so
+        stale entries with several are checked against their table.
+
+        :param record_type: Type of records to get data names for.
+        :param data_types: A list of the data types to get the data names for.
+        :param filter_constants: Whether to filter out constant scalars and strings
+        :returns: A generator of data names.
+        """
+        catalog = schema.DataCatalog
+        names = defaultdict(list)
+        to_check = defaultdict(list)
+        for name, kind, distinct, stale in self.session.execute(
+                sqlalchemy.select(catalog.name, catalog.kind, catalog.distinct_values,
+                                  catalog.stale)
+                .where(catalog.type == record_type, catalog.kind.in_(data_types))):
+            if filter_constants and kind in SKETCHED_KINDS:
+                if distinct <= 1:
+                    continue
+                if stale:
+                    to_check[kind].append(name)
+                    continue
+            names[kind].append(name)
+        for kind in data_types:
+            for name in names[kind]:
+                yield name
+            for chunk_start in range(0, len(to_check[kind]), CHUNK_SIZE):
+                for result in self._non_constant_names(
+                        CATALOG_TABLES[kind], record_type,
+                        to_check[kind][chunk_start:chunk_start + CHUNK_SIZE]):
+                    yield result[0]
+
     def _build_query_given_uri_has_any(self, uri_list):
         """Perform get_given_document_uri when we have a has_any criterion."""
         query = self.session.query(schema.Document.id)
@@ -869,14 +2179,15 @@ class RecordDAO(dao.RecordDAO):
         else:
             # Logic is identical for the case of just one uri
             query = self._build_query_given_uri_has_any([uri])
-        if id_pool is not None:
-            query = query.filter(schema.Document
-                                 .id.in_(id_pool))
+        with self._id_pool(id_pool) as in_pool:
+            if id_pool is not None:
+                query = query.filter(in_pool(schema.Document.id))
+            results = query.all()
         if ids_only:
-            for record_id in query.all():
+            for record_id in results:
                 yield record_id[0]
         else:
-            filtered_ids = (x[0] for x in query.all())
+            filtered_ids = (x[0] for x in results)
             for record in self.get(filtered_ids):
                 yield record
 
@@ -961,25 +2272,195 @@ class RecordDAO(dao.RecordDAO):
                      'record ids in {}'.format(id_list) if id_list is not None else "all records")
         data = defaultdict(lambda: defaultdict(dict))
         query_tables = [schema.ScalarData, schema.StringData]
-        for query_table in query_tables:
-            query = (self.session.query(query_table.id,
-                                        query_table.name,
-                                        query_table.value,
-                                        query_table.units,
-                                        query_table.tags)
-                     .filter(query_table.name.in_(data_list)))
-            if id_list is not None:
-                query = query.filter(query_table.id.in_(id_list))
-            for result in query:
-                datapoint = {"value": result.value}
-                if result.units:
-                    datapoint["units"] = result.units
-                if result.tags:
-                    # Convert from string to ks
-                    datapoint["tags"] = _json_loads(result.tags)
-                data[result.id][result.name] = datapoint
+        with self._id_pool(id_list) as in_pool:
+            for query_table in query_tables:
+                query = (self.session.query(query_table.id,
+                                            query_table.name,
+                                            query_table.value,
+                                            query_table.units,
+                                            query_table.tags)
+                         .filter(query_table.name.in_(data_list)))
+                if id_list is not None:
+                    query = query.filter(in_pool(query_table.id))
+                for result in query:
+                    datapoint = {"value": result.value}
+                    if result.units:
+                        datapoint["units"] = result.units
+                    if result.tags:
+                        # Convert from string to ks
+                        datapoint["tags"] = _json_loads(result.tags)
+                    data[result.id][result.name] = datapoint
         return data
 
+    def _get_data_columns(self, data_list, id_list=None):
+        """
+        Find the values for get_data_columns() as plain lists.
+
+        The scalar and string data are pivoted into columns by the database:
+        each group of up to PIVOT_NAME_LIMIT names is one query over the union
+        of the data tables, grouped by Record, with a column per name per kind
+        of value. List data is only flagged by the pivot, its values being read
+        from the data sections of just those Records that have it.
+
+        :param data_list: A list of the names of data fields to find
+        :param id_list: A list of unique record ids to find data for, None for
+                        all Records having any of the data.
+        :returns: A tuple of a list of the Records' ids and an OrderedDict of
+                  {<datum name>: <list of values aligned to them, None where missing>}
+        """
+        names = list(OrderedDict.fromkeys(data_list))
+        found = defaultdict(lambda: [None] * len(names))
+        has_lists = defaultdict(list)
+        with self._id_pool(id_list) as in_pool:
+            for group_start in range(0, len(names), PIVOT_NAME_LIMIT):
+                group = names[group_start:group_start + PIVOT_NAME_LIMIT]
+                statement = self._pivot_data(group, in_pool)
+                for row in self.session.execute(
+                        statement.execution_options(yield_per=CHUNK_SIZE)):
+                    values = found[row[0]]
+                    for offset, name in enumerate(group):
+                        scalar, string, is_list = row[1 + 3 * offset:4 + 3 * offset]
+                        if is_list:
+                            has_lists[row[0]].append(group_start + offset)
+                        else:
+                            values[group_start + offset] = (scalar if scalar is not None
+                                                            else string)
+        list_ids = list(has_lists)
+        for rows in self._get_section_chunks(list_ids, CHUNK_SIZE, ("data",)):
+            for id, _, contents in rows:
+                for index in has_lists[id]:
+                    found[id][index] = contents["data"][names[index]]["value"]
+        ids = id_list if id_list is not None else sorted(found)
+        missing = [None] * len(names)
+        rows = [found[id] if id in found else missing for id in ids]
+        return ids, OrderedDict((name, [row[index] for row in rows])
+                                for index, name in enumerate(names))
+
+    @staticmethod
+    def _pivot_data(names, in_pool=None):
+        """
+        Build the statement _get_data_columns() pivots a group of names with.
+
+        :param names: The data names to make columns for
+        :param in_pool: A filter restricting a column of ids to a pool (see
+                        _id_pool()), or None to consider all Records
+        :returns: A select of the Record id, then, for each name, the scalar
+                  value, the string value, and whether it's list data.
+        """
+        null = sqlalchemy.null()
+        kinds = [(schema.ScalarData, schema.ScalarData.value, null, 0),
+                 (schema.StringData, null, schema.StringData.value, 0),
+                 (schema.ListScalarData, null, null, 1),
+                 (schema.ListStringDataEntry, null, null, 1)]
+        parts = []
+        for table, scalar, string, is_list in kinds:
+            part = (sqlalchemy.select(table.id.label('id'),
+                                      table.name.label('name'),
+                                      scalar.label('scalar'),
+                                      string.label('string'),
+                                      sqlalchemy.literal(is_list).label('is_list'))
+                    .where(table.name.in_(names)))
+            if in_pool is not None:
+                part = part.where(in_pool(table.id))
+            parts.append(part)
+        data = sqlalchemy.union_all(*parts).subquery()
+        columns = []
+        for name in names:
+            matches = data.c.name == name
+            columns.extend(sqlalchemy.func.max(sqlalchemy.case((matches, column)))
+                           for column in (data.c.scalar, data.c.string, data.c.is_list))
+        return sqlalchemy.select(data.c.id, *columns).group_by(data.c.id)
+
+    # pylint: disable=too-many-arguments,too-many-locals
+    def _aggregate(self, scalar, ops, bins, group_by, types=None, data=None):
+        """
+        Compute the statistics for aggregate() in the database.
+
+        One GROUP BY query over the scalar's ScalarData rows (joined to Record
+        for any criteria, and to the grouping StringData) gets each group's
+        count, min, max and sum. The standard deviation, if wanted, comes from
+        a second, which joins each value to its group's mean (found in a
+        subquery) to sum the squares of their differences. The histogram, if
+        wanted, is another, grouping by bin too, where each value's bin is
+        found by a CASE over the bins' edges. Only the aggregates are returned
+        by the database.
+
+        :param scalar: The name of the scalar datum to aggregate
+        :param ops: A list of the statistics to compute
+        :param bins: The number of histogram bins, or a list of their edges
+        :param group_by: As in aggregate()
+        :param types: As in find()
+        :param data: As in find()
+        :returns: A dictionary of {<group>: <statistics>}, with None the sole
+                  group when not grouping (whether or not any values are found)
+        """
+        value = schema.ScalarData.value
+        filters = self._compile_find(types=types, data=data)
+        grouping = sqlalchemy.orm.aliased(schema.StringData)
+        if group_by is None:
+            keys = []
+        elif group_by == "type":
+            keys = [schema.Record.type]
+        else:
+            keys = [grouping.value]
+
+        def aggregate_select(*columns):
+            """Select columns aggregated over the scalar's values, per group."""
+            statement = (sqlalchemy.select(*(keys + list(columns)))
+                         .select_from(schema.ScalarData)
+                         .where(schema.ScalarData.name == scalar))
+            if filters or group_by == "type":
+                statement = (statement
+                             .join(schema.Record, schema.Record.id == schema.ScalarData.id)
+                             .where(*filters))
+            if keys and group_by != "type":
+                statement = statement.outerjoin(
+                    grouping, sqlalchemy.and_(grouping.id == schema.ScalarData.id,
+                                              grouping.name == group_by))
+            return statement
+
+        func = sqlalchemy.func
+        squared_deviations = {}
+        if "std" in ops:
+            means = (aggregate_select(func.avg(value).label('mean'))
+                     .add_columns(*[key.label('key_{}'.format(index))
+                                    for index, key in enumerate(keys)])
+                     .group_by(*keys).subquery())
+            deviation = value - means.c.mean
+            statement = (aggregate_select(func.sum(deviation * deviation))
+                         .join(means, sqlalchemy.and_(
+                             sqlalchemy.true(),
+                             *[key.is_not_distinct_from(means.c['key_{}'.format(index)])
+                               for index, key in enumerate(keys)]))
+                         .group_by(*keys))
+            for row in self.session.execute(statement):
+                squared_deviations[row[0] if keys else None] = row[-1]
+        groups = {}
+        ranges = {}
+        for row in self.session.execute(aggregate_select(func.count(value), func.min(value),
+                                                         func.max(value), func.sum(value))
+                                        .group_by(*keys)):
+            key = row[0] if keys else None
+            ranges[key] = (row[-4], row[-3], row[-2])
+            groups[key] = self._summarize(ops, row[-4], row[-3], row[-2], row[-1] or 0,
+                                          squared_deviations.get(key) or 0)
+        if "histogram" not in ops:
+            return groups
+        present = [x for x in ranges.values() if x[0]]
+        edges = self._histogram_edges(bins, min((x[1] for x in present), default=None),
+                                      max((x[2] for x in present), default=None))
+        for stats in groups.values():
+            stats["histogram"] = {"counts": [0] * (len(edges) - 1), "edges": edges}
+        # Values equal to the last edge fall through to the last bin
+        bucket = sqlalchemy.case(*[(value < edge, index) for index, edge in enumerate(edges[1:])],
+                                 else_=len(edges) - 2)
+        statement = (aggregate_select(bucket, func.count())
+                     .where(value >= edges[0], value <= edges[-1])
+                     .group_by(*(keys + [bucket])))
+        for row in self.session.execute(statement):
+            groups[row[0] if keys else None]["histogram"]["counts"][row[-2]] = row[-1]
+        return groups
+
     def get_scalars(self, id, scalar_names):
         """
         LEGACY: retrieve scalars for a given record id.
@@ -1027,12 +2508,13 @@ class RecordDAO(dao.RecordDAO):
 
         :returns: Record object or IDs fitting the criteria.
         """
-        query_set = (self.session.query(schema.Document.id)
-                     .filter(schema.Document.mimetype == mimetype))
-        if id_pool is not None:
-            query_set = query_set.filter(schema.Document.id.in_(id_pool))
-        ids = (x[0] for x in query_set)
-        return ids if ids_only else self.get(ids)
+        with self._id_pool(id_pool) as in_pool:
+            query_set = (self.session.query(schema.Document.id)
+                         .filter(schema.Document.mimetype == mimetype))
+            if id_pool is not None:
+                query_set = query_set.filter(in_pool(schema.Document.id))
+            ids = [x[0] for x in query_set]
+        return (x for x in ids) if ids_only else self.get(ids)
 
 
 class RelationshipDAO(dao.RelationshipDAO):
@@ -1143,11 +2625,9 @@ class DAOFactory(dao.DAOFactory):
             if '://' not in db_path:
                 connection_string = SQLITE_PREFIX + db_path
                 create_db = not os.path.exists(db_path)
-                use_sqlite = True
             else:
                 connection_string = db_path
                 create_db = True
-                use_sqlite = False
             if allow_connection_pooling:
                 engine = sqlalchemy.create_engine(connection_string)
             else:
@@ -1155,19 +2635,25 @@ class DAOFactory(dao.DAOFactory):
                                                   poolclass=NullPool)
         else:
             engine = sqlalchemy.create_engine(SQLITE_PREFIX)
-            use_sqlite = True
             create_db = True
 
+        # SQLite may also be given as a URL (sqlite:///...)
+        use_sqlite = engine.dialect.name == "sqlite"
+        self.use_sqlite = use_sqlite
+        # Extra pragmas to apply to new SQLite connections; see bulk_load()
+        self._connection_pragmas = {}
         if use_sqlite:
             def configure_on_connect(connection, _):
-                """Activate foreign key support on connection creation."""
+                """Activate foreign key support (and any others) on connection creation."""
                 connection.execute('pragma foreign_keys=ON')
+                for pragma, value in self._connection_pragmas.items():
+                    connection.execute('pragma {}={}'.format(pragma, value))
 
             sqlalchemy.event.listen(engine, 'connect',
                                     configure_on_connect)
 
         if create_db:
-            schema.Base.metadata.create_all(engine)
+            schema.Base.metadata.create_all(engine, tables=self._schema_tables())
 
         session = sqlalchemy.orm.sessionmaker(bind=engine)
         self.session = session()
@@ -1188,6 +2674,227 @@ class DAOFactory(dao.DAOFactory):
         """
         return RelationshipDAO(session=self.session)
 
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Group every write made within a with block into a single transaction.
+
+        Writes made through this factory's DAOs inside the block are not
+        committed individually; they're committed together when the block
+        exits, or all rolled back if it raises. Batched inserts within the
+        block likewise don't commit between batches (though they still release
+        memory between them). Nested blocks join the outermost one.
+
+        Each DAO call within the block runs in a savepoint, so one that fails
+        leaves none of its writes behind, and if the error is caught, the
+        block's other writes can still be committed.
+        """
+        if self.session.info.get(IN_TRANSACTION):
+            yield
+            return
+        self.session.info[IN_TRANSACTION] = True
+        try:
+            if self.use_sqlite:
+                # pysqlite only begins a transaction at the first write, and a
+                # savepoint isn't one; without one begun, releasing it commits.
+                connection = self.session.connection()
+                if not connection.connection.dbapi_connection.in_transaction:
+                    connection.exec_driver_sql('BEGIN')
+            yield
+            self.session.commit()
+        # need to roll back on anything, so use bare except
+        except:  # noqa: E722
+            self.session.rollback()
+            raise
+        finally:
+            self.session.info.pop(IN_TRANSACTION, None)
+
+    @contextlib.contextmanager
+    def bulk_load(self):
+        """
+        Tune a SQLite database for a large ingest for the duration of a with block.
+
+        On entry, the secondary (non-primary-key) indexes are dropped and every
+        connection is switched to relaxed syncing with a larger page cache (see
+        BULK_LOAD_PRAGMAS). On exit, even if the block raised, the indexes
+        are rebuilt, ANALYZE is run, and the pragmas are reset (for a file
+        database, by replacing its pooled connections). The journal mode is
+        left alone, since WAL doesn't work on the network filesystems many
+        databases live on.
+
+        Syncing being off means a crash (of the machine, not Python) mid-load can
+        corrupt the database, so this is best used for loads that can be rerun.
+        SQLite databases are tuned whether opened by path or by sqlite:// URL;
+        others are left untouched.
+        """
+        if not self.use_sqlite:
+            LOGGER.warning('bulk_load() only tunes SQLite databases; %s is unchanged.', self)
+            yield
+            return
+        self.session.commit()
+        connection = self.session.connection()
+        previous_pragmas = {pragma: connection.exec_driver_sql('pragma {}'.format(pragma)).scalar()
+                            for pragma in BULK_LOAD_PRAGMAS}
+        self._set_pragmas(connection, BULK_LOAD_PRAGMAS)
+        self._connection_pragmas = BULK_LOAD_PRAGMAS
+        dropped_indexes = []
+        try:
+            inspector = sqlalchemy.inspect(connection)
+            existing = set(index['name'] for table in schema.Base.metadata.sorted_tables
+                           if inspector.has_table(table.name)
+                           for index in inspector.get_indexes(table.name))
+            for table in schema.Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    if index.name in existing:
+                        LOGGER.debug('Dropping index %s for bulk load.', index.name)
+                        index.drop(bind=connection)
+                        dropped_indexes.append(index)
+            self.session.commit()
+            yield
+        finally:
+            self.session.rollback()
+            connection = self.session.connection()
+            for index in dropped_indexes:
+                LOGGER.debug('Rebuilding index %s.', index.name)
+                index.create(bind=connection)
+            connection.exec_driver_sql('ANALYZE')
+            self.session.commit()
+            self._connection_pragmas = {}
+            if self.db_path and self.db_path != ":memory:":
+                # Pooled connections opened during the block (ex: by concurrent
+                # find()s) have the pragmas too, so replace them all with new ones
+                self.session.get_bind().dispose()
+            else:
+                # An in-memory database lives only in its connection, so it's kept
+                self._set_pragmas(self.session.connection(), previous_pragmas)
+
+    def upgrade_schema(self, store_sections=False):
+        """
+        Bring an existing database up to date with the current schema.
+
+        Any missing tables (besides the OPTIONAL_TABLES) and indexes are
+        created and any indexes superseded by newer ones (see
+        schema.SUPERSEDED_INDEXES) are dropped, all in place. If the
+        RecordSection table is created, it's filled in from the Records' raws
+        (see _fill_sections()), and if the DataCatalog table is, it's built
+        (see rebuild_catalog()); no other data is touched. Safe to run more
+        than once. On a large database, building the indexes (and sections, and
+        catalog) can take a while.
+
+        :param store_sections: Whether to also create the RecordSection table,
+                               if missing. From then on, every write to the
+                               database stores Records' sections alongside their
+                               raws, so that fetching only some sections (see
+                               RecordDAO.get()) needn't transfer and parse whole
+                               raws, at the cost of storing each Record's JSON
+                               twice.
+        :returns: a tuple of (names of the tables and indexes created, names of
+                  the indexes dropped)
+        """
+        self.session.commit()
+        connection = self.session.connection()
+        inspector = sqlalchemy.inspect(connection)
+        optional = [schema.RecordSection.__table__] if store_sections else []
+        tables = [table for table in schema.Base.metadata.sorted_tables
+                  if inspector.has_table(table.name)
+                  or table in self._schema_tables(optional)]
+        created = [table.name for table in tables if not inspector.has_table(table.name)]
+        schema.Base.metadata.create_all(connection, tables=tables)
+        inspector = sqlalchemy.inspect(connection)
+        quote = connection.dialect.identifier_preparer.quote
+        dropped = []
+        if schema.RecordSection.__tablename__ in created:
+            self._fill_sections(connection)
+        # Any DAOs on this session may have found the tables missing
+        self.session.info.pop(HAS_SECTIONS, None)
+        self.session.info.pop(HAS_CATALOG, None)
+        if schema.DataCatalog.__tablename__ in created:
+            # pylint: disable=protected-access
+            RecordDAO(session=self.session)._rebuild_catalog_no_commit()
+        for table in tables:
+            existing = set(index['name'] for index in inspector.get_indexes(table.name))
+            for name in schema.SUPERSEDED_INDEXES.get(table.name, []):
+                if name in existing:
+                    LOGGER.info('Dropping superseded index %s.', name)
+                    if connection.dialect.name == 'mysql':
+                        statement = 'DROP INDEX {} ON {}'.format(quote(name), quote(table.name))
+                    else:
+                        statement = 'DROP INDEX {}'.format(quote(name))
+                    connection.execute(sqlalchemy.text(statement))
+                    dropped.append(name)
+            for index in table.indexes:
+                if index.name not in existing:
+                    LOGGER.info('Building index %s.', index.name)
+                    index.create(bind=connection)
+                    created.append(index.name)
+        if created and self.use_sqlite:
+            connection.exec_driver_sql('ANALYZE')
+        self.session.commit()
+        return created, dropped
+
+    @_commit_or_rollback
+    def rebuild_catalog(self):
+        """
+        Recompute the DataCatalog from the data tables, and commit.
+
+        The catalog's kept up to date as Records are written, but this is
+        needed for databases last written by a version of Sina without it,
+        and clears the stale flags left by removals (see schema.DataCatalog).
+        Databases lacking the table need upgrade_schema() instead. It reads
+        every distinct value, so it can take a while on a large database.
+
+        :returns: The number of entries in the rebuilt catalog
+        :raises ValueError: if the database has no DataCatalog table
+        """
+        # pylint: disable=protected-access
+        record_dao = RecordDAO(session=self.session)
+        if not record_dao._has_catalog():
+            raise ValueError("This database has no data catalog. Run upgrade_schema() "
+                             "(or `sina migrate`) to create one.")
+        return record_dao._rebuild_catalog_no_commit()
+
+    @staticmethod
+    def _schema_tables(optional=()):
+        """
+        Return the tables a database is created with.
+
+        :param optional: Any OPTIONAL_TABLES to include
+        :returns: A list of the schema's tables, minus the other OPTIONAL_TABLES
+        """
+        return [table for table in schema.Base.metadata.sorted_tables
+                if table not in OPTIONAL_TABLES or table in optional]
+
+    @staticmethod
+    def _fill_sections(connection):
+        """
+        Split every Record's raw into the (new, empty) RecordSection table.
+
+        Records are read CHUNK_SIZE at a time, by id, so memory use doesn't
+        grow with the size of the database.
+
+        :param connection: The connection to migrate over
+        """
+        records = schema.Record.__table__
+        ids = [row[0] for row in connection.execute(sqlalchemy.select(records.c.id))]
+        LOGGER.info('Splitting the raws of %i records into sections.', len(ids))
+        for chunk_start in range(0, len(ids), CHUNK_SIZE):
+            chunk = ids[chunk_start:chunk_start + CHUNK_SIZE]
+            rows = []
+            for id, raw in connection.execute(sqlalchemy.select(records.c.id, records.c.raw)
+                                              .where(records.c.id.in_(chunk))):
+                # pylint: disable=protected-access
+                rows.extend({'id': id, 'section': section, 'raw': json.dumps(contents)}
+                            for section, contents
+                            in dao.RecordDAO._split_sections(_json_loads(raw)).items())
+            if rows:
+                connection.execute(schema.RecordSection.__table__.insert(), rows)
+
+    @staticmethod
+    def _set_pragmas(connection, pragmas):
+        """Set a dict of {pragma: value} on a SQLAlchemy connection."""
+        for pragma, value in pragmas.items():
+            connection.exec_driver_sql('pragma {}={}'.format(pragma, value))
+
     def __repr__(self):
         """Return a string representation of a SQL DAOFactory."""
         return 'SQL DAOFactory <db_path={}>'.format(self.db_path)
@@ -1197,6 +2904,47 @@ class DAOFactory(dao.DAOFactory):
         self.session.close()
 
 
+def _validated_json(record):
+    """
+    Validate a Record, returning the JSON of its raw.
+
+    :param record: The Record to validate
+    :returns: the raw as JSON
+    :raises ValueError: if the Record is invalid
+    """
+    # pylint: disable=protected-access
+    is_valid, warnings, raw_json = record._is_valid_with_json()
+    if not is_valid:
+        raise ValueError(warnings)
+    return raw_json
+
+
+def _dump_tags(tags, cache):
+    """
+    Return the JSON for a list of tags, reusing an earlier dump of the same list.
+
+    Tag lists tend to repeat heavily across data entries and curves, so caching
+    them saves a large share of the serialization done on ingest.
+
+    Tags are keyed along with their types, as 1, 1.0, and True are equal (and
+    hash alike) but dump differently.
+
+    :param tags: The list of tags to dump
+    :param cache: A dict of {tuple of (type, tag): tag JSON} to read from and add to
+    :returns: the tags as JSON
+    """
+    if not isinstance(tags, list):
+        return json.dumps(tags)
+    try:
+        key = tuple((type(tag), tag) for tag in tags)
+        return cache[key]
+    except KeyError:
+        cache[key] = json.dumps(tags)
+        return cache[key]
+    except TypeError:  # Unhashable entries
+        return json.dumps(tags)
+
+
 def _json_loads(data_from_db):
     """
     Load json from the given data.
@@ -3,7 +3,7 @@ from __future__ import print_function
 
 # Disable pylint checks due to its issue with virtual environments
 from sqlalchemy import (Column, ForeignKey, String, Text, REAL,  # pylint: disable=import-error
-                        Integer)
+                        Integer, Boolean)
 import sqlalchemy.orm  # pylint: disable=import-error
 from sqlalchemy.ext.declarative import declarative_base  # pylint: disable=import-error
 from sqlalchemy.schema import Index  # pylint: disable=import-error
@@ -18,6 +18,15 @@ Base = declarative_base()
 # over the max row size.
 MAX_STRING_SIZE = 15000
 LARGE_STRING_SIZE = 1500  # Size for longer strings like URIs
+# MySQL can only index a prefix of long strings; the whole of a composite index
+# key has to fit in 3072 bytes, or 768 characters at 4 bytes each.
+INDEXED_PREFIX_SIZE = 255
+
+# Indexes that have been replaced by wider ones, which upgrade_schema() drops
+SUPERSEDED_INDEXES = {'ScalarData': ['scalar_name_idx'],
+                      'StringData': ['string_name_idx'],
+                      'ListScalarData': ['scalarlist_name_idx'],
+                      'ListStringDataEntry': ['stringlist_name_idx']}
 
 
 class Record(Base):
@@ -60,6 +69,8 @@ class Record(Base):
                                                  passive_deletes=True)
     documents = sqlalchemy.orm.relationship('Document', cascade='all,delete-orphan',
                                             backref='record', passive_deletes=True)
+    sections = sqlalchemy.orm.relationship('RecordSection', cascade='all,delete-orphan',
+                                           backref='record', passive_deletes=True)
     Index('type_idx', type)
 
     def __init__(self, id, type, raw=None):
@@ -89,6 +100,8 @@ class Relationship(Base):
                        ForeignKey(Record.id, ondelete='CASCADE'),
                        primary_key=True)
     predicate = Column(String(255), primary_key=True)
+    # The primary key covers lookups by subject, this covers those by object
+    Index('relationship_object_idx', object_id, predicate)
 
     def __init__(self, subject_id=None, object_id=None, predicate=None):
         """Create entry from Relationship info."""
@@ -127,7 +140,8 @@ class ScalarData(Base):
     tags = Column(Text(), nullable=True)
     units = Column(String(255), nullable=True)
 
-    Index('scalar_name_idx', name)
+    # Covers range queries (name, then value) without touching the table
+    Index('scalar_name_value_idx', name, value, id)
 
     # Disable the pylint check if and until the team decides to refactor the code
     def __init__(self, name, value,   # pylint: disable=too-many-arguments
@@ -177,7 +191,9 @@ class ListScalarData(Base):
     max = Column(REAL(), nullable=False)
     tags = Column(Text(), nullable=True)
     units = Column(String(255), nullable=True)
-    Index('scalarlist_name_idx', name)
+    # Range queries compare against one of min or max, depending on the operation
+    Index('scalarlist_name_min_idx', name, min, id)
+    Index('scalarlist_name_max_idx', name, max, id)
 
     # We disable too-many-arguments because they're all needed to form the table.
     def __init__(self, name, min, max,  # pylint: disable=too-many-arguments
@@ -233,7 +249,8 @@ class StringData(Base):
     value = Column(String(MAX_STRING_SIZE), nullable=False)
     tags = Column(Text(), nullable=True)
     units = Column(String(255), nullable=True)
-    Index('string_name_idx', name)
+    Index('string_name_value_idx', name, value, id,
+          mysql_length={'value': INDEXED_PREFIX_SIZE})
 
     # We disable too-many-arguments because they're all needed to form the table.
     def __init__(self, name, value,  # pylint: disable=too-many-arguments
@@ -330,7 +347,8 @@ class ListStringDataEntry(Base):
     name = Column(String(255), nullable=False, primary_key=True)
     index = Column(Integer(), nullable=False, primary_key=True, autoincrement=False)
     value = Column(String(MAX_STRING_SIZE), nullable=False)
-    Index('stringlist_name_idx', name)
+    Index('stringlist_name_value_idx', name, value, id,
+          mysql_length={'value': INDEXED_PREFIX_SIZE})
 
     def __init__(self, name, index, value):
         """
@@ -412,6 +430,7 @@ class Document(Base):
     mimetype = Column(String(255), nullable=True)
     tags = Column(Text(), nullable=True)
     Index('uri_idx', uri)
+    Index('mimetype_idx', mimetype)
 
     # Disable the pylint check if and until the team decides to refactor the code
     def __init__(self, uri,  # pylint: disable=too-many-arguments
@@ -426,3 +445,77 @@ class Document(Base):
         """Return a string representation of a sql schema Document."""
         return ('SQL Schema Document: <id={}, uri={}, mimetype={}, tags={}>'
                 .format(self.id, self.uri, self.mimetype, self.tags))
+
+
+class RecordSection(Base):
+    """
+    Implementation of a table to store the sections of Records' raws.
+
+    Each top-level section of a raw (see dao.RECORD_SECTIONS) is stored as
+    its own JSON, alongside the whole raw in Record, so that getting only
+    part of a Record (ex: its data, without its often-much-larger curve
+    sets) doesn't mean transferring and parsing all of it. Empty sections
+    aren't stored. As that doubles the JSON stored, databases only have this
+    table once asked for it; see DAOFactory.upgrade_schema().
+    """
+
+    __tablename__ = 'RecordSection'
+    id = Column(String(255),
+                ForeignKey(Record.id, ondelete='CASCADE'),
+                nullable=False,
+                primary_key=True)
+    section = Column(String(255), primary_key=True)
+    # Sized like Record.raw; see there
+    raw = Column(Text(2**24), nullable=False)
+
+    def __init__(self, section, raw):
+        """
+        Create a RecordSection entry with the given args.
+
+        :param section: The name of the section
+        :param raw: The section's JSON
+        """
+        self.section = section
+        self.raw = raw
+
+    def __repr__(self):
+        """Return a string representation of a sql schema RecordSection entry."""
+        return ('SQL Schema RecordSection: <id={}, section={}>'
+                .format(self.id, self.section))
+
+
+class DataCatalog(Base):
+    """
+    Implementation of a table summarizing what each type of Record holds.
+
+    Each entry covers one (Record type, name, kind). The kinds are those of
+    data ("scalar", "string", "scalar_list", "string_list"), "curve_set" for
+    curve sets, and "record" (named "") for the Records of the type
+    themselves. An entry has the number of Records of the type holding the
+    name, and, where applicable, the range of the values and an estimate of
+    how many are distinct (from a K-Minimum-Values sketch of their hashes,
+    which is exact for small numbers of values). It's kept up to date as
+    Records are inserted, updated and deleted, so that listing names and
+    types needn't scan the data tables.
+
+    Removing values can't narrow a range or sketch back down, so entries some
+    were removed from are flagged stale until the catalog's rebuilt (see
+    DAOFactory.rebuild_catalog()). Older databases may lack this table; see
+    DAOFactory.upgrade_schema().
+    """
+
+    __tablename__ = 'DataCatalog'
+    type = Column(String(255), primary_key=True)
+    name = Column(String(255), primary_key=True)
+    kind = Column(String(16), primary_key=True)
+    record_count = Column(Integer(), nullable=False)
+    min = Column(REAL(), nullable=True)
+    max = Column(REAL(), nullable=True)
+    distinct_values = Column(Integer(), nullable=True)
+    sketch = Column(Text(), nullable=True)
+    stale = Column(Boolean(), nullable=False, default=False)
+
+    def __repr__(self):
+        """Return a string representation of a sql schema DataCatalog entry."""
+        return ('SQL Schema DataCatalog: <type={}, name={}, kind={}, record_count={}>'
+                .format(self.type, self.name, self.kind, self.record_count))
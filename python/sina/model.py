@@ -40,6 +40,10 @@ class Record(object):  # pylint: disable=too-many-instance-attributes, too-many-
     of that child.
     """
 
+    # The sections a Record was fetched with, if only some (see RecordDAO.get()).
+    # Such a Record can't be inserted or updated, as its other sections would be lost.
+    projected_sections = None
+
     # Disable the pylint check if and until the team decides to refactor the code
     def __init__(self, id, type, data=None,  # pylint: disable=too-many-arguments
                  curve_sets=None, library_data=None, files=None, user_defined=None):
@@ -456,7 +460,7 @@ class Record(object):  # pylint: disable=too-many-instance-attributes, too-many-
         return warnings
 
     # Disable the pylint check if and until the team decides to refactor the code
-    def is_valid(self, print_warnings=None):  # pylint: disable=too-many-branches
+    def is_valid(self, print_warnings=None):
         """Test whether a Record's members are formatted correctly.
 
         The ingester expects certain types to be reserved, and for data
@@ -468,6 +472,21 @@ class Record(object):  # pylint: disable=too-many-instance-attributes, too-many-
         :returns: A tuple containing true or false if valid for ingestion and
                   a list of warnings.
         """
+        is_valid, warnings, _ = self._is_valid_with_json(print_warnings)
+        return is_valid, warnings
+
+    def _is_valid_with_json(self, print_warnings=None):  # pylint: disable=too-many-branches
+        """
+        Validate the Record, also returning its raw serialized as JSON.
+
+        Validation has to serialize the raw anyway, so backends use this
+        on ingest rather than dumping each raw a second time.
+
+        :param print_warnings: if true, will print warnings. Warnings are
+                                 passed to the logger only by default.
+        :returns: A tuple of (whether the Record is valid for ingestion, a list
+                  of warnings, the JSON of the raw or None if it isn't valid JSON)
+        """
         warnings = []
         # We should issue a warning if type is reserved and we are not
         # actually a reserved object. This check is removed for now because it
@@ -498,9 +517,10 @@ class Record(object):  # pylint: disable=too-many-instance-attributes, too-many-
         warnings += self._library_data_is_valid(self.library_data)
 
         # Test as JSON
+        raw_json = None
         try:
-            json.dumps(self.raw)
-        except ValueError:
+            raw_json = json.dumps(self.raw)
+        except (TypeError, ValueError):  # orjson raises a TypeError subclass
             (warnings.append("Record {}'s raw is invalid JSON.'".format(self.id)))
         if not isinstance(self.user_defined, dict):
             (warnings.append("Record {}'s user_defined section is not a "
@@ -510,8 +530,8 @@ class Record(object):  # pylint: disable=too-many-instance-attributes, too-many-
             if print_warnings:
                 print(warnstring)
             LOGGER.warning(warnstring)
-            return False, warnings
-        return True, warnings
+            return False, warnings, raw_json
+        return True, warnings, raw_json
 
 
 class CurveSet(object):
@@ -820,6 +840,59 @@ class Run(Record):
             self.version)
 
 
+class LazyRecord(Record):
+    """
+    A Record that defers parsing its raw JSON until something needs it.
+
+    Its id and type are known up front (backends index them), so scripts
+    that only look at those never pay for parsing. The first access to
+    anything else (data, files, raw, etc.) parses the JSON exactly as
+    generate_record_from_json() would, after which a LazyRecord behaves
+    like any other Record. As with RecordDAO.get(), that holds whatever the
+    type, including "run".
+    """
+
+    # The raw is deliberately not built until it's needed.
+    def __init__(self, raw_json, id=None, type=None):  # pylint: disable=super-init-not-called
+        """
+        Create a LazyRecord from its unparsed JSON.
+
+        :param raw_json: A JSON string (or bytes) representing the Record
+        :param id: The Record's id, if known. Otherwise, it's parsed from raw_json.
+        :param type: The Record's type, if known. Otherwise, it's parsed from raw_json.
+        """
+        self._raw_json = raw_json
+        self._parsed_raw = None
+        self._known = {key: val for key, val in (("id", id), ("type", type))
+                       if val is not None}
+
+    @property
+    def raw(self):
+        """Get or set the Record's raw dictionary, parsing it on first access."""
+        if self._parsed_raw is None:
+            LOGGER.debug('Parsing lazy record %s', self._known.get("id"))
+            self._parsed_raw = generate_record_from_json(json.loads(self._raw_json)).raw
+            self._raw_json = None
+        return self._parsed_raw
+
+    @raw.setter
+    def raw(self, raw):
+        self._parsed_raw = raw
+        self._raw_json = None
+        self._known = {}
+
+    @property
+    def is_parsed(self):
+        """Whether the raw JSON has been parsed yet."""
+        return self._parsed_raw is not None
+
+    def __getitem__(self, key):
+        """Get the entry with the given key, parsing the raw unless it's a known id or type."""
+        if self._parsed_raw is None and key in self._known:
+            return self._known[key]
+        return self.raw[key]
+
+
 def _is_valid_list(list_of_data):
     """
     Check if a list of data is valid.
@@ -14,10 +14,12 @@ import csv
 import io
 import time
 import datetime
+import itertools
 from numbers import Real
 from enum import Enum
 from multiprocessing.pool import ThreadPool
-from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict, defaultdict, deque
 import warnings
 from functools import partial
 import six
@@ -34,6 +36,12 @@ from .datastores.sql_schema import Base
 LOGGER = logging.getLogger(__name__)
 MAX_THREADS = 8
 
+# Records written per transaction by import_json's parse/write pipeline
+PIPELINE_BATCH_SIZE = 1000
+
+# Parsed documents allowed to wait on the pipeline's writer, per worker
+PIPELINE_QUEUE_DEPTH = 4
+
 
 class ListQueryOperation(Enum):
     """
@@ -75,7 +83,7 @@ class Negation(object):  # pylint: disable=too-few-public-methods
 
 def _import_tuple_args(unpack_tuple):
     """Unpack args to allow using import_json with ThreadPools in <Python3."""
-    import_json(unpack_tuple[0], unpack_tuple[1])
+    import_json(*unpack_tuple)
 
 
 def convert_json_to_records_and_relationships(json_path):
@@ -180,31 +188,172 @@ def load_sole_record(path_or_file):
     return records[0]
 
 
-def import_json(factory, json_paths):
+def import_json(factory, json_paths, batch_size=None, jobs=1,
+                ingest_funcs=None, ingest_funcs_preserve_raw=None):
     """
     Import one or more JSON document(s) into a supported backend.
 
+    Backends that support parallel ingestion (Cassandra) have documents
+    ingested on a thread pool. Those that don't (SQL) can instead be given
+    jobs > 1, in which case documents are loaded, postprocessed and validated
+    on a pool of <jobs> processes while this process alone writes the results
+    to the backend, PIPELINE_BATCH_SIZE Records (or batch_size, if given) at a
+    time.
+
     :param factory: The factory used to perform the import.
     :param json_paths: The filepath or list of paths to the json to import.
+    :param batch_size: If given, stream the Records of all documents into the
+                       backend, committing every batch_size Records, rather
+                       than inserting one document at a time. Relationships
+                       are inserted once all Records are in.
+    :param jobs: The number of processes to parse documents with. Ignored for
+                 backends that support parallel ingestion.
+    :param ingest_funcs: A function or list of functions to run against each
+                         Record before insertion. See RecordDAO.insert().
+    :param ingest_funcs_preserve_raw: Whether the ingest_funcs may alter the
+                                      Records' raws. See RecordDAO.insert().
     """
     LOGGER.debug('Importing %s', json_paths)
     if isinstance(json_paths, six.string_types):
         json_paths = [json_paths]
-
-    if not factory.supports_parallel_ingestion or len(json_paths) < 2:
+    if callable(ingest_funcs):
+        ingest_funcs = [ingest_funcs]
+    if ingest_funcs is not None and ingest_funcs_preserve_raw is None:
+        raise ValueError(
+            "`ingest_funcs_preserve_raw` must be specified when using ingest_funcs")
+
+    if jobs > 1 and not factory.supports_parallel_ingestion and len(json_paths) > 1:
+        _pipelined_import(factory, json_paths, jobs, batch_size or PIPELINE_BATCH_SIZE,
+                          ingest_funcs, ingest_funcs_preserve_raw)
+    elif batch_size is not None:
+        relationships = []
+
+        def stream_records():
+            """Lazily load each document, setting aside its Relationships."""
+            for json_path in json_paths:
+                doc_records, doc_relationships = load_document(json_path)
+                relationships.extend(doc_relationships)
+                for record in doc_records:
+                    yield record
+
+        factory.create_record_dao().insert(stream_records(), ingest_funcs,
+                                           ingest_funcs_preserve_raw, batch_size=batch_size)
+        factory.create_relationship_dao().insert(relationships)
+    elif not factory.supports_parallel_ingestion or len(json_paths) < 2:
         for json_path in json_paths:
             records, relationships = load_document(json_path)
-            factory.create_record_dao().insert(records)
-            factory.create_relationship_dao().insert(relationships)
+            with factory.transaction():
+                factory.create_record_dao().insert(records, ingest_funcs,
+                                                   ingest_funcs_preserve_raw)
+                factory.create_relationship_dao().insert(relationships)
     else:
         LOGGER.debug('Factory supports parallel ingest, building thread pool.')
-        arg_tuples = [(factory, x) for x in json_paths]
+        arg_tuples = [(factory, x, None, 1, ingest_funcs, ingest_funcs_preserve_raw)
+                      for x in json_paths]
         pool = ThreadPool(processes=min(len(json_paths), MAX_THREADS))
         pool.map(_import_tuple_args, arg_tuples)
         pool.close()
         pool.join()
 
 
+def _prepare_document(json_path, ingest_funcs=None, ingest_funcs_preserve_raw=None):
+    """
+    Load a document and get its Records ready for insertion.
+
+    This is the per-process half of import_json's pipeline: everything that
+    happens to a Record before it's written, short of the write itself. That
+    includes validation, which serializes each raw; the JSON is handed back so
+    the writer can store it as is.
+
+    :param json_path: The path to the document to load.
+    :param ingest_funcs: A list of functions to run against each Record, or None.
+    :param ingest_funcs_preserve_raw: Whether the ingest_funcs may alter the raws.
+    :returns: A tuple of (list of flattened Records, dict of {id: raw JSON} of
+              those Records, list of Relationships)
+    :raises ValueError: if any Record in the document is invalid.
+    """
+    # Imported here, as sina.dao itself imports from this module.
+    from sina.dao import RecordDAO  # pylint: disable=import-outside-toplevel
+    records, relationships = load_document(json_path)
+    prepared = []
+    raw_jsons = {}
+    for record in records:
+        if ingest_funcs:
+            # pylint: disable=protected-access
+            record = RecordDAO._do_process(record, ingest_funcs, ingest_funcs_preserve_raw)
+        else:
+            record = model.flatten_library_content(record)
+        # pylint: disable=protected-access
+        is_valid, warnings_found, raw_json = record._is_valid_with_json()
+        if not is_valid:
+            raise ValueError("Invalid record in {}: {}".format(json_path, warnings_found))
+        prepared.append(record)
+        raw_jsons[record.id] = raw_json
+    return prepared, raw_jsons, relationships
+
+
+def _pipelined_import(factory, json_paths, jobs, batch_size,
+                      ingest_funcs, ingest_funcs_preserve_raw):
+    """
+    Import documents by preparing them on a process pool and writing them here.
+
+    Only jobs * PIPELINE_QUEUE_DEPTH documents are in flight at once, so a slow
+    writer holds back the parsers rather than letting parsed Records pile up.
+    Documents are written in the order given. Each batch of Records is
+    followed by the Relationships from the same documents.
+
+    :param factory: The factory used to perform the import.
+    :param json_paths: The list of paths to the json to import.
+    :param jobs: The number of processes to parse documents with.
+    :param batch_size: The number of Records to write per transaction.
+    :param ingest_funcs: A list of functions to run against each Record, or None.
+    :param ingest_funcs_preserve_raw: Whether the ingest_funcs may alter the raws.
+    """
+    LOGGER.debug('Importing %i documents with %i parsing processes.', len(json_paths), jobs)
+    record_dao = factory.create_record_dao()
+    relationship_dao = factory.create_relationship_dao()
+    pending_records = []
+    pending_raw_jsons = {}
+    pending_relationships = []
+
+    def write_pending():
+        """Write everything parsed so far."""
+        with factory.transaction():
+            if pending_records:
+                # Records have already been flattened/processed and validated,
+                # so skip insert()
+                # pylint: disable=protected-access
+                record_dao._do_insert(pending_records, raw_jsons=pending_raw_jsons)
+            if pending_relationships:
+                relationship_dao.insert(pending_relationships)
+        del pending_records[:]
+        pending_raw_jsons.clear()
+        del pending_relationships[:]
+
+    prepare = partial(_prepare_document, ingest_funcs=ingest_funcs,
+                      ingest_funcs_preserve_raw=ingest_funcs_preserve_raw)
+    paths = iter(json_paths)
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        try:
+            for json_path in itertools.islice(paths, jobs * PIPELINE_QUEUE_DEPTH):
+                in_flight.append(executor.submit(prepare, json_path))
+            while in_flight:
+                records, raw_jsons, relationships = in_flight.popleft().result()
+                for json_path in itertools.islice(paths, 1):
+                    in_flight.append(executor.submit(prepare, json_path))
+                pending_records.extend(records)
+                pending_raw_jsons.update(raw_jsons)
+                pending_relationships.extend(relationships)
+                if len(pending_records) >= batch_size:
+                    write_pending()
+            write_pending()
+        except:  # noqa: E722
+            for future in in_flight:
+                future.cancel()
+            raise
+
+
 def _process_relationship_entry(entry, local_ids):
     """
     Read a JSON Object from Relationships and extract the subject and object.
@@ -249,6 +398,9 @@ def intersect_lists(lists_to_intersect):
     things neat, this logic's been pulled into a helper. It's only meant for
     lists, see intersect_ordered() for generator intersection.
 
+    Only the first list is held as a set; the rest are consumed one at a
+    time, and not at all once the intersection is empty.
+
     :param lists_to_intersect: The lists to find the intersection of.
 
     :returns: a set representing the intersection of all lists in lists_to_intersect.
@@ -257,6 +409,8 @@ def intersect_lists(lists_to_intersect):
         shared_ids = set(lists_to_intersect[0])
         if len(lists_to_intersect) > 1:
             for entry in lists_to_intersect[1:]:
+                if not shared_ids:
+                    break
                 shared_ids = shared_ids.intersection(entry)
         return shared_ids
     return set()
@@ -613,7 +767,8 @@ def sort_and_standardize_criteria(criteria_dict):
     :param criteria_dict: A dictionary of the form {name_1: criterion_1}
     :returns: A tuple of lists of the form (scalar_criteria, string_criteria,
               scalar_list_criteria, string_list_criteria, universal_criteria). Each
-              entry in each list is (name, datarange_criterion)
+              entry in each list is (name, datarange_criterion). Universal criteria
+              may be negated (not_(exists())).
     :raises ValueError: if passed any criterion that isn't a valid number,
                         string, DataRange, or ListCriteria.
     """
@@ -640,7 +795,9 @@ def sort_and_standardize_criteria(criteria_dict):
             scalar_list_criteria.append((data_name, criterion))
         elif isinstance(criterion, StringListCriteria):
             string_list_criteria.append((data_name, criterion))
-        elif isinstance(criterion, UniversalQueryOperation):
+        elif (isinstance(criterion, UniversalQueryOperation)
+              or (isinstance(criterion, Negation)
+                  and isinstance(criterion.arg, UniversalQueryOperation))):
             universal_criteria.append((data_name, criterion))
         else:
             # Probably a null range; we don't know what table to look in
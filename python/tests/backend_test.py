@@ -9,16 +9,24 @@ import logging
 from collections import OrderedDict
 import types
 import io
+import functools
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 import six
 
 # Disable pylint check due to its issue with virtual environments
 from mock import patch, MagicMock  # pylint: disable=import-error
+try:
+    import numpy
+except ImportError:
+    # NumPy is optional, needed only for get_data_columns()
+    numpy = None
 
 from sina.utils import (DataRange, import_json, export, _export_csv, has_all,
                         has_any, all_in, any_in, exists, not_)
-from sina.model import Run, Record, Relationship, flatten_library_content
+from sina.model import Run, Record, LazyRecord, Relationship, flatten_library_content
+from sina.dao import BatchInsertError, RecordDAO
 import sina.sjson as json
 import sina.postprocessing as spp
 
@@ -274,9 +282,11 @@ class TestModify(unittest.TestCase):  # pylint: disable=too-many-public-methods
         bad_record = Record(id='bad_one', type='eggs',
                             data={'eggs': {'value': [1, 2, "cat", "dog", "fish", 3]}})
         # We need to test the backend, not the validation, hence mock.
-        bad_record.is_valid = MagicMock()
-        bad_record.is_valid.return_value = (True, [])
-        self.assertTrue(bad_record.is_valid())
+        # Backends validate via _is_valid_with_json() to reuse its serialization.
+        # pylint: disable=protected-access
+        bad_record._is_valid_with_json = MagicMock()
+        bad_record._is_valid_with_json.return_value = (True, [], json.dumps(bad_record.raw))
+        self.assertTrue(bad_record._is_valid_with_json()[0])
 
         # Different DAOs can raise different exceptions, so we can't be
         # more specific here
@@ -407,6 +417,68 @@ class TestModify(unittest.TestCase):  # pylint: disable=too-many-public-methods
         self.assertTrue("eggs" in returned_records[0].data)
         self.assertTrue("eggs" in returned_records[1].data)
 
+    def test_recorddao_insert_batched(self):
+        """Test that RecordDAO can insert a generator in batches."""
+        record_dao = self.factory.create_record_dao()
+        records = (Record(id="batched_{}".format(i), type="eggs",
+                          data={"eggs": {"value": i}}) for i in range(5))
+        record_dao.insert(records, batch_size=2)
+        self.assertEqual(set(record_dao.get_all(ids_only=True)),
+                         set("batched_{}".format(i) for i in range(5)))
+        self.assertEqual(record_dao.get("batched_4").data["eggs"]["value"], 4)
+
+    def test_recorddao_insert_batched_failure(self):
+        """Test that a failed batch is reported and earlier batches are kept."""
+        record_dao = self.factory.create_record_dao()
+        records = [Record(id="batched_{}".format(i), type="eggs",
+                          data={"eggs": {"value": i}}) for i in range(5)]
+        records[3].data["eggs"]["tags"] = "not_a_list"
+        with self.assertRaises(BatchInsertError) as context:
+            record_dao.insert(iter(records), batch_size=2)
+        self.assertEqual(context.exception.batch_index, 1)
+        self.assertEqual(context.exception.records_committed, 2)
+        self.assertEqual(set(record_dao.get_all(ids_only=True)),
+                         {"batched_0", "batched_1"})
+        # Resuming from the reported point (once fixed) completes the insert
+        records[3].data["eggs"]["tags"] = ["fixed"]
+        record_dao.insert(records[context.exception.records_committed:], batch_size=2)
+        self.assertEqual(len(list(record_dao.get_all(ids_only=True))), 5)
+
+    def test_recorddao_insert_replace(self):
+        """Test that on_conflict="replace" overwrites stored Records but not Relationships."""
+        record_dao = self.factory.create_record_dao()
+        relationship_dao = self.factory.create_relationship_dao()
+        old_recs = [Record(id="spam", type="eggs",
+                           data={"eggs": {"value": 12}, "bacon": {"value": "crispy"}},
+                           files={"eggs.brek": {"mimetype": "egg"}}),
+                    Record(id="spam2", type="eggs")]
+        record_dao.insert(old_recs)
+        relationship_dao.insert(subject_id="spam", predicate="before", object_id="spam2")
+        new_recs = [Record(id="spam", type="ham",
+                           data={"eggs": {"value": 13}, "toast": {"value": [1, 2]}}),
+                    Record(id="spam3", type="eggs")]
+        record_dao.insert(new_recs, on_conflict="replace")
+        self._assert_records_equal(record_dao.get("spam"), new_recs[0])
+        self.assertTrue(all(record_dao.exist(["spam2", "spam3"])))
+        self.assertFalse(list(record_dao.data_query(bacon=exists())))
+        self.assertFalse(list(record_dao.get_given_document_uri("eggs.brek")))
+        self.assertEqual(list(record_dao.data_query(eggs=13)), ["spam"])
+        self.assertEqual(len(relationship_dao.get(subject_id="spam")), 1)
+
+    def test_recorddao_insert_skip(self):
+        """Test that on_conflict="skip" leaves stored Records alone."""
+        record_dao = self.factory.create_record_dao()
+        old_rec = Record(id="spam", type="eggs", data={"eggs": {"value": 12}})
+        record_dao.insert(old_rec)
+        new_recs = [Record(id="spam", type="ham", data={"eggs": {"value": 13}}),
+                    Record(id="spam2", type="eggs", data={"eggs": {"value": 14}})]
+        record_dao.insert(iter(new_recs), on_conflict="skip")
+        self._assert_records_equal(record_dao.get("spam"), old_rec)
+        self._assert_records_equal(record_dao.get("spam2"), new_recs[1])
+        self.assertEqual(list(record_dao.data_query(eggs=13)), [])
+        with self.assertRaises(ValueError):
+            record_dao.insert(new_recs, on_conflict="merge")
+
     def test_recorddao_delete_one(self):
         """Test that RecordDAO is deleting correctly."""
         record_dao = self.factory.create_record_dao()
@@ -631,6 +703,28 @@ class TestModify(unittest.TestCase):  # pylint: disable=too-many-public-methods
         assert_one_relationship_exists(object_id="spam2")
         assert_one_relationship_exists(subject_id="spam4")
 
+    def test_recorddao_find_sorted_mixed(self):
+        """Test that ordering by a datum puts its scalars before its strings, and pages across."""
+        record_dao = self.factory.create_record_dao()
+        values = {"a": 2, "b": "low", "c": 1, "d": "high", "e": 2, "f": None}
+        record_dao.insert([Record(id=id, type="mixed",
+                                  data={"size": {"value": val}} if val is not None else {})
+                           for id, val in values.items()])
+        expected = ["c", "a", "e", "d", "b"]
+        default = functools.partial(RecordDAO._find_sorted, record_dao)
+        for find_sorted_func in (record_dao._find_sorted, default):
+            with patch.object(record_dao, "_find_sorted", find_sorted_func):
+                for descending, order in ((False, expected), (True, expected[::-1])):
+                    pages, after = [], None
+                    while True:
+                        pages.append(list(record_dao._find(types="mixed", order_by="size",
+                                                           descending=descending, limit=2,
+                                                           after=after, ids_only=True)))
+                        if not pages[-1]:
+                            break
+                        after = pages[-1][-1]
+                    self.assertEqual(pages, [order[:2], order[2:4], order[4:], []])
+
     def test_recorddao_get_raw(self):
         """Verify we can get the raw JSON. This is useful for bad data."""
         record_dao = self.factory.create_record_dao()
@@ -895,6 +989,50 @@ class TestQuery(unittest.TestCase):  # pylint: disable=too-many-public-methods
         self.assertEqual(len(returned_types), 3)
         six.assertCountEqual(self, returned_types, assigned_types)
 
+    def test_recorddao_get_prefetch(self):
+        """Test that prefetching Records gets the same ones, in the same order."""
+        ids = list(self.record_dao.get_all(ids_only=True))
+        expected = [x.raw for x in self.record_dao.get(ids, chunk_size=2)]
+        for workers in (None, 3, ThreadPoolExecutor(max_workers=2)):
+            prefetched = self.record_dao.get(ids, chunk_size=2, prefetch=True,
+                                             workers=workers)
+            self.assertEqual([x.raw for x in prefetched], expected)
+        with self.assertRaises(ValueError):
+            list(self.record_dao.get(ids + ["Idontexist"], prefetch=True))
+
+    def test_recorddao_get_sections(self):
+        """Test that Records can be fetched with only some of their sections."""
+        ids = ["spam", "spam2", "spam3"]
+        full = {x.id: x for x in self.record_dao.get(ids)}
+        projected = list(self.record_dao.get(ids, sections=["data", "other"]))
+        six.assertCountEqual(self, [x.id for x in projected], ids)
+        for record in projected:
+            self.assertEqual(record.type, full[record.id].type)
+            self.assertEqual(record.data, full[record.id].data)
+            self.assertEqual(record.curve_sets, {})
+            self.assertEqual(record.files, {})
+        # "other" holds whatever else is in the raw, ex: a Run's application
+        self.assertEqual(next(x for x in projected if x.id == "spam")["application"],
+                         "breakfast_maker")
+        curves_only = self.record_dao.get("spam", sections=["curve_sets"])
+        self.assertEqual(curves_only.curve_sets, full["spam"].curve_sets)
+        self.assertEqual(curves_only.data, {})
+        found = self.record_dao._find(types="run", sections=["files"])
+        six.assertCountEqual(self, [(x.id, x.files) for x in found],
+                             [(x.id, x.files) for x in self.record_dao.get_all_of_type("run")])
+        with self.assertRaises(ValueError):
+            self.record_dao.get(ids, sections=["data", "curves"])
+        with self.assertRaises(ValueError):
+            list(self.record_dao.get(ids + ["Idontexist"], sections=["data"]))
+        # Storing a projected Record would wipe out the sections it lacks
+        for store in (self.record_dao.update, self.record_dao.update_appendonly,
+                      lambda x: self.record_dao.insert(x, on_conflict="replace")):
+            with self.assertRaises(ValueError):
+                store(curves_only)
+            with self.assertRaises(ValueError):
+                store(projected)
+        self.assertEqual(self.record_dao.get("spam").raw, full["spam"].raw)
+
     def test_recorddao_raise_error_for_nonexistant(self):
         """Test that we raise an error for nonexistant ids."""
         with self.assertRaises(ValueError) as context:
@@ -1265,6 +1403,18 @@ class TestQuery(unittest.TestCase):  # pylint: disable=too-many-public-methods
         self.assertEqual(len(just_5), 1)
         self.assertIn("spam5", just_5)
 
+    def test_recorddao_not_exists(self):
+        """Test that the RecordDAO is retrieving on not_(exists()) calls."""
+        all_ids = set(self.record_dao.get_all(ids_only=True))
+        not_5_or_6 = list(self.record_dao.data_query(flex_data_1=not_(exists())))
+        six.assertCountEqual(self, not_5_or_6, all_ids - {"spam5", "spam6"})
+        just_6 = list(self.record_dao.data_query(flex_data_1=exists(),  # 5 & 6
+                                                 flex_data_2=not_(exists())))  # not 5
+        self.assertEqual(just_6, ["spam6"])
+        neither = list(self.record_dao.data_query(flex_data_1=not_(exists()),
+                                                  flex_data_2=not_(exists())))
+        six.assertCountEqual(self, neither, not_5_or_6)
+
     def test_recorddao_exists_overlap(self):
         """Test that exists() works correctly with "duplicate" names."""
         # There's an edge case we need to support where a datum and curve set
@@ -1510,6 +1660,78 @@ class TestQuery(unittest.TestCase):  # pylint: disable=too-many-public-methods
                                                         data_list=["gone", "away"])
         self.assertFalse(for_none)
 
+    def test_recorddao_get_data_columns(self):
+        """Test that we're getting data as columns aligned by Record."""
+        for get_columns in (self.record_dao._get_data_columns,
+                            lambda *args: RecordDAO._get_data_columns(self.record_dao, *args)):
+            ids, columns = get_columns(["flex_data_1", "val_data_list_2", "val_data_3"])
+            self.assertEqual(ids, ["spam5", "spam6"])
+            self.assertEqual(columns, OrderedDict([
+                ("flex_data_1", [[100, 200, 300], "orange juice"]),
+                ("val_data_list_2", [["eggs", "pancake"], ["eggs", "pancake", "yellow"]]),
+                ("val_data_3", ["sugar", "syrup"])]))
+            ids, columns = get_columns(["val_data", "spam_scal"], ["spam3", "nope", "spam"])
+            self.assertEqual(ids, ["spam3", "nope", "spam"])
+            self.assertEqual(columns, OrderedDict([("val_data", ["chewy", None, "runny"]),
+                                                   ("spam_scal", [10.5, None, 10])]))
+        with self.assertRaises(ValueError):
+            self.record_dao.get_data_columns(["spam_scal"], as_="csv")
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_recorddao_get_data_columns_numpy(self):
+        """Test that we're getting data columns as NumPy arrays."""
+        columns = self.record_dao.get_data_columns(["spam_scal", "val_data_list_1"],
+                                                   ["spam", "spam4", "spam6"])
+        self.assertEqual(list(columns), ["id", "spam_scal", "val_data_list_1"])
+        self.assertEqual(list(columns["id"]), ["spam", "spam4", "spam6"])
+        self.assertEqual(columns["spam_scal"].dtype, float)
+        self.assertEqual(columns["spam_scal"][0], 10)
+        self.assertTrue(numpy.isnan(columns["spam_scal"][1]))
+        self.assertIsNone(columns["val_data_list_1"][0])
+        self.assertEqual(list(columns["val_data_list_1"][1]), [-11, -9])
+        self.assertEqual(list(columns["val_data_list_1"][2]), [8, 20])
+
+    def test_recorddao_aggregate(self):
+        """Test that we're computing statistics of a scalar correctly."""
+        # Backends may override _aggregate() to aggregate in the database; test both.
+        default = functools.partial(RecordDAO._aggregate, self.record_dao)
+        # Large values that vary little, like timestamps, keep their precision
+        for id, value in (("big_1", 1e9 + 1), ("big_2", 1e9 + 2)):
+            self.record_dao.insert(Record(id, "big", data={"big_scal": {"value": value}}))
+        self.addCleanup(self.record_dao.delete, ["big_1", "big_2"])
+        for aggregate_func in (self.record_dao._aggregate, default):
+            with patch.object(self.record_dao, "_aggregate", aggregate_func):
+                stats = self.record_dao.aggregate("spam_scal", bins=[-1, 10, 11])
+                self.assertEqual(stats["count"], 5)
+                self.assertEqual((stats["min"], stats["max"]), (-1, 10.99999))
+                self.assertAlmostEqual(stats["mean"], 40.99999 / 5)
+                self.assertEqual(stats["histogram"],
+                                 {"counts": [1, 4], "edges": [-1, 10, 11]})
+                by_type = self.record_dao.aggregate("spam_scal", ops=["count", "max"],
+                                                    group_by="type")
+                self.assertEqual(list(by_type), ["eggrec", "foo", "run"])
+                self.assertEqual(by_type["run"], {"count": 2, "max": 10.99999})
+                by_string = self.record_dao.aggregate("spam_scal", ops="std",
+                                                      group_by="val_data",
+                                                      types=["foo", "run"],
+                                                      data={"spam_scal_2": DataRange(0)})
+                self.assertEqual(by_string, OrderedDict([("chewy", {"std": 0}),
+                                                         ("runny", {"std": 0}),
+                                                         (None, {"std": 0})]))
+                histogram = self.record_dao.aggregate("spam_scal", ops=["histogram"], bins=2,
+                                                      data={"spam_scal_2": DataRange(0)})
+                self.assertEqual(histogram["histogram"],
+                                 {"counts": [1, 3], "edges": [-1, 4.75, 10.5]})
+                nothing = self.record_dao.aggregate("spam_scal", ops=["count", "mean"],
+                                                    data={"spam_scal": DataRange(100)})
+                self.assertEqual(nothing, {"count": 0, "mean": None})
+                self.assertAlmostEqual(self.record_dao.aggregate("big_scal", ops="std")["std"],
+                                       0.5)
+        with self.assertRaises(ValueError):
+            self.record_dao.aggregate("spam_scal", ops=["median"])
+        with self.assertRaises(ValueError):
+            self.record_dao.aggregate("spam_scal", bins=[2, 1])
+
     def test_recorddao_get_data_for_all_records(self):
         """Test that we're getting data for all records when id_list isn't specified."""
         for_all = self.record_dao.get_data_for_records(data_list=["val_data_3"])
@@ -1605,6 +1827,7 @@ class TestQuery(unittest.TestCase):  # pylint: disable=too-many-public-methods
     def test_recorddao_find_order_default(self):
         """Test that the RecordDAO _find() runs queries in the correct default order."""
         dao = self.factory.create_record_dao()
+        # Backends may override _find() to skip the staged queries; test the general one.
         dao._do_data_query = MagicMock()
         dao._do_data_query.return_value = ["rec_1", "rec_2", "rec_3", "rec_4"]
         dao._do_get_given_document_uri = MagicMock()
@@ -1613,12 +1836,12 @@ class TestQuery(unittest.TestCase):  # pylint: disable=too-many-public-methods
         dao.get_with_mime_type.return_value = ["rec_1", "rec_2"]
         dao.get_all_of_type = MagicMock()
         dao.get_all_of_type.return_value = ["rec_1"]
-        result = dao._find(id_pool=["rec_1", "rec_2", "rec_3", "rec_4", "rec_5"],
-                           data="foo",
-                           file_uri="bar",
-                           types="baz",
-                           mimetype="image/png",
-                           ids_only=True)
+        result = RecordDAO._find(dao, id_pool=["rec_1", "rec_2", "rec_3", "rec_4", "rec_5"],
+                                 data="foo",
+                                 file_uri="bar",
+                                 types="baz",
+                                 mimetype="image/png",
+                                 ids_only=True)
 
         dao._do_data_query.assert_called_with("foo", id_pool=["rec_1", "rec_2", "rec_3",
                                                               "rec_4", "rec_5"], alias_dict=None)
@@ -1635,6 +1858,7 @@ class TestQuery(unittest.TestCase):  # pylint: disable=too-many-public-methods
     def test_recorddao_find_order_non_default(self):
         """Test that the RecordDAO _find() correctly reorders queries."""
         dao = self.factory.create_record_dao()
+        # Backends may override _find() to skip the staged queries; test the general one.
         dao.get_with_mime_type = MagicMock()
         dao.get_with_mime_type.return_value = ["rec_1", "rec_2", "rec_3", "rec_4"]
         dao._do_get_given_document_uri = MagicMock()
@@ -1643,13 +1867,13 @@ class TestQuery(unittest.TestCase):  # pylint: disable=too-many-public-methods
         dao.get_all_of_type.return_value = ["rec_1", "rec_2"]
         dao._do_data_query = MagicMock()
         dao._do_data_query.return_value = ["rec_1"]
-        result = dao._find(id_pool=["rec_1", "rec_2", "rec_3", "rec_4", "rec_5"],
-                           data="foo",
-                           file_uri="bar",
-                           types="baz",
-                           mimetype="image/png",
-                           ids_only=True,
-                           query_order=["mimetype", "file_uri", "types", "data"])
+        result = RecordDAO._find(dao, id_pool=["rec_1", "rec_2", "rec_3", "rec_4", "rec_5"],
+                                 data="foo",
+                                 file_uri="bar",
+                                 types="baz",
+                                 mimetype="image/png",
+                                 ids_only=True,
+                                 query_order=["mimetype", "file_uri", "types", "data"])
 
         dao.get_with_mime_type.assert_called_with("image/png",
                                                   id_pool=["rec_1", "rec_2", "rec_3",
@@ -1679,6 +1903,95 @@ class TestQuery(unittest.TestCase):  # pylint: disable=too-many-public-methods
                                         ids_only=False)
         six.assertCountEqual(self, list(get_one)[0].id, self.record_dao.get("spam5").id)
 
+    def test_recorddao_find_concurrent(self):
+        """Test that running _find()'s queries concurrently gives the same results."""
+        find_args = [{"data": {"flex_data_1": exists()}, "file_uri": "%wav",
+                      "types": ["run", "bar"], "mimetype": "audio/wav"},
+                     {"data": {"spam_scal": DataRange(-10, 10.5)}, "types": not_("bar")},
+                     {"file_uri": has_any("%png", "beeq.%"), "types": "bar"},
+                     {"types": ["run", "foo"], "id_pool": ["spam", "spam2", "spam3"]}]
+        for args in find_args:
+            expected = list(self.record_dao._find(ids_only=True, **args))
+            six.assertCountEqual(self, self.record_dao._find(ids_only=True, concurrent=True,
+                                                             **args), expected)
+            six.assertCountEqual(self, [x.id for x in self.record_dao._find(concurrent=True,
+                                                                            **args)],
+                                 expected)
+
+    def test_recorddao_find_ordered(self):
+        """Test that merging id-ordered queries gives _find()'s results, in order."""
+        find_args = [{"data": {"flex_data_1": exists()}, "file_uri": "%wav",
+                      "types": ["run", "bar"], "mimetype": "audio/wav"},
+                     {"data": {"spam_scal": DataRange(-10, 10.5)}, "types": not_("bar")},
+                     {"file_uri": has_any("%png", "beeq.%"), "types": "bar"}]
+        for args in find_args:
+            expected = sorted(self.record_dao._find(ids_only=True, **args))
+            args = dict({"data": None, "file_uri": None, "mimetype": None, "types": None},
+                        **args)
+            self.assertEqual(list(self.record_dao._find_ordered(args, ids_only=True)),
+                             expected)
+            self.assertEqual([x.id for x in self.record_dao._find_ordered(args)], expected)
+            pool = ["spam", "spam3", "nonexistent"]
+            self.assertEqual(list(self.record_dao._find_ordered(args, id_pool=pool,
+                                                                ids_only=True)),
+                             [x for x in expected if x in pool])
+
+    def test_recorddao_find_sorted(self):
+        """Test that _find() can order, limit and page through its results."""
+        # Backends may override _find_sorted() to sort in the database; test both.
+        default = functools.partial(RecordDAO._find_sorted, self.record_dao)
+        all_ids = sorted(self.record_dao.get_all(ids_only=True))
+        for find_sorted_func in (self.record_dao._find_sorted, default):
+            with patch.object(self.record_dao, "_find_sorted", find_sorted_func):
+                by_scalar = ["eggs", "spam", "spam3", "spam3ish", "spam2"]
+                self.assertEqual(list(self.record_dao._find(order_by="spam_scal",
+                                                            ids_only=True)), by_scalar)
+                self.assertEqual([x.id for x in self.record_dao._find(order_by="spam_scal",
+                                                                      descending=True)],
+                                 by_scalar[::-1])
+                self.assertEqual(list(self.record_dao._find(limit=4, ids_only=True)),
+                                 all_ids[:4])
+                self.assertEqual(list(self.record_dao._find(after=all_ids[2], limit=3,
+                                                            descending=True, ids_only=True)),
+                                 all_ids[1::-1])
+                # Ties are broken by id, even when continuing after one
+                found = self.record_dao._find(data={"spam_scal": DataRange(0, 11)},
+                                              types=not_("bar"), order_by="spam_scal",
+                                              after="spam3", limit=5, lazy=True)
+                self.assertEqual([x.id for x in found], ["spam3ish", "spam2"])
+                found = self.record_dao._find(id_pool=["spam2", "spam", "spam4"],
+                                              order_by="spam_scal", after="eggs",
+                                              sections=["data"])
+                self.assertEqual([x.id for x in found], ["spam", "spam2"])
+                self.assertEqual(list(self.record_dao._find(order_by="val_data_2",
+                                                            ids_only=True, limit=0)), [])
+                with self.assertRaises(ValueError):
+                    self.record_dao._find(order_by="spam_scal", after="spam4")
+        with self.assertRaises(ValueError):
+            self.record_dao._find(limit=-1)
+        with self.assertRaises(TypeError):
+            self.record_dao._find(limit=2.5)
+
+    def test_recorddao_find_lazy(self):
+        """Test that _find() can return LazyRecords equivalent to the Records it returns."""
+        find_args = [{"data": {"spam_scal": DataRange(-10, 10.5)}, "types": not_("bar")},
+                     {"types": ["run", "foo"], "id_pool": ["spam", "spam2", "spam3"]},
+                     {"id_pool": ["spam", "nonexistent"]},
+                     {}]
+        for args in find_args:
+            expected = {x.id: x.raw for x in self.record_dao._find(**args)}
+            found = list(self.record_dao._find(lazy=True, **args))
+            self.assertTrue(all(isinstance(x, LazyRecord) for x in found))
+            self.assertEqual({x.id: x.type for x in found},
+                             {key: val["type"] for key, val in expected.items()})
+            self.assertFalse(any(x.is_parsed for x in found))
+            self.assertEqual({x.id: x.raw for x in found}, expected)
+        # Records of type run parse like get()'s, even without a run's required keys
+        self.record_dao.insert(Record(id="lazy_run", type="run", data={"x": {"value": 1}}))
+        self.addCleanup(self.record_dao.delete, "lazy_run")
+        lazy_run = next(self.record_dao._find(id_pool=["lazy_run"], lazy=True))
+        self.assertEqual(lazy_run.data, self.record_dao.get("lazy_run").data)
+
     def test_recorddao_find_all(self):
         """Test it's possible to use _find() to return all records."""
         find_get_all = list(self.record_dao._find(ids_only=True))
@@ -2035,6 +2348,37 @@ class TestImportExport(unittest.TestCase):
         self.assertEqual(canonical['relationships'][0]['predicate'],
                          relation[0].predicate)
 
+    def test_batched_import(self):
+        """Test that a batched import streams in every Record and Relationship."""
+        json_path = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                 "test_files/sample_doc_1.json")
+        import_json(factory=self.factory, json_paths=[json_path], batch_size=1)
+        rec_handler = self.factory.create_record_dao()
+        self.assertTrue(all(rec_handler.exist(["parent_1", "child_1"])))
+        relation = self.factory.create_relationship_dao().get(object_id="child_1")
+        self.assertEqual(len(relation), 1)
+
+    def test_pipelined_import(self):
+        """Test that parsing documents on a process pool ingests everything."""
+        test_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_files")
+        json_paths = [os.path.join(test_dir, "sample_doc_1.json"),
+                      os.path.join(test_dir, "recs_no_rels.json")]
+        import_json(factory=self.factory, json_paths=json_paths, jobs=2, batch_size=1,
+                    ingest_funcs=[spp.filter_remove(Record(id="o", type="o",
+                                                           data={"scalar_1": {"value": 0}}))],
+                    ingest_funcs_preserve_raw=False)
+        rec_handler = self.factory.create_record_dao()
+        expected_ids = set()
+        for json_path in json_paths:
+            with io.open(json_path, encoding='utf-8') as json_file:
+                expected_ids.update(rec["id"] for rec in json.loads(json_file.read())["records"]
+                                    if "id" in rec)
+        self.assertTrue(expected_ids.issubset(set(rec_handler.get_all(ids_only=True))))
+        # The ingest funcs ran in the workers
+        self.assertFalse(list(rec_handler.data_query(scalar_1=387.6)))
+        self.assertNotIn("scalar_1", rec_handler.get("child_1").data)
+        self.assertEqual(len(self.factory.create_relationship_dao().get(object_id="child_1")), 1)
+
     # Exporting
     @patch('sina.utils._export_csv')
     def test_export_csv_good_input_mocked(self, mock):
@@ -60,6 +60,15 @@ class TestCLI(unittest.TestCase):
         self.assertIsInstance(mock_args['factory'], sina_sql.DAOFactory)
         self.assertEqual(mock_args['factory'].db_path, self.created_db)
         self.assertEqual(mock_args['json_paths'], [self.args.source])
+        self.assertEqual(mock_args['jobs'], 1)
+
+    @patch('sina.datastores.sql.DAOFactory.upgrade_schema', return_value=([], []))
+    def test_migrate_sql(self, mock_upgrade):
+        """Verify CLI upgrades the given database's schema."""
+        args = self.parser.parse_args(['migrate', '-d', self.created_db])
+        driver.migrate(args)
+        mock_upgrade.assert_called_once()
+        self.assertEqual(args.database_type, 'sql')
 
     @pytest.mark.cassandra
     @patch('sina.cli.driver.import_json', return_value=True)
@@ -116,9 +116,10 @@ class ReadOnlyDatastoreTests(AbstractDataStoreTest):
         # We need to test that args are properly kwarg'd to reorder
         expected_result = "test return"
         self.record_dao.get = Mock(return_value=expected_result)
-        args = ("ids", "chunk_size")
+        args = ("ids", "chunk_size", "prefetch", "workers", "sections")
         expected_args = ['ids']
-        expected_kwargs = {"chunk_size": "chunk_size"}
+        expected_kwargs = {"chunk_size": "chunk_size", "prefetch": "prefetch",
+                           "workers": "workers", "sections": "sections"}
         actual_result = self.datastore.records.get(*args)
         self.assertIs(actual_result, expected_result)
         self.record_dao.get.assert_called_with(*expected_args, **expected_kwargs)
@@ -126,7 +127,8 @@ class ReadOnlyDatastoreTests(AbstractDataStoreTest):
         # ...and that default args are properly kwarg'd as well.
         args = ("ids",)
         expected_args = ['ids']
-        expected_kwargs = {"chunk_size": 999}
+        expected_kwargs = {"chunk_size": 999, "prefetch": False, "workers": None,
+                           "sections": None}
         actual_result = self.datastore.records.get(*args)
         self.assertIs(actual_result, expected_result)
         self.record_dao.get.assert_called_with(*expected_args, **expected_kwargs)
@@ -189,6 +191,21 @@ class ReadOnlyDatastoreTests(AbstractDataStoreTest):
                                                  "get_data_for_records", 1,
                                                  opt_args=(None,))
 
+    def test_get_data_columns(self):
+        """Test the RecordOperation get_data_columns()."""
+        self.assert_record_method_is_passthrough("get_data_columns",
+                                                 "get_data_columns", 3)
+        self.assert_record_method_is_passthrough("get_data_columns",
+                                                 "get_data_columns", 1,
+                                                 opt_args=(None, "numpy"))
+
+    def test_aggregate(self):
+        """Test the RecordOperation aggregate()."""
+        self.assert_record_method_is_passthrough("aggregate", "aggregate", 6)
+        self.assert_record_method_is_passthrough(
+            "aggregate", "aggregate", 1,
+            opt_args=(("count", "min", "max", "mean", "std", "histogram"), 10, None, None, None))
+
     def test_find_with_max(self):
         """Test the RecordOperation find_with_max()."""
         self.assert_record_method_is_passthrough("find_with_max",
@@ -237,12 +254,14 @@ class ReadOnlyDatastoreTests(AbstractDataStoreTest):
     def test_record_find(self):
         """Test the RecordOperation find()."""
         self.assert_record_method_is_passthrough("find",
-                                                 "_find", 8)
+                                                 "_find", 15)
         self.assert_record_method_is_passthrough("find",
                                                  "_find", 0,
                                                  opt_args=(None, None, None, None, None,
                                                            False, ("data", "file_uri",
-                                                                   "mimetype", "types"), None))
+                                                                   "mimetype", "types"),
+                                                           None, False, False,
+                                                           None, None, False, None, None))
 
     # #############  RelationshipOperations  ############# #
     def test_find(self):
@@ -316,7 +335,7 @@ class DataStoreTest(AbstractDataStoreTest):
     def test_insert_record(self):
         """Test the RecordOperation insert()."""
         self.assert_record_method_is_passthrough("insert", "insert", 1,
-                                                 opt_args=(None, None),
+                                                 opt_args=(None, None, None, None),
                                                  has_result=False)
 
     def test_delete_record(self):
@@ -354,6 +373,26 @@ class DataStoreTest(AbstractDataStoreTest):
         self.assert_relationship_method_is_passthrough("insert", "insert",
                                                        num_args=1)
 
+    def test_bulk_load(self):
+        """Test the DataStore's bulk_load() method."""
+        self.assert_datastore_method_is_passthrough("bulk_load", "bulk_load",
+                                                    has_result=True)
+
+    def test_transaction(self):
+        """Test the DataStore's transaction() method."""
+        self.assert_datastore_method_is_passthrough("transaction", "transaction",
+                                                    has_result=True)
+
+    def test_upgrade_schema(self):
+        """Test the DataStore's upgrade_schema() method."""
+        self.assert_datastore_method_is_passthrough("upgrade_schema", "upgrade_schema",
+                                                    opt_args=(False,), has_result=True)
+
+    def test_rebuild_catalog(self):
+        """Test the DataStore's rebuild_catalog() method."""
+        self.assert_datastore_method_is_passthrough("rebuild_catalog", "rebuild_catalog",
+                                                    has_result=True)
+
     def test_delete_all_contents(self):
         """Test that DataStore calls the expected delete method."""
         fake_factory = Mock()
@@ -478,6 +517,15 @@ class CreateDatastore(unittest.TestCase):
 class AppendOnlyDatastore(unittest.TestCase):
     """Test append store"""
 
+    def test_append_only_insert_replace(self):
+        """Verify append-only stores refuse to replace Records on insert."""
+        store = connect(connection_type='append')
+        store.records.insert(Record(id="spam", type="foo"))
+        with self.assertRaises(ValueError):
+            store.records.insert(Record(id="spam", type="bar"), on_conflict="replace")
+        store.records.insert(Record(id="spam", type="bar"), on_conflict="skip")
+        self.assertEqual(store.records.get("spam").type, "foo")
+
     # pylint: disable=too-many-statements
     def test_append_only_datastore(self):
         """Verify sina.connect(connection_type='append') only appends"""
@@ -1,6 +1,8 @@
 """Test the SQL portion of the DAO structure."""
 
+import copy
 import json
+import pickle
 import tempfile
 import unittest
 import os
@@ -113,6 +115,20 @@ class TestModel(unittest.TestCase):
         # all previous errors fixed: "maximal" valid run
         self.assertTrue(spam.is_valid()[0])
 
+    def test_is_valid_with_json(self):
+        """Ensure validation also hands back the raw's JSON, or None if it has none."""
+        spam = model.Record(id="spam_and_eggs", type="recipe",
+                            data={"eggs": {"value": 2, "tags": ["count"]}})
+        # pylint: disable=protected-access
+        is_valid, warnings, raw_json = spam._is_valid_with_json()
+        self.assertTrue(is_valid)
+        self.assertFalse(warnings)
+        self.assertEqual(json.loads(raw_json), spam.raw)
+        spam.raw["unserializable"] = {1, 2}
+        is_valid, _, raw_json = spam._is_valid_with_json()  # pylint: disable=protected-access
+        self.assertFalse(is_valid)
+        self.assertIsNone(raw_json)
+
     def test__is_valid_library_data(self):
         """Test that we're properly validating library data."""
         self.library_data["malformed_lib"] = {"data": 2}
@@ -153,6 +169,47 @@ class TestModel(unittest.TestCase):
         self.assertEqual(scalar_index, 1)
         self.assertEqual(string_index, 0)
 
+    def test_lazy_record(self):
+        """Test that a LazyRecord only parses its JSON once it needs to."""
+        raw_json = json.dumps({"id": "spam", "type": "new_eggs", "extra": 1,
+                               "data": {"bar": {"value": "1"}}})
+        lazy = model.LazyRecord(raw_json, id="spam", type="new_eggs")
+        self.assertIsInstance(lazy, Record)
+        self.assertEqual((lazy.id, lazy.type), ("spam", "new_eggs"))
+        self.assertEqual(repr(lazy), "Model Record <id=spam, type=new_eggs>")
+        self.assertFalse(lazy.is_parsed)
+        self.assertEqual(lazy.data_values["bar"], "1")
+        self.assertTrue(lazy.is_parsed)
+        self.assertEqual(lazy.raw, model.generate_record_from_json(json.loads(raw_json)).raw)
+        lazy.type = "old_eggs"
+        lazy.add_file("ham.png")
+        self.assertEqual((lazy.type, list(lazy.files)), ("old_eggs", ["ham.png"]))
+        # Without an id or type given, they're parsed too
+        self.assertEqual(model.LazyRecord(raw_json).type, "new_eggs")
+
+    def test_lazy_run(self):
+        """Test that a LazyRecord of type run parses like any other Record."""
+        raw_json = json.dumps({"id": "spam", "type": "run",
+                               "library_data": {"ham": {"data": {"bar": {"value": 1}}}}})
+        for lazy in (model.LazyRecord(raw_json, id="spam", type="run"),
+                     model.LazyRecord(raw_json)):
+            self.assertEqual(lazy.raw, model.generate_record_from_json(json.loads(raw_json)).raw)
+            self.assertEqual(model.flatten_library_content(lazy).data["ham/bar"]["value"], 1)
+
+    def test_lazy_record_copy(self):
+        """Test that LazyRecords can be copied and pickled, parsed or not."""
+        raw_json = json.dumps({"id": "spam", "type": "eggs", "data": {"bar": {"value": 1}}})
+        for parse in (False, True):
+            lazy = model.LazyRecord(raw_json, id="spam", type="eggs")
+            if parse:
+                lazy.data["bar"]["value"] = 2
+            for copied in (copy.copy(lazy), copy.deepcopy(lazy),
+                           pickle.loads(pickle.dumps(lazy))):
+                self.assertIsInstance(copied, model.LazyRecord)
+                self.assertEqual(copied.is_parsed, parse)
+                self.assertEqual((copied.id, copied.type), ("spam", "eggs"))
+                self.assertEqual(copied.raw, lazy.raw)
+
     def test_set_data(self):
         """Test to make sure we can set data correctly for a Record."""
         complete_data = {"density": {"value": 12},
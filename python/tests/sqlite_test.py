@@ -1,12 +1,19 @@
 #!/bin/python
 """Runs the tests contained in backend_test.py on the SQL backend."""
 
+import contextlib
 import os
 import time
 import unittest
 import mock  # pylint: disable=import-error
+import six
+import sqlalchemy  # pylint: disable=import-error
 
+from sina import dao
 import sina.datastores.sql as backend
+import sina.datastores.sql_schema as schema
+from sina.model import Record
+from sina.utils import DataRange, has_any, has_all, any_in, exists, not_, import_json
 
 import tests.backend_test
 import tests.datastore_test
@@ -20,6 +27,41 @@ def test_close():
         close.assert_called()
 
 
+def test_dump_tags_cache():
+    """Test that tag JSON is reused for repeated tag lists."""
+    cache = {}
+    # pylint: disable=protected-access
+    first = backend._dump_tags(["a", "b"], cache)
+    assert backend._dump_tags(["a", "b"], cache) is first
+    assert len(cache) == 1
+    # Malformed tags still dump, they just can't be cached
+    assert backend._dump_tags(None, cache) == backend.json.dumps(None)
+    assert len(cache) == 1
+    # Equal tags of different types don't share JSON
+    assert backend._dump_tags([1], cache) == backend.json.dumps([1])
+    assert backend._dump_tags([True], cache) == backend.json.dumps([True])
+    assert backend._dump_tags([1.0], cache) == backend.json.dumps([1.0])
+
+
+def test_catalog_summary():
+    """Test that catalog summaries count distinct values, exactly while there are few."""
+    few = backend.CatalogSummary()
+    for value in [3, 1, 3.0, 2]:
+        few.add(value, value, value)
+    assert (few.count, few.min, few.max, few.distinct()) == (4, 1, 3, 3)
+    # Sketches of overlapping values merge into that of their union
+    first, second, both = (backend.CatalogSummary() for _ in range(3))
+    for value in range(6000):
+        first.add(value=value)
+    for value in range(4000, 10000):
+        second.add(value=value)
+    for value in range(10000):
+        both.add(value=value)
+    first.merge(second)
+    assert first.sketch == both.sketch
+    assert 0.75 < first.distinct() / 10000. < 1.25
+
+
 # Disable pylint no-init check just on the Mixin class, since it has no use
 # for an __init__ and there is no expectation of adding more public methods.
 class SQLMixin(object):  # pylint: disable=no-init,too-few-public-methods
@@ -68,6 +110,70 @@ class TestSetup(SQLMixin, unittest.TestCase):
         factory.create_record_dao().exist("id_doesnt_matter")
 
 
+def _make_bulk_records(count):
+    """Create a number of Records covering every kind of row the SQL backend stores."""
+    records = []
+    for i in range(count):
+        rec = Record(id="rec_{}".format(i), type="bulk",
+                     data={"scalar": {"value": i, "units": "m", "tags": ["a"]},
+                           "string": {"value": "val_{}".format(i % 3)},
+                           "scalar_list": {"value": [i, i + 1, i - 1]},
+                           "string_list": {"value": ["x", "y"], "tags": ["b"]},
+                           "empty_list": {"value": []}},
+                     files={"/path/{}.txt".format(i): {"mimetype": "text", "tags": ["c"]}})
+        rec.curve_sets["cs"] = {"independent": {"time": {"value": [0, 1, i]}},
+                                "dependent": {"energy": {"value": [i, 2, 3],
+                                                         "units": "J"}}}
+        records.append(rec)
+    return records
+
+
+def _dump_tables(factory):
+    """Return the sorted contents of every Record-related table in a factory's db."""
+    contents = {}
+    # pylint: disable=protected-access
+    for table in factory.create_record_dao()._bulk_tables():
+        rows = factory.session.execute(table.__table__.select()).fetchall()
+        contents[table.__tablename__] = sorted(tuple(str(x) for x in row) for row in rows)
+    return contents
+
+
+@contextlib.contextmanager
+def _recorded_statements(factory):
+    """
+    Record the SQL statements a factory's engine executes within a with block.
+
+    :param factory: The DAOFactory whose statements to record
+    :returns: (As a contextmanager) the list the statements are appended to
+    """
+    statements = []
+
+    def record_statement(_conn, _cursor, statement, *_):
+        """Record each statement executed."""
+        statements.append(statement)
+
+    engine = factory.session.get_bind()
+    sqlalchemy.event.listen(engine, "before_cursor_execute", record_statement)
+    try:
+        yield statements
+    finally:
+        sqlalchemy.event.remove(engine, "before_cursor_execute", record_statement)
+
+
+def _dump_catalog(factory):
+    """Return the sorted contents of a factory's DataCatalog."""
+    rows = factory.session.execute(schema.DataCatalog.__table__.select()).fetchall()
+    return sorted(tuple(str(x) for x in row) for row in rows)
+
+
+def _catalog_counts(factory):
+    """Return the Record count of each of a factory's DataCatalog entries."""
+    catalog = schema.DataCatalog
+    return {(x.type, x.name, x.kind): x.record_count for x in
+            factory.session.execute(sqlalchemy.select(catalog.type, catalog.name,
+                                                      catalog.kind, catalog.record_count))}
+
+
 class TestModify(SQLMixin, tests.backend_test.TestModify):
     """
     Provides methods needed for modify-type tests on the SQL backend.
@@ -77,6 +183,473 @@ class TestModify(SQLMixin, tests.backend_test.TestModify):
 
     __test__ = True
 
+    def test_bulk_insert_matches_orm(self):
+        """Test that the Core bulk insert path writes the same rows as the ORM path."""
+        # pylint: disable=protected-access
+        orm_factory = self.create_dao_factory()
+        try:
+            for factory in (orm_factory, self.factory):
+                factory.upgrade_schema(store_sections=True)
+            records = _make_bulk_records(20)
+            orm_factory.create_record_dao()._orm_insert_no_commit(records)
+            orm_factory.session.commit()
+            self.factory.create_record_dao()._bulk_insert_no_commit(records)
+            self.factory.session.commit()
+            self.assertEqual(_dump_tables(orm_factory), _dump_tables(self.factory))
+            self.assertEqual(_dump_catalog(orm_factory), _dump_catalog(self.factory))
+        finally:
+            orm_factory.close()
+
+    def test_insert_large_iterable_uses_bulk(self):
+        """Test that large inserts default to the bulk path, small ones to the ORM."""
+        # pylint: disable=protected-access
+        record_dao = self.factory.create_record_dao()
+        records = _make_bulk_records(backend.BULK_INSERT_THRESHOLD)
+        with mock.patch.object(record_dao, "_orm_insert_no_commit") as orm_insert:
+            record_dao.insert(records[:1])
+            orm_insert.assert_called_once()
+        with mock.patch.object(record_dao, "_bulk_insert_no_commit",
+                               wraps=record_dao._bulk_insert_no_commit) as bulk_insert:
+            record_dao.insert(iter(records))
+            bulk_insert.assert_called_once()
+        self.assertEqual(self.factory.session.query(schema.Record).count(),
+                         backend.BULK_INSERT_THRESHOLD)
+        self.assertEqual(record_dao.get("rec_3").data["scalar"]["value"], 3)
+
+    def test_bulk_load(self):
+        """Test that bulk_load() defers index builds and restores everything after."""
+        test_db = './test_{}_bulk.temp'.format(time.time())
+
+        def index_names(factory):
+            """Return the names of all indexes in the factory's db."""
+            inspector = sqlalchemy.inspect(factory.session.connection())
+            return set(index['name'] for table in inspector.get_table_names()
+                       for index in inspector.get_indexes(table))
+
+        try:
+            factory = self.create_dao_factory(test_db)
+            original_indexes = index_names(factory)
+            self.assertIn('scalar_name_value_idx', original_indexes)
+            record_dao = factory.create_record_dao()
+            with factory.bulk_load():
+                self.assertFalse(index_names(factory))
+                self.assertEqual(factory.session.connection()
+                                 .exec_driver_sql('pragma synchronous').scalar(), 0)
+                record_dao.insert(_make_bulk_records(backend.BULK_INSERT_THRESHOLD))
+            self.assertEqual(index_names(factory), original_indexes)
+            self.assertNotEqual(factory.session.connection()
+                                .exec_driver_sql('pragma synchronous').scalar(), 0)
+            stats = factory.session.connection().exec_driver_sql(
+                "select count(*) from sqlite_master where name='sqlite_stat1'").scalar()
+            self.assertEqual(stats, 1)
+            self.assertEqual(len(list(record_dao.data_query(scalar=5))), 1)
+            factory.close()
+        finally:
+            tests.backend_test.remove_file(test_db)
+
+    def test_bulk_load_resets_pooled_connections(self):
+        """Test that connections pooled during bulk_load() don't keep its pragmas."""
+        test_db = './test_{}_bulk_pool.temp'.format(time.time())
+        try:
+            factory = backend.DAOFactory(test_db, allow_connection_pooling=True)
+            engine = factory.session.get_bind()
+
+            def check_out(count):
+                """Check out several connections at once, returning their syncing."""
+                with contextlib.ExitStack() as stack:
+                    connections = [stack.enter_context(engine.connect()) for _ in range(count)]
+                    return [connection.exec_driver_sql('pragma synchronous').scalar()
+                            for connection in connections]
+
+            with factory.bulk_load():
+                self.assertEqual(check_out(2), [0, 0])
+            factory.session.close()
+            self.assertNotIn(0, check_out(3))
+            factory.close()
+        finally:
+            tests.backend_test.remove_file(test_db)
+
+    def test_bulk_load_by_url(self):
+        """Test that bulk_load() tunes SQLite databases opened by URL too."""
+        test_db = './test_{}_bulk_url.temp'.format(time.time())
+        try:
+            factory = backend.DAOFactory('sqlite:///' + test_db)
+            with factory.bulk_load():
+                self.assertEqual(factory.session.connection()
+                                 .exec_driver_sql('pragma synchronous').scalar(), 0)
+            factory.close()
+        finally:
+            tests.backend_test.remove_file(test_db)
+
+    def test_bulk_load_restores_on_error(self):
+        """Test that bulk_load() rebuilds indexes even if the load fails."""
+        with self.assertRaises(ValueError):
+            with self.factory.bulk_load():
+                raise ValueError("load failed")
+        inspector = sqlalchemy.inspect(self.factory.session.connection())
+        self.assertIn('type_idx', set(index['name'] for index in
+                                      inspector.get_indexes('Record')))
+
+    def test_update_rewrites_only_changed_rows(self):
+        """Test that updates diff rows rather than deleting and reinserting Records."""
+        record_dao = self.factory.create_record_dao()
+        relationship_dao = self.factory.create_relationship_dao()
+        records = _make_bulk_records(3)
+        record_dao.insert(records)
+        relationship_dao.insert(subject_id="rec_0", predicate="precedes", object_id="rec_1")
+
+        def rowids(table, name):
+            """Map record ids to the SQLite rowids of their <name> rows."""
+            query = sqlalchemy.select(sqlalchemy.literal_column("rowid"), table.id).where(
+                table.name == name)
+            return {row[1]: row[0] for row in self.factory.session.execute(query)}
+
+        untouched = rowids(schema.ScalarData, "scalar")
+        changed = records[:2]
+        for rec in changed:
+            rec.data["string"]["value"] = "changed"
+            rec.data["string"]["tags"] = ["new_tag"]
+            rec.data["new_scalar"] = {"value": 1.5}
+            del rec.data["string_list"]
+            rec.data["scalar_list"]["value"] = "now a string"
+            rec.files["/path/new.txt"] = {"mimetype": "text"}
+        record_dao.update(changed)
+
+        self.assertEqual(rowids(schema.ScalarData, "scalar"), untouched)
+        for rec in changed:
+            self._assert_records_equal(record_dao.get(rec.id), rec)
+        self.assertEqual(set(record_dao.data_query(string="changed")), {"rec_0", "rec_1"})
+        self.assertEqual(set(record_dao.data_query(new_scalar=1.5)), {"rec_0", "rec_1"})
+        self.assertEqual(set(record_dao.data_query(scalar_list="now a string")),
+                         {"rec_0", "rec_1"})
+        self.assertEqual(set(record_dao.data_query(string_list=has_any("x"))), {"rec_2"})
+        self.assertEqual(set(record_dao.data_query(scalar_list=any_in(DataRange(0, 5)))),
+                         {"rec_2"})
+        self.assertEqual(len(list(record_dao.get_given_document_uri("/path/new.txt"))), 2)
+        self.assertEqual(len(relationship_dao.get(subject_id="rec_0")), 1)
+        tags = self.factory.session.execute(
+            sqlalchemy.select(schema.StringData.tags).where(schema.StringData.id == "rec_0",
+                                                            schema.StringData.name == "string")
+        ).scalar()
+        self.assertEqual(backend.json.loads(tags), ["new_tag"])
+
+    def test_update_appendonly_batched(self):
+        """Test that append-only updates fetch old versions a chunk at a time."""
+        record_dao = self.factory.create_record_dao()
+        record_dao.insert(_make_bulk_records(5))
+        updates = []
+        for i in range(5):
+            rec = Record(id="rec_{}".format(i), type="bulk")
+            rec.data["scalar"] = {"value": -1}  # Existing values win
+            rec.data["appended"] = {"value": i}
+            updates.append(rec)
+        with mock.patch.object(backend, "CHUNK_SIZE", 2), \
+                mock.patch.object(record_dao, "get", wraps=record_dao.get) as get:
+            record_dao.update_appendonly(updates)
+            self.assertEqual(get.call_count, 3)
+        for i in range(5):
+            data = record_dao.get("rec_{}".format(i)).data
+            self.assertEqual(data["scalar"]["value"], i)
+            self.assertEqual(data["appended"]["value"], i)
+            self.assertEqual(data["string_list"]["value"], ["x", "y"])
+
+    def test_delete_without_cascade(self):
+        """Test that deletes clear every table themselves, in chunks."""
+        self.factory.upgrade_schema(store_sections=True)
+        record_dao = self.factory.create_record_dao()
+        relationship_dao = self.factory.create_relationship_dao()
+        record_dao.insert(_make_bulk_records(5))
+        relationship_dao.insert(subject_id="rec_0", predicate="p", object_id="rec_4")
+        relationship_dao.insert(subject_id="rec_3", predicate="p", object_id="rec_1")
+        self.factory.session.commit()
+        # Make sure nothing is left for the backend to cascade
+        self.factory.session.execute(sqlalchemy.text("pragma foreign_keys=OFF"))
+        self.assertEqual(self.factory.session.execute(
+            sqlalchemy.text("pragma foreign_keys")).scalar(), 0)
+        with mock.patch.object(backend, "CHUNK_SIZE", 2):
+            record_dao.delete(iter(["rec_0", "rec_1", "rec_2"]))
+        self.assertEqual(set(record_dao.get_all(ids_only=True)), {"rec_3", "rec_4"})
+        for table in backend.BULK_INSERT_TABLES:
+            ids = self.factory.session.execute(sqlalchemy.select(table.__table__.c.id))
+            self.assertEqual(set(ids.scalars()), {"rec_3", "rec_4"}, table.__tablename__)
+        self.assertFalse(relationship_dao.get())
+
+    def test_delete_all_contents(self):
+        """Test that emptying the datastore clears every table."""
+        record_dao = self.factory.create_record_dao()
+        record_dao.insert(_make_bulk_records(3))
+        self.factory.create_relationship_dao().insert(subject_id="rec_0", predicate="p",
+                                                      object_id="rec_1")
+        # pylint: disable=protected-access
+        record_dao._do_delete_all_records()
+        for table in self.factory._schema_tables():
+            count = self.factory.session.execute(
+                sqlalchemy.select(sqlalchemy.func.count()).select_from(table)).scalar()
+            self.assertEqual(count, 0, table.name)
+        record_dao.insert(_make_bulk_records(1))
+        self.assertEqual(list(record_dao.get_all(ids_only=True)), ["rec_0"])
+
+    def test_upgrade_schema(self):
+        """Test that upgrade_schema() swaps an old database's indexes for the current ones."""
+        connection = self.factory.session.connection()
+        new_indexes = ["scalar_name_value_idx", "mimetype_idx", "relationship_object_idx"]
+        for index in new_indexes:
+            connection.execute(sqlalchemy.text("DROP INDEX {}".format(index)))
+        connection.execute(sqlalchemy.text(
+            'CREATE INDEX scalar_name_idx ON "ScalarData" (name)'))
+        self.factory.session.commit()
+        self.factory.create_record_dao().insert(_make_bulk_records(3))
+
+        created, dropped = self.factory.upgrade_schema()
+        six.assertCountEqual(self, created, new_indexes)
+        self.assertEqual(dropped, ["scalar_name_idx"])
+        inspector = sqlalchemy.inspect(self.factory.session.connection())
+        # pylint: disable=protected-access
+        for table in self.factory._schema_tables():
+            six.assertCountEqual(self, [x['name'] for x in inspector.get_indexes(table.name)],
+                                 [x.name for x in table.indexes])
+        self.assertEqual(self.factory.upgrade_schema(), ([], []))
+        self.assertFalse(sqlalchemy.inspect(self.factory.session.connection())
+                         .has_table(schema.RecordSection.__tablename__))
+        self.assertEqual(len(list(self.factory.create_record_dao().get_all())), 3)
+
+    def test_sections(self):
+        """Test that Records' sections are kept up to date and fetched on their own."""
+        self.factory.upgrade_schema(store_sections=True)
+        record_dao = self.factory.create_record_dao()
+        records = _make_bulk_records(3)
+        record_dao.insert(records[:1])
+        record_dao.insert(records[1:], on_conflict="replace")  # The bulk path
+        records[0].data["scalar"]["value"] = 100
+        records[0].user_defined["note"] = "updated"
+        record_dao.update(records[0])
+        with _recorded_statements(self.factory) as statements:
+            projected = list(record_dao.get(["rec_0", "rec_1"], sections=["data",
+                                                                          "user_defined"]))
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn('"Record".raw', statements[0])
+        self.assertEqual(projected[0].data, records[0].data)
+        self.assertEqual(projected[0].user_defined, {"note": "updated"})
+        self.assertEqual(projected[1].data, records[1].data)
+        self.assertEqual(projected[1].curve_sets, {})
+        record_dao.delete("rec_1")
+        self.assertEqual(self.factory.session.query(schema.RecordSection)
+                         .filter(schema.RecordSection.id == "rec_1").count(), 0)
+
+    def test_upgrade_schema_fills_sections(self):
+        """Test that a database without sections works as before, then gains them on request."""
+        created, _ = self.factory.upgrade_schema(store_sections=True)
+        self.assertEqual(created, [schema.RecordSection.__tablename__])
+        record_dao = self.factory.create_record_dao()
+        record_dao.insert(_make_bulk_records(2))
+        expected = _dump_tables(self.factory)[schema.RecordSection.__tablename__]
+        self.factory.session.execute(sqlalchemy.text('DROP TABLE "RecordSection"'))
+        self.factory.session.commit()
+        old_dao = backend.RecordDAO(session=sqlalchemy.orm.Session(
+            bind=self.factory.session.get_bind()))
+        old_dao.insert(_make_bulk_records(3)[2], on_conflict="skip")
+        old_dao.update(_make_bulk_records(1))
+        data_only = old_dao.get("rec_2", sections=["data"])
+        self.assertEqual(data_only.data, _make_bulk_records(3)[2].data)
+        self.assertEqual(data_only.curve_sets, {})
+        old_dao.delete("rec_2")
+
+        self.assertEqual(self.factory.upgrade_schema(), ([], []))
+        created, _ = self.factory.upgrade_schema(store_sections=True)
+        self.assertIn(schema.RecordSection.__tablename__, created)
+        self.assertEqual(_dump_tables(self.factory)[schema.RecordSection.__tablename__],
+                         expected)
+
+    def assert_listing_matches_scans(self, record_dao):
+        """Assert that listing names and types from the catalog matches scanning for them."""
+        def listing():
+            """List everything the catalog answers."""
+            listed = {"types": sorted(record_dao.get_available_types()),
+                      "curve_sets": sorted(record_dao.get_curve_set_names())}
+            for record_type in ("bulk", "other"):
+                for data_type in ("scalar", "string", "scalar_list", "string_list"):
+                    for filter_constants in (True, False):
+                        listed[(record_type, data_type, filter_constants)] = sorted(
+                            record_dao.data_names(record_type, data_type, filter_constants))
+            return listed
+
+        from_catalog = listing()
+        with mock.patch.object(backend.RecordDAO, "_has_catalog", return_value=False):
+            self.assertEqual(from_catalog, listing())
+
+    def test_catalog(self):
+        """Test that the DataCatalog is kept up to date as Records are written."""
+        record_dao = self.factory.create_record_dao()
+        records = _make_bulk_records(6)
+        for record in records:
+            record.data["material"] = {"value": "steel"}
+        records.append(Record(id="other_0", type="other", data={"material": {"value": 1}}))
+        record_dao.insert(records[:2])  # The ORM path
+        record_dao.insert(records[2:], on_conflict="skip")  # The bulk path
+        inserted = _dump_catalog(self.factory)
+        self.assertEqual(self.factory.rebuild_catalog(), len(inserted))
+        self.assertEqual(_dump_catalog(self.factory), inserted)
+        self.assertNotIn("material", record_dao.data_names("bulk", filter_constants=True))
+        self.assert_listing_matches_scans(record_dao)
+
+        # Listing from the catalog leaves the data tables alone
+        with _recorded_statements(self.factory) as statements:
+            record_dao.get_available_types()
+            record_dao.get_curve_set_names()
+            record_dao.data_names("bulk", filter_constants=True)
+        self.assertTrue(statements)
+        self.assertTrue(all("DataCatalog" in x and "ScalarData" not in x
+                            and "StringData" not in x for x in statements))
+
+        # Once "string" is the same everywhere, its (stale) entry is checked
+        for record in records[:6]:
+            record.data["string"]["value"] = "val_0"
+        records[0].data["scalar"]["value"] = 100
+        del records[1].data["string_list"]
+        record_dao.update(records[:6])
+        self.assertIn("string", record_dao.data_names("bulk", filter_constants=False))
+        self.assertNotIn("string", record_dao.data_names("bulk", filter_constants=True))
+        self.assertIn("scalar", record_dao.data_names("bulk", filter_constants=True))
+        self.assert_listing_matches_scans(record_dao)
+        record_dao.delete(["rec_0", "rec_1", "other_0"])
+        record_dao.insert(records[2], on_conflict="replace")
+        counts = _catalog_counts(self.factory)
+        self.assertEqual(counts[("bulk", "", "record")], 4)
+        self.assertNotIn(("other", "", "record"), counts)
+        self.assert_listing_matches_scans(record_dao)
+        self.factory.rebuild_catalog()
+        self.assertEqual(_catalog_counts(self.factory), counts)
+        self.assertFalse(any(x.stale for x in self.factory.session.query(schema.DataCatalog)))
+
+    def test_find_sorted_pushdown(self):
+        """Test that ordered, paged finds leave the ordering and limit to the database."""
+        record_dao = self.factory.create_record_dao()
+        record_dao.insert(_make_bulk_records(20))
+        with _recorded_statements(self.factory) as statements:
+            page = list(record_dao._find(types="bulk", order_by="scalar", descending=True,
+                                         limit=3, after="rec_15"))
+        self.assertEqual([x.id for x in page], ["rec_14", "rec_13", "rec_12"])
+        # Descending, strings come first: the cursor's looked for there, then among
+        # the scalars, which fill the page with a single statement
+        self.assertEqual(len(statements), 3)
+        self.assertIn("ORDER BY", statements[-1])
+        self.assertIn("LIMIT", statements[-1])
+
+    def test_upgrade_schema_builds_catalog(self):
+        """Test that a database without a catalog works as before, then gains one on migration."""
+        record_dao = self.factory.create_record_dao()
+        record_dao.insert(_make_bulk_records(3))
+        expected = _dump_catalog(self.factory)
+        self.factory.session.execute(sqlalchemy.text('DROP TABLE "DataCatalog"'))
+        self.factory.session.commit()
+        with self.assertRaises(ValueError):
+            backend.DAOFactory.rebuild_catalog(mock.Mock(session=sqlalchemy.orm.Session(
+                bind=self.factory.session.get_bind())))
+        old_dao = backend.RecordDAO(session=sqlalchemy.orm.Session(
+            bind=self.factory.session.get_bind()))
+        old_dao.insert(Record(id="extra", type="other", data={"scalar": {"value": 1}}))
+        old_dao.delete("extra")
+        self.assertEqual(sorted(old_dao.get_available_types()), ["bulk"])
+        self.assertEqual(list(old_dao.data_names("bulk", "scalar")), ["scalar"])
+
+        created, _ = self.factory.upgrade_schema()
+        self.assertIn(schema.DataCatalog.__tablename__, created)
+        self.assertEqual(_dump_catalog(self.factory), expected)
+
+    def test_transaction_commits_once(self):
+        """Test that writes within a transaction() block share one commit."""
+        record_dao = self.factory.create_record_dao()
+        relationship_dao = self.factory.create_relationship_dao()
+        with mock.patch.object(self.factory.session, "commit",
+                               wraps=self.factory.session.commit) as commit:
+            with self.factory.transaction():
+                record_dao.insert(_make_bulk_records(4))
+                record_dao.insert(Record(id="extra", type="bulk"))
+                relationship_dao.insert(subject_id="rec_0", predicate="p", object_id="rec_1")
+                record_dao.update(Record(id="rec_2", type="updated"))
+                record_dao.delete("rec_3")
+                with self.factory.transaction():
+                    record_dao.insert(_make_bulk_records(7)[5:], batch_size=1)
+                self.assertFalse(commit.called)
+            commit.assert_called_once()
+        self.assertEqual(set(record_dao.get_all(ids_only=True)),
+                         {"rec_0", "rec_1", "rec_2", "rec_5", "rec_6", "extra"})
+        self.assertEqual(record_dao.get("rec_2").type, "updated")
+        self.assertEqual(len(relationship_dao.get(subject_id="rec_0")), 1)
+
+    def test_transaction_rolls_back(self):
+        """Test that a failed transaction() block keeps none of its writes."""
+        record_dao = self.factory.create_record_dao()
+        record_dao.insert(Record(id="before", type="bulk"))
+        with self.assertRaises(RuntimeError):
+            with self.factory.transaction():
+                record_dao.insert(_make_bulk_records(3), batch_size=2)
+                record_dao.delete("before")
+                raise RuntimeError("Abort!")
+        self.assertEqual(list(record_dao.get_all(ids_only=True)), ["before"])
+        # Outside a block, calls commit individually again
+        record_dao.insert(Record(id="after", type="bulk"))
+        self.factory.session.rollback()
+        self.assertTrue(record_dao.exist("after"))
+
+    def test_transaction_rolls_back_by_url(self):
+        """Test that transaction() rolls back SQLite databases opened by URL too."""
+        test_db = './test_{}_transaction.temp'.format(time.time())
+        try:
+            factory = backend.DAOFactory('sqlite:///' + test_db)
+            self.assertTrue(factory.use_sqlite)
+            record_dao = factory.create_record_dao()
+            with self.assertRaises(RuntimeError):
+                with factory.transaction():
+                    record_dao.insert(Record(id="a", type="bulk"))
+                    raise RuntimeError("Abort!")
+            factory.close()
+            factory = backend.DAOFactory('sqlite:///' + test_db)
+            self.assertFalse(factory.create_record_dao().exist("a"))
+            factory.close()
+        finally:
+            tests.backend_test.remove_file(test_db)
+
+    def test_transaction_delete_all_keeps_block(self):
+        """Test that emptying the database within a transaction() rolls back with it."""
+        record_dao = self.factory.create_record_dao()
+        record_dao.insert(Record(id="before", type="bulk"))
+        dialect = self.factory.session.get_bind().dialect
+        with self.assertRaises(RuntimeError):
+            with self.factory.transaction():
+                record_dao.insert(Record(id="during", type="bulk"))
+                # MySQL's TRUNCATE would commit the block, so it mustn't be used there
+                with mock.patch.object(dialect, "name", "mysql"):
+                    with _recorded_statements(self.factory) as statements:
+                        record_dao._do_delete_all_records()
+                self.assertFalse(list(record_dao.get_all(ids_only=True)))
+                raise RuntimeError("Abort!")
+        self.assertFalse([x for x in statements if "TRUNCATE" in x or "FOREIGN_KEY" in x])
+        self.assertEqual(list(record_dao.get_all(ids_only=True)), ["before"])
+
+    def test_transaction_isolates_failed_calls(self):
+        """Test that a call failing within a transaction() block leaves none of its writes."""
+        record_dao = self.factory.create_record_dao()
+        records = _make_bulk_records(5)
+        records[3] = records[0]
+        with self.factory.transaction():
+            record_dao.insert(Record(id="kept", type="bulk"))
+            with self.assertRaises(dao.BatchInsertError) as context:
+                record_dao.insert(records, batch_size=2)
+            self.assertEqual(context.exception.records_committed, 0)
+            with self.assertRaises(Exception):
+                record_dao.insert(records[:4])
+        self.assertEqual(list(record_dao.get_all(ids_only=True)), ["kept"])
+
+    def test_bulk_insert_rolls_back(self):
+        """Test that a failed bulk insert leaves nothing behind."""
+        record_dao = self.factory.create_record_dao()
+        records = _make_bulk_records(backend.BULK_INSERT_THRESHOLD)
+        records.append(records[0])
+        with self.assertRaises(Exception):
+            record_dao.insert(records)
+        self.assertFalse(list(record_dao.get_all(ids_only=True)))
+
 
 class TestQuery(SQLMixin, tests.backend_test.TestQuery):
     """
@@ -87,6 +660,121 @@ class TestQuery(SQLMixin, tests.backend_test.TestQuery):
 
     __test__ = True
 
+    # pylint: disable=protected-access
+    def test_find_single_statement(self):
+        """Test that find() runs as one statement and matches the staged queries."""
+        find_args = [{"types": "foo", "data": {"spam_scal": DataRange(-10, 10.5)}},
+                     {"types": not_("bar"), "file_uri": has_any("%png", "beeq.%")},
+                     {"data": {"spam_scal": DataRange(0), "val_data": "spam"},
+                      "mimetype": "image/png"},
+                     {"file_uri": has_all("%png", "%"), "types": ["foo", "bar"],
+                      "id_pool": ["spam", "spam2", "spam3", "spam4"]},
+                     {"data": {"flex_data_1": exists(), "flex_data_2": not_(exists())}},
+                     {"data": {"eggs_scal": exists()}, "types": not_("bar"),
+                      "alias_dict": {"eggs_scal": ["val_data", "val_data_3"]}}]
+        for args in find_args:
+            expected = list(dao.RecordDAO._find(self.record_dao, ids_only=True, **args))
+            with _recorded_statements(self.factory) as statements:
+                found = list(self.record_dao._find(ids_only=True, **args))
+            self.assertEqual(len(statements), 1, args)
+            six.assertCountEqual(self, found, expected)
+            six.assertCountEqual(self, [rec.id for rec in self.record_dao._find(**args)],
+                                 expected)
+
+    def test_find_huge_id_pool(self):
+        """Test that find() works when the id_pool is past SQLite's variable limit."""
+        id_pool = ["fake_{}".format(x) for x in range(300000)] + ["spam", "spam2"]
+        expected = list(self.record_dao.get_all_of_type("run", id_pool=["spam", "spam2"],
+                                                        ids_only=True))
+        with mock.patch.object(self.record_dao, "_find_with_manual_intersection") as fallback:
+            six.assertCountEqual(self, self.record_dao._find(types="run", id_pool=id_pool,
+                                                             ids_only=True), expected)
+            fallback.assert_not_called()
+
+    def test_find_with_manual_intersection(self):
+        """Test that find()'s fallback streams each query in id order and merges them."""
+        args = {"types": not_("bar"), "data": {"spam_scal": DataRange(-10, 10.5)},
+                "file_uri": "%"}
+        expected = sorted(self.record_dao._find(ids_only=True, **args))
+        self.assertTrue(expected)
+        stream = self.record_dao._run_ordered_find_query("file_uri", "%")
+        ids = list(stream)
+        self.assertEqual(ids, sorted(ids))
+        found = self.record_dao._find_with_manual_intersection(ids_only=True, **args)
+        self.assertEqual(next(found), expected[0])
+        self.assertEqual([expected[0]] + list(found), expected)
+
+    def test_get_skips_identity_map(self):
+        """Test that getting Records streams raw columns rather than ORM entities."""
+        session = self.factory.session
+        session.expunge_all()
+        all_ids = list(self.record_dao.get_all(ids_only=True))
+        with mock.patch.object(backend, "CHUNK_SIZE", 2):
+            records = list(self.record_dao.get_all())
+        six.assertCountEqual(self, [x.id for x in records], all_ids)
+        six.assertCountEqual(self, [x.id for x in self.record_dao.get(all_ids[:3])], all_ids[:3])
+        self.assertEqual(self.record_dao.get(all_ids[0]).id, all_ids[0])
+        self.assertFalse(session.identity_map)
+
+    def test_id_pool_tables(self):
+        """Test that queries give the same results whether or not pools go to a table."""
+        id_pool = ["spam", "spam2", "spam3", "spam4", "spam", "nonexistent"]
+        queries = [
+            lambda: self.record_dao._do_data_query({"spam_scal": DataRange(-10, 10.5)},
+                                                   id_pool=id_pool),
+            lambda: self.record_dao.get_all_of_type(["run", "foo"], id_pool=id_pool,
+                                                    ids_only=True),
+            lambda: self.record_dao._do_get_given_document_uri("%", id_pool=id_pool,
+                                                               ids_only=True),
+            lambda: self.record_dao.get_with_mime_type("image/png", id_pool=id_pool,
+                                                       ids_only=True),
+            lambda: self.record_dao._find(types=["run", "foo"], file_uri="%",
+                                          id_pool=id_pool, ids_only=True),
+            lambda: [x.raw for x in self.record_dao._find(types=["run", "foo"], file_uri="%",
+                                                          id_pool=id_pool)],
+            lambda: [(x.id, x.type) for x in self.record_dao._find(file_uri="%", lazy=True,
+                                                                   id_pool=id_pool)],
+            lambda: self.record_dao.get_data_for_records(["spam_scal", "val_data"],
+                                                         id_list=id_pool)]
+        inlined = [list(query()) for query in queries]
+        self.assertTrue(all(inlined))
+        with mock.patch.object(backend, "ID_POOL_TABLE_THRESHOLD", 2):
+            for query, expected in zip(queries, inlined):
+                six.assertCountEqual(self, query(), expected)
+        temp_tables = self.factory.session.execute(
+            sqlalchemy.text("select name from sqlite_temp_master")).fetchall()
+        self.assertFalse(temp_tables)
+
+    def test_find_concurrent(self):
+        """Test that concurrent find()s use a session per query, where they can."""
+        # pylint: disable=protected-access
+        test_db = './test_{}_concurrent.temp'.format(time.time())
+        args = {"data": {"spam_scal": DataRange(-10, 10.5)}, "types": ["run", "foo"],
+                "file_uri": "%"}
+        try:
+            factory = self.create_dao_factory(test_db)
+            record_dao = factory.create_record_dao()
+            tests.backend_test.populate_database_with_data(record_dao)
+            expected = list(record_dao._find(ids_only=True, **args))
+            self.assertTrue(expected)
+            with mock.patch.object(record_dao, "_concurrent_dao",
+                                   wraps=record_dao._concurrent_dao) as concurrent_dao:
+                six.assertCountEqual(self, record_dao._find(ids_only=True, concurrent=True,
+                                                            **args), expected)
+                self.assertEqual(concurrent_dao.call_count, 3)
+                # Other connections couldn't see a transaction's changes
+                with factory.transaction():
+                    with self.assertLogs("sina.dao", "WARNING"):
+                        found = list(record_dao._find(ids_only=True, concurrent=True, **args))
+                six.assertCountEqual(self, found, expected)
+                self.assertEqual(concurrent_dao.call_count, 3)
+            factory.close()
+        finally:
+            tests.backend_test.remove_file(test_db)
+        # In-memory databases exist only in their one connection
+        with self.assertLogs("sina.dao", "WARNING"):
+            list(self.factory.create_record_dao()._find(types="run", concurrent=True))
+
 
 class TestImportExport(SQLMixin, tests.backend_test.TestImportExport):
     """
@@ -96,3 +784,14 @@ class TestImportExport(SQLMixin, tests.backend_test.TestImportExport):
     """
 
     __test__ = True
+
+    def test_pipelined_import_validates_once(self):
+        """Test that Records validated by import_json()'s workers aren't validated again."""
+        test_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_files")
+        json_paths = [os.path.join(test_dir, "sample_doc_1.json"),
+                      os.path.join(test_dir, "recs_no_rels.json")]
+        with mock.patch.object(backend, "_validated_json",
+                               wraps=backend._validated_json) as validated_json:
+            import_json(factory=self.factory, json_paths=json_paths, jobs=2)
+            validated_json.assert_not_called()
+        self.assertTrue(self.factory.create_record_dao().exist("child_1"))
@@ -16,7 +16,7 @@ import io
 import six
 
 # Disable pylint check due to its issue with virtual environments
-from mock import patch  # pylint: disable=import-error
+from mock import patch, MagicMock  # pylint: disable=import-error
 
 import sina.utils
 from sina.utils import (DataRange, StringListCriteria, ScalarListCriteria,
@@ -113,6 +113,12 @@ class TestSinaUtils(unittest.TestCase):  # pylint: disable=too-many-public-metho
         shared_elements = set(["spam", "eggs", 29])
         self.assertEqual(sina.utils.intersect_lists(all_lists), shared_elements)
 
+    def test_intersect_lists_stops_when_empty(self):
+        """Test that lists past an empty intersection aren't consumed."""
+        never_read = MagicMock()
+        self.assertEqual(sina.utils.intersect_lists([["spam"], ["eggs"], never_read]), set())
+        never_read.__iter__.assert_not_called()
+
     def test_intersect_ordered_empty(self):
         """Test that the intersection of empty iterators is empty."""
         gen_none = (i for i in [])
@@ -757,6 +763,16 @@ class TestSinaUtils(unittest.TestCase):  # pylint: disable=too-many-public-metho
             sina.utils.sort_and_standardize_criteria({"bork": ["meow"]})
         self.assertIn('criteria must be a number, string', str(context.exception))
 
+    def test_sort_universal_criteria(self):
+        """Test that exists() and not_(exists()) are sorted as universal criteria."""
+        negated = sina.utils.not_(sina.utils.exists())
+        universal = sort_and_standardize_criteria({"here": sina.utils.exists(),
+                                                   "gone": negated})[-1]
+        six.assertCountEqual(self, universal, [("here", sina.utils.exists()),
+                                               ("gone", negated)])
+        with self.assertRaises(ValueError):
+            sort_and_standardize_criteria({"bork": sina.utils.not_(12)})
+
     def test_parse_data_string(self):
         """Test the function for parsing a string to names and DataRanges."""
         just_one = "speed=[1,2)"